@@ -0,0 +1,94 @@
+'''
+Done tickets kept out of the workbook, in compressed monthly partitions.
+
+Most tickets are Done and an RD never reads them. A partition holds the
+tickets archived in one month, as the marshalled packed rows in a gzip
+file, in a directory next to the workbook. A ticket is in the workbook or
+in the archive, never in both; if a crash leaves it in both, the
+workbook wins.
+
+Index:
+    TicketArchive
+'''
+
+import datetime
+import gzip
+import marshal
+import os
+from typing import Dict, Iterator, List
+
+from instrument import count
+from ticket_db import TicketFormat
+
+ARCHIVE_VERSION = 1
+
+class TicketArchive():
+    '''Archive partitions of a workbook, one per month.'''
+    SUFFIX = '.archive'
+
+    def __init__(self, ticket_file: str) -> None:
+        self.archive_dir = ticket_file + self.SUFFIX
+
+    @staticmethod
+    def this_month() -> str:
+        '''Name of the partition of this month.'''
+        return datetime.date.today().strftime('%Y-%m')
+
+    def __path(self, month: str) -> str:
+        return os.path.join(self.archive_dir, month + '.gz')
+
+    def months(self) -> List[str]:
+        '''Names of the partitions, oldest first.'''
+        try:
+            names = os.listdir(self.archive_dir)
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-3] for name in names if name.endswith('.gz'))
+
+    def open(self) -> list:
+        '''Open every partition, the caller holds the lock while it opens them.'''
+        return [open(self.__path(month), 'rb') for month in self.months()]
+
+    @staticmethod
+    def __read(partition) -> List[TicketFormat]:
+        '''Decode an open partition and close it.'''
+        with partition, gzip.open(partition) as content:
+            version, rows = marshal.loads(content.read())
+        if version != ARCHIVE_VERSION:
+            raise ValueError('archive version %r' % version)
+        count('rows_from_archive', len(rows))
+        return [TicketFormat.from_packed(row) for row in rows]
+
+    @staticmethod
+    def iter_open(partitions: list) -> Iterator[TicketFormat]:
+        '''Yield the tickets of the open partitions, one partition in memory at a time.'''
+        for partition in partitions:
+            yield from TicketArchive.__read(partition)
+
+    def load(self) -> Dict[str, List[TicketFormat]]:
+        '''Get the tickets of each partition.'''
+        return {month: self.__read(open(self.__path(month), 'rb')) for month in self.months()}
+
+    def store(self, month: str, tickets: List[TicketFormat]) -> None:
+        '''Write the partition of the month, drop it when there is no ticket.'''
+        path = self.__path(month)
+        if not tickets:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        os.makedirs(self.archive_dir, exist_ok=True)
+        content = marshal.dumps((ARCHIVE_VERSION, [ticket.to_packed() for ticket in tickets]))
+        temp_file = path + '.tmp'
+        with open(temp_file, 'wb') as partition:
+            partition.write(gzip.compress(content))
+        os.replace(temp_file, path)
+        count('bytes_written', os.path.getsize(path))
+
+    def add(self, tickets: List[TicketFormat], month: str = None) -> None:
+        '''Add tickets to the partition of the month, this month by default.'''
+        if not tickets:
+            return
+        month = month or self.this_month()
+        path = self.__path(month)
+        saved = self.__read(open(path, 'rb')) if os.path.exists(path) else []
+        self.store(month, saved + tickets)
@@ -0,0 +1,201 @@
+'''
+Apply many operations in one load and one save.
+
+    python batch.py operations.jsonl --ticket-file ticket.xlsx --report report.jsonl
+
+Each operation is a JSON line, or a CSV row, with user, identity, op
+(C/R/S/P/U/D/BU/BD), title and the fields to set, e.g.
+    {"user": "Joseph", "identity": "RD", "op": "U", "title": "bug_1", "status": "Done"}
+A search gives the words in query and may give a limit, e.g.
+    {"user": "Amy", "identity": "PM", "op": "S", "query": "login crash", "limit": 10}
+and a report the fields to count by, e.g.
+    {"user": "Amy", "identity": "PM", "op": "P", "group_by": "assign_to,status"}
+A bulk update (BU) or delete (BD) takes a filter, as in query.parse_filter,
+and the update the fields to set; dry_run only counts the tickets, e.g.
+    {"user": "Amy", "identity": "PM", "op": "BU", "filter": {"assign_to": "alice",
+     "status": "Waiting"}, "set": {"status": "Done"}, "dry_run": true}
+In a CSV file filter and set are JSON text.
+Permissions are the same as in an interactive session.
+
+Index:
+    read_operations
+    run_operation
+    BatchRunner
+'''
+
+import argparse
+from contextlib import contextmanager
+import csv
+import io
+import json
+import sys
+import threading
+from typing import Iterable, Iterator, List
+
+from change_feed import ChangeFeed, PendingFeed
+from crud import CrudHandler
+from error_handler import AuthorizationException, InputException, TicketDBException
+import instrument
+from namespace import InputError
+from notification import add_mail_arguments, start_worker
+from storage import StorageInterface, open_storage
+from ticket_stats import GroupReport
+from ticket_store import TicketStore
+from user import load_user
+
+def read_operations(batch_file: str) -> Iterator[dict]:
+    '''Read the operations of a .csv file, or of a JSON Lines file.
+
+    A line that is not JSON is given as its text, run_operation fails it.
+    '''
+    with open(batch_file, newline='', encoding='utf-8') as operations:
+        if batch_file.lower().endswith('.csv'):
+            for row in csv.DictReader(operations):
+                operation = {key: value for key, value in row.items() if value != ''}
+                for key in ('send_mail', 'dry_run'):
+                    if key in operation:
+                        operation[key] = operation[key].upper() in ('Y', 'TRUE', '1')
+                yield operation
+        else:
+            for line in operations:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        yield line.strip()
+
+class _ThreadOutput(io.TextIOBase):
+    '''sys.stdout sending the prints of a thread capturing them to its own buffer.'''
+    def __init__(self, stdout) -> None:
+        self.stdout = stdout
+        self.local = threading.local() # .output, the buffer of the thread
+
+    def write(self, text: str) -> int:
+        output = getattr(self.local, 'output', None)
+        return (self.stdout if output is None else output).write(text)
+
+    def flush(self) -> None:
+        if getattr(self.local, 'output', None) is None:
+            self.stdout.flush()
+
+_capture_lock = threading.Lock()
+_capturing = 0 # threads capturing their prints now
+
+@contextmanager
+def _capture_output() -> Iterator[io.StringIO]:
+    '''Collect the prints of this thread in the block, the other threads print as before.
+
+    Unlike redirect_stdout, the threads running operations at once each
+    get their own messages.
+    '''
+    global _capturing
+    with _capture_lock:
+        if not isinstance(sys.stdout, _ThreadOutput):
+            sys.stdout = _ThreadOutput(sys.stdout)
+        thread_output = sys.stdout
+        _capturing += 1
+    output = io.StringIO()
+    thread_output.local.output = output
+    try:
+        yield output
+    finally:
+        thread_output.local.output = None
+        with _capture_lock:
+            _capturing -= 1
+            if not _capturing and sys.stdout is thread_output:
+                sys.stdout = thread_output.stdout
+
+def run_operation(ticket_store: TicketStore,
+                  operation: dict,
+                  change_feed: PendingFeed = None) -> dict:
+    '''Run one operation on the store, the printed messages go into the result.
+
+    An operation that fails, however malformed, gives a failed result
+    and leaves the store as it was, the other operations go on.
+    '''
+    if not isinstance(operation, dict):
+        return {'op': None, 'title': None, 'ok': False,
+                'error': str(InputError.NoSuchOperation), 'message': ''}
+    result = {'op': operation.get('op'), 'title': operation.get('title')}
+    try:
+        with _capture_output() as output:
+            user = load_user(operation.get('user', ''),
+                             str(operation.get('identity', '')).upper())
+            outcome = CrudHandler(user, ticket_store, change_feed=change_feed).choose_crud(
+                str(operation.get('op', '')).upper(), operation)
+        result['ok'] = True
+        if isinstance(outcome, list):
+            with ticket_store.reading(): # not while another thread edits them
+                result['tickets'] = [list(ticket.to_row()) for ticket in outcome]
+        elif isinstance(outcome, GroupReport):
+            result['groups'] = outcome.to_dicts()
+    except (AuthorizationException, InputException, TicketDBException) as error:
+        result['ok'] = False
+        result['error'] = str(error.error_type)
+    except (KeyError, TypeError, ValueError) as error: # a field of a malformed operation
+        result['ok'] = False
+        result['error'] = '%s: %s' % (type(error).__name__, error)
+    result['message'] = output.getvalue().strip()
+    return result
+
+class BatchRunner():
+    '''Run operations of many users against one load of the tickets.'''
+    def __init__(self, storage: StorageInterface, change_feed: ChangeFeed = None) -> None:
+        self.__storage = storage
+        self.__change_feed = change_feed
+        self.conflicts = [] # [TicketChange] not saved, changed by someone else meanwhile
+
+    def run(self, operations: Iterable[dict]) -> List[dict]:
+        '''Run the operations in order and save once, return one result per operation.
+
+        The changes are published to the feed after the save, those in
+        conflict are not.
+        '''
+        ticket_store = TicketStore(self.__storage.load())
+        pending_feed = None if self.__change_feed is None else PendingFeed(self.__change_feed)
+        results = []
+        for line, operation in enumerate(operations, 1):
+            result = run_operation(ticket_store, operation, pending_feed)
+            result['line'] = line
+            results.append(result)
+
+        changes = ticket_store.get_changes()
+        if changes:
+            self.conflicts = self.__storage.save(ticket_store.all_ticket, changes)
+            if pending_feed is not None:
+                pending_feed.publish(changes, self.conflicts)
+        return results
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('batch_file', help='operations, .csv or JSON Lines')
+    parser.add_argument('--ticket-file', required=True, help='workbook or database')
+    parser.add_argument('--report', help='write the results here instead of stdout')
+    parser.add_argument('--timing', help='write the timers and counters as JSON here')
+    add_mail_arguments(parser)
+    args = parser.parse_args()
+
+    if args.timing:
+        instrument.enable(json_file=args.timing)
+    mail_worker = start_worker(args)
+    batch_runner = BatchRunner(open_storage(args.ticket_file),
+                               ChangeFeed(args.ticket_file + ChangeFeed.SUFFIX))
+    results = batch_runner.run(read_operations(args.batch_file))
+    mail_worker.stop()
+    instrument.finish()
+    report = open(args.report, 'w', encoding='utf-8') if args.report else sys.stdout
+    try:
+        for result in results:
+            report.write(json.dumps(result, ensure_ascii=False) + '\n')
+    finally:
+        if report is not sys.stdout:
+            report.close()
+    failed = sum(1 for result in results if not result['ok'])
+    print('%d operations, %d failed.' % (len(results), failed), file=sys.stderr)
+    for change in batch_runner.conflicts:
+        print('Not saved, changed by someone else: %s'
+              % json.dumps(change.to_record(), ensure_ascii=False), file=sys.stderr)
+    return 1 if failed or batch_runner.conflicts else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
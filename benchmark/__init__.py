@@ -0,0 +1,8 @@
+'''
+Benchmarks of the ticket system, run them as modules:
+    python -m benchmark.suite --rows 1000 10000 --output result.json
+    python -m benchmark.stream_memory --rows 1000000
+
+suite is the run-to-run comparable set, the others look at one change
+each. workbook generates the synthetic tickets they all use.
+'''
@@ -0,0 +1,77 @@
+'''
+Reads of a shared store by a pool of threads, alone and beside a writer.
+
+    python -m benchmark.concurrency --rows 100000 --threads 1 2 4 8
+
+Each read is a select by assignee and a search for a word of the
+descriptions, the writer commits an edit of one ticket in a loop. The
+reads hold the lock together, so the read rate is bounded by the
+interpreter lock rather than by the store.
+'''
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import json
+import threading
+import time
+
+from benchmark.workbook import WORDS, make_rows
+from ticket_db import TicketFormat
+from ticket_store import TicketStore
+
+QUERY = WORDS[0] # a word of the generated descriptions
+
+def read(ticket_store: TicketStore, condition: TicketFormat, reads: int) -> None:
+    for _ in range(reads):
+        with ticket_store.reading():
+            ticket_store.select(condition)
+            ticket_store.search(QUERY, condition, limit=10)
+
+def write(ticket_store: TicketStore, ticket: TicketFormat, stop: threading.Event) -> int:
+    '''Edit the ticket until stopped, return how many commits.'''
+    commits = 0
+    while not stop.is_set():
+        with ticket_store.transaction() as transaction:
+            edited = transaction.edit(ticket)
+            edited.status = 'Done' if ticket.status == 'Waiting' else 'Waiting'
+        commits += 1
+    return commits
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--reads', type=int, default=2000, help='reads of each run')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    all_ticket = [TicketFormat.from_row(row) for row in make_rows(args.rows)]
+    for ticket_id, ticket in enumerate(all_ticket, 1):
+        ticket.ticket_id = ticket_id
+    ticket_store = TicketStore(all_ticket)
+    condition = TicketFormat.Empty()
+    condition.assign_to = all_ticket[0].assign_to
+    read(ticket_store, condition, 1) # build the index and the search index
+    assert ticket_store.search(QUERY, condition, limit=10), 'the search must find tickets'
+
+    for writer in (False, True):
+        for threads in args.threads:
+            stop = threading.Event()
+            with ThreadPoolExecutor(threads + writer) as executor:
+                writing = executor.submit(write, ticket_store, all_ticket[-1], stop) \
+                    if writer else None
+                start = time.perf_counter()
+                for future in [executor.submit(read, ticket_store, condition,
+                                               args.reads // threads)
+                               for _ in range(threads)]:
+                    future.result()
+                seconds = time.perf_counter() - start
+                stop.set()
+                commits = writing.result() if writer else 0
+            reads = args.reads // threads * threads
+            print(json.dumps({'bench': 'store_reads', 'rows': args.rows,
+                              'threads': threads, 'writer': writer,
+                              'reads_per_second': round(reads / seconds),
+                              'commits_per_second': round(commits / seconds)}))
+
+if __name__ == '__main__':
+    main()
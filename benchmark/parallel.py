@@ -0,0 +1,61 @@
+'''
+Loading several workbooks with 1 to N worker processes.
+
+    python -m benchmark.parallel --workbooks 8 --rows 20000 --workers 1 2 4 8
+
+The workbooks are loaded through MultiXlsxStorage, each with its journal.
+The speedup of each worker count is against one worker, which parses in
+this process. It cannot go above the number of cores, reported as cpus.
+'''
+
+import argparse
+import glob
+import json
+import os
+import tempfile
+import time
+
+from benchmark.workbook import write_workbook
+from multi_storage import MultiXlsxStorage
+
+def timed_load(list_file: str, max_workers: int, repeat: int) -> float:
+    '''Best seconds of loading the workbooks.'''
+    seconds = []
+    for _ in range(repeat):
+        for snapshot in glob.glob(os.path.join(os.path.dirname(list_file), '*.snapshot')):
+            os.remove(snapshot) # each load parses the workbooks
+        start = time.perf_counter()
+        MultiXlsxStorage(list_file, max_workers).load()
+        seconds.append(time.perf_counter() - start)
+    return min(seconds)
+
+def main() -> None:
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--workbooks', type=int, default=8)
+    parser.add_argument('--rows', type=int, default=20000, help='rows of each workbook')
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, cpus}))
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        list_file = os.path.join(work_dir, 'teams.workbooks')
+        with open(list_file, 'w', encoding='utf-8') as workbooks:
+            for i in range(args.workbooks):
+                write_workbook(os.path.join(work_dir, 'team_%d.xlsx' % i), args.rows, seed=i)
+                workbooks.write('team_%d.xlsx\n' % i)
+        seconds = {workers: timed_load(list_file, workers, args.repeat)
+                   for workers in args.workers}
+
+    print(json.dumps({'bench': 'parallel',
+                      'cpus': cpus,
+                      'workbooks': args.workbooks,
+                      'rows': args.rows,
+                      'result': [{'workers': workers,
+                                  'seconds': round(seconds[workers], 3),
+                                  'speedup': round(seconds[min(seconds)] / seconds[workers], 2)}
+                                 for workers in args.workers]}, indent=1))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+'''
+Sheet decoding, the former cell by cell parse against the column batched one.
+
+    python -m benchmark.parse --rows 100000
+
+The workbook is opened once, only the decoding of the opened sheet is
+timed.
+
+Index:
+    legacy_parse
+'''
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmark.workbook import write_workbook
+from error_handler import TicketDBException
+from namespace import TicketDBError
+from ticket_db import NormalGetSheetColumn, ParseTicketDB, TicketFormat
+
+def legacy_parse(data_sheet, sheet_column) -> list:
+    '''The former ParseTicketDB, six checked cell lookups a row, the first empty one raises.'''
+    def get_cell_value(row: int, column: int) -> str:
+        if not isinstance(row, int):
+            raise TicketDBException(TicketDBError.RowError)
+        elif row < 0:
+            raise TicketDBException(TicketDBError.RowError)
+        if column == -1:
+            raise TicketDBException(TicketDBError.TitleFail)
+        elif column < 0:
+            raise TicketDBException(TicketDBError.ColumnError)
+        value = data_sheet.cell_value(row, column)
+        if value == '':
+            raise TicketDBException(TicketDBError.ValueEmpty)
+        return value
+
+    all_ticket = []
+    for i in range(1, data_sheet.nrows):
+        all_ticket.append(TicketFormat(get_cell_value(i, sheet_column.title),
+                                       get_cell_value(i, sheet_column.description),
+                                       get_cell_value(i, sheet_column.assign_to),
+                                       get_cell_value(i, sheet_column.status),
+                                       get_cell_value(i, sheet_column.submitter),
+                                       get_cell_value(i, sheet_column.ticket_type),
+                                       i))
+    return all_ticket
+
+def best_of(func, repeat: int) -> tuple:
+    '''Run func repeat times, return the last result and the fastest seconds.'''
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return result, best
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        ticket_file = os.path.join(work_dir, 'ticket.xlsx')
+        write_workbook(ticket_file, args.rows)
+        start = time.perf_counter()
+        from xlrd import open_workbook
+        data_sheet = open_workbook(ticket_file).sheet_by_name('Sheet')
+        open_seconds = time.perf_counter() - start
+
+    sheet_column = NormalGetSheetColumn().get_sheet_column(data_sheet)
+    legacy, legacy_seconds = best_of(lambda: legacy_parse(data_sheet, sheet_column), args.repeat)
+
+    ticket_parser = ParseTicketDB.__new__(ParseTicketDB) # reuse the opened sheet
+    ticket_parser._ParseTicketDB__data_sheet = data_sheet
+    ticket_parser._ParseTicketDB__file_path = ticket_file
+    ticket_parser.get_sheet_column = NormalGetSheetColumn()
+    (batched, errors), batched_seconds = best_of(ticket_parser.parse, args.repeat)
+    assert not errors
+    assert [ticket.to_packed() for ticket in legacy] == [ticket.to_packed() for ticket in batched]
+    print(json.dumps({'bench': 'parse_decode', 'rows': args.rows,
+                      'open_seconds': round(open_seconds, 4),
+                      'legacy_seconds': round(legacy_seconds, 4),
+                      'batched_seconds': round(batched_seconds, 4),
+                      'legacy_rows_per_second': round(args.rows / legacy_seconds),
+                      'batched_rows_per_second': round(args.rows / batched_seconds)}))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+'''
+Role filters, the former exception-driven checker against the compiled query.
+
+    python -m benchmark.query --rows 200000
+'''
+
+import argparse
+import json
+import time
+
+from benchmark.workbook import make_rows
+from query import from_condition
+from ticket_db import TicketFormat
+from ticket_index import TicketIndex
+from user import UserPM, UserQA, UserRD
+
+class LegacyTicketAccessChecker():
+    '''The former checker, a mismatch unwinds an exception.'''
+    def __init__(self, condition: TicketFormat) -> None:
+        self.__condition = condition
+
+    def __check_condition(self, condition, item) -> None:
+        if condition != False and condition != item:
+            raise False
+
+    def check_accessible(self, one_ticket: TicketFormat) -> bool:
+        try:
+            self.__check_condition(self.__condition.assign_to, one_ticket.assign_to)
+            self.__check_condition(self.__condition.status, one_ticket.status)
+            self.__check_condition(self.__condition.submitter, one_ticket.submitter)
+            self.__check_condition(self.__condition.ticket_type, one_ticket.ticket_type)
+            return True
+        except:
+            return False
+
+def make_ticket(row_num: int) -> list:
+    '''Synthetic tickets, 50 assignees and 20 submitters.'''
+    return [TicketFormat.from_row(row) for row in make_rows(row_num)]
+
+def timed(func) -> tuple:
+    '''Run func, return its result and seconds.'''
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    args = parser.parse_args()
+
+    all_ticket = make_ticket(args.rows)
+    ticket_index, index_seconds = timed(lambda: TicketIndex(all_ticket))
+    print(json.dumps({'bench': 'build_index', 'rows': args.rows,
+                      'seconds': round(index_seconds, 4)}))
+
+    for user in (UserPM('pm'), UserQA('submitter_3'), UserRD('assignee_8')):
+        condition = user.read_condition
+        # the former TicketReader built a checker per ticket
+        legacy, legacy_seconds = timed(lambda: [
+            ticket for ticket in all_ticket
+            if LegacyTicketAccessChecker(condition).check_accessible(ticket)])
+        query = from_condition(condition)
+        scanned, scan_seconds = timed(lambda: list(query.filter(all_ticket)))
+        planned, plan_seconds = timed(lambda: query.run(ticket_index))
+        assert legacy == scanned == planned
+        print(json.dumps({'bench': 'read_filter',
+                          'identity': user.user_identity.value,
+                          'rows': args.rows,
+                          'matched': len(planned),
+                          'legacy_seconds': round(legacy_seconds, 4),
+                          'compiled_scan_seconds': round(scan_seconds, 4),
+                          'index_plan_seconds': round(plan_seconds, 4)}))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+'''
+Full-text search: index build, persistence and query latency.
+
+    python -m benchmark.search --rows 1000000 --repeat 20
+'''
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmark.workbook import make_rows
+from search_index import SearchIndex
+from ticket_db import TicketFormat
+
+QUERIES = ('crash', 'crash login', 'timeo', 'slow export user sheet',
+           'ticket_500000', 'ticket 4242*', 'zzz')
+
+def timed(func) -> tuple:
+    '''Run func, return its result and seconds.'''
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+def percentile(seconds: list, part: float) -> float:
+    '''The part percentile of the timings, in milliseconds.'''
+    seconds = sorted(seconds)
+    return round(seconds[min(len(seconds) - 1, int(len(seconds) * part))] * 1000, 3)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    keyed = [(i, TicketFormat.from_row(row, i)) for i, row in enumerate(make_rows(args.rows))]
+    search_index = SearchIndex()
+    _, build_seconds = timed(lambda: search_index.sync(keyed))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        index_file = os.path.join(temp_dir, 'ticket.xlsx.search')
+        _, save_seconds = timed(lambda: search_index.save(index_file))
+        size = os.path.getsize(index_file)
+        search_index, load_seconds = timed(lambda: SearchIndex.load(index_file))
+    reindexed, sync_seconds = timed(lambda: search_index.sync(keyed))
+    print(json.dumps({'bench': 'search_index', 'rows': args.rows,
+                      'build_seconds': round(build_seconds, 3),
+                      'save_seconds': round(save_seconds, 3),
+                      'load_seconds': round(load_seconds, 3),
+                      'sync_seconds': round(sync_seconds, 3),
+                      'reindexed': reindexed,
+                      'bytes': size}))
+
+    for query in QUERIES:
+        seconds = []
+        for _ in range(args.repeat):
+            result, elapsed = timed(lambda: search_index.search(query, args.limit))
+            seconds.append(elapsed)
+        print(json.dumps({'bench': 'search', 'rows': args.rows, 'query': query,
+                          'matched': len(result),
+                          'p50_ms': percentile(seconds, 0.5),
+                          'p95_ms': percentile(seconds, 0.95)}))
+
+if __name__ == '__main__':
+    main()
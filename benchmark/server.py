@@ -0,0 +1,87 @@
+'''
+Latency and throughput of the ticket server with many local clients.
+
+    python -m benchmark.server --rows 100000 --clients 20 --requests 200
+'''
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+from benchmark.workbook import make_rows
+from sqlite_storage import SqliteStorage
+from ticket_db import TicketFormat
+from ticket_server import TicketClient, TicketServer
+
+def write_database(db_file: str, row_num: int) -> None:
+    '''Write a database with row_num synthetic tickets.'''
+    storage = SqliteStorage(db_file)
+    storage.insert(TicketFormat.from_row(row) for row in make_rows(row_num))
+    storage.close()
+
+def percentile(values: list, ratio: float) -> float:
+    '''Value at the ratio of the sorted values.'''
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * ratio))]
+
+async def run(db_file: str, row_num: int, client_num: int, request_num: int,
+              read_ratio: float) -> dict:
+    '''Run the clients against one server, return the statistics.'''
+    server = TicketServer(SqliteStorage(db_file), flush_interval=0.5)
+    start = time.perf_counter()
+    await server.start()
+    load_seconds = time.perf_counter() - start
+
+    async def client_run(client_id: int) -> list:
+        rand = random.Random(client_id)
+        client = TicketClient(server.host, server.port)
+        await client.connect()
+        latency = []
+        for _ in range(request_num):
+            i = rand.randrange(row_num)
+            if rand.random() < read_ratio:
+                operation = {'user': 'assignee_%d' % (i % 50), 'identity': 'RD', 'op': 'R'}
+            else:
+                operation = {'user': 'pm', 'identity': 'PM', 'op': 'U',
+                             'title': 'ticket_%d' % i, 'description': 'changed %d' % i}
+            sent = time.perf_counter()
+            await client.request(operation)
+            latency.append(time.perf_counter() - sent)
+        await client.close()
+        return latency
+
+    start = time.perf_counter()
+    latency = sum(await asyncio.gather(*(client_run(i) for i in range(client_num))), [])
+    elapsed = time.perf_counter() - start
+    await server.stop()
+    return {'rows': row_num,
+            'clients': client_num,
+            'requests': len(latency),
+            'read_ratio': read_ratio,
+            'load_seconds': round(load_seconds, 3),
+            'throughput_per_second': round(len(latency) / elapsed, 1),
+            'latency_p50_ms': round(percentile(latency, 0.5) * 1000, 3),
+            'latency_p95_ms': round(percentile(latency, 0.95) * 1000, 3),
+            'latency_max_ms': round(max(latency) * 1000, 3)}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--clients', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=200, help='per client')
+    parser.add_argument('--read-ratio', type=float, default=0.5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_file = os.path.join(work_dir, 'ticket.db')
+        write_database(db_file, args.rows)
+        result = asyncio.run(run(db_file, args.rows, args.clients, args.requests,
+                                 args.read_ratio))
+    print(json.dumps(result))
+
+if __name__ == '__main__':
+    main()
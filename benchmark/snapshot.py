@@ -0,0 +1,53 @@
+'''
+Cold start, decoding the workbook, against warm start from its snapshot.
+
+    python -m benchmark.snapshot --rows 100000
+'''
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmark.workbook import write_workbook
+from snapshot import TicketSnapshot
+from xlsx_storage import XlsxStorage
+
+def timed_load(ticket_file: str) -> tuple:
+    '''Load the tickets, return how many and the seconds.'''
+    start = time.perf_counter()
+    all_ticket = XlsxStorage(ticket_file).load()
+    return len(all_ticket), time.perf_counter() - start
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        ticket_file = write_workbook(os.path.join(work_dir, 'ticket.xlsx'), args.rows)
+        snapshot = TicketSnapshot(ticket_file)
+        cold, warm = [], []
+        for _ in range(args.repeat):
+            snapshot.clear()
+            count, seconds = timed_load(ticket_file)
+            cold.append(seconds)
+            assert count == args.rows
+            count, seconds = timed_load(ticket_file)
+            warm.append(seconds)
+            assert count == args.rows
+        snapshot_size = os.path.getsize(snapshot.snapshot_file)
+        workbook_size = os.path.getsize(ticket_file)
+
+    print(json.dumps({'bench': 'snapshot',
+                      'rows': args.rows,
+                      'workbook_bytes': workbook_size,
+                      'snapshot_bytes': snapshot_size,
+                      'cold_seconds': round(min(cold), 4),
+                      'warm_seconds': round(min(warm), 4),
+                      'speedup': round(min(cold) / min(warm), 1)}))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+'''
+Time to the first prompt of python ticket_system_main.py, against a budget.
+
+    python -m benchmark.startup --repeat 10 --budget-ms 100
+
+The bare interpreter showing the same prompt is measured too, so the
+cost of the ticket system's own imports is reported apart. Exit status
+is 1 when the median time to the first prompt is above the budget.
+'''
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BUDGET_MS = 100
+PROMPT = b'Enter your name: '
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def time_to_prompt(command: list) -> float:
+    '''Seconds from the start of the command until it shows the prompt.'''
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=ROOT,
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    output = b''
+    while not output.endswith(PROMPT):
+        chunk = os.read(process.stdout.fileno(), 1024)
+        if not chunk:
+            raise RuntimeError('exited before the prompt: %r' % output)
+        output += chunk
+    seconds = time.perf_counter() - start
+    process.kill()
+    process.wait()
+    process.stdin.close()
+    process.stdout.close()
+    return seconds
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--budget-ms', type=float, default=BUDGET_MS)
+    args = parser.parse_args()
+
+    bare = [time_to_prompt([sys.executable, '-c', 'input(%r)' % PROMPT.decode()])
+            for _ in range(args.repeat)]
+    system = [time_to_prompt([sys.executable, 'ticket_system_main.py'])
+              for _ in range(args.repeat)]
+    median_ms = statistics.median(system) * 1000
+    print(json.dumps({'bench': 'startup',
+                      'repeat': args.repeat,
+                      'interpreter_ms': round(statistics.median(bare) * 1000, 1),
+                      'first_prompt_ms': round(median_ms, 1),
+                      'import_ms': round(median_ms - statistics.median(bare) * 1000, 1),
+                      'budget_ms': args.budget_ms,
+                      'within_budget': median_ms <= args.budget_ms}))
+    return 0 if median_ms <= args.budget_ms else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
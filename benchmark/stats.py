@@ -0,0 +1,58 @@
+'''
+Group counts: a full scan per summary against the counts kept up to date.
+
+    python -m benchmark.stats --rows 1000000
+'''
+
+import argparse
+from collections import Counter
+import json
+import time
+
+from benchmark.workbook import make_rows
+from ticket_db import TicketFormat
+from ticket_stats import TicketStats
+
+GROUP_BY = (('assign_to',), ('status', 'ticket_type'), ('assign_to', 'submitter', 'status'))
+
+def timed(func) -> tuple:
+    '''Run func, return its result and seconds.'''
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    args = parser.parse_args()
+
+    all_ticket = [TicketFormat.from_row(row) for row in make_rows(args.rows)]
+    stats, build_seconds = timed(lambda: TicketStats(all_ticket))
+    print(json.dumps({'bench': 'stats_build', 'rows': args.rows,
+                      'seconds': round(build_seconds, 4)}))
+
+    edited = TicketFormat.from_row(all_ticket[0].to_row())
+    edited.status = 'Done'
+    def update() -> None:
+        for _ in range(10000):
+            stats.remove(all_ticket[0])
+            stats.add(edited)
+            stats.remove(edited)
+            stats.add(all_ticket[0])
+    _, update_seconds = timed(update)
+    print(json.dumps({'bench': 'stats_update', 'rows': args.rows,
+                      'microseconds_per_update': round(update_seconds / 20000 * 1e6, 3)}))
+
+    for fields in GROUP_BY:
+        scanned, scan_seconds = timed(lambda: Counter(
+            tuple(getattr(ticket, field) for field in fields) for ticket in all_ticket))
+        report, report_seconds = timed(lambda: stats.group_by(fields))
+        assert dict(report.groups) == scanned
+        print(json.dumps({'bench': 'stats_group_by', 'rows': args.rows,
+                          'group_by': ','.join(fields),
+                          'groups': len(report.groups),
+                          'scan_seconds': round(scan_seconds, 4),
+                          'counts_seconds': round(report_seconds, 4)}))
+
+if __name__ == '__main__':
+    main()
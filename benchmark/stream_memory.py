@@ -0,0 +1,88 @@
+'''
+Peak memory of streaming the tickets against loading them all.
+
+    python -m benchmark.stream_memory --rows 1000000 --ceiling-mb 200
+
+Each mode runs in its own process so their peaks do not mix. Exit status
+is 1 when the streamed peak is above the ceiling.
+'''
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmark.workbook import write_workbook
+
+try:
+    import resource
+except ImportError: # no resource on Windows, fall back to traced Python memory
+    resource = None
+    import tracemalloc
+
+def peak_kb() -> int:
+    '''Peak memory of this process in KB.'''
+    if resource is None:
+        return tracemalloc.get_traced_memory()[1] // 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def run_child(mode: str, ticket_file: str) -> dict:
+    '''Walk the tickets once, either streamed or loaded as a list.'''
+    if resource is None:
+        tracemalloc.start()
+    from ticket_db import NormalGetSheetColumn, ParseTicketDB, StreamParseTicketDB
+
+    start_kb = peak_kb()
+    start = time.perf_counter()
+    if mode == 'stream':
+        row_num = sum(1 for _ in StreamParseTicketDB(ticket_file).iter_content())
+    else:
+        all_ticket = ParseTicketDB(ticket_file, NormalGetSheetColumn()).get_content()
+        row_num = len(all_ticket)
+    return {'mode': mode,
+            'rows': row_num,
+            'seconds': round(time.perf_counter() - start, 3),
+            'peak_kb': peak_kb() - start_kb}
+
+def run(row_num: int, ticket_file: str, modes: list) -> list:
+    '''Run each mode in a child process.'''
+    if not os.path.exists(ticket_file):
+        write_workbook(ticket_file, row_num)
+    result = []
+    for mode in modes:
+        output = subprocess.run([sys.executable, '-m', 'benchmark.stream_memory',
+                                 '--child', mode, ticket_file],
+                                check=True, capture_output=True, text=True).stdout
+        result.append(json.loads(output))
+    return result
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--file', help='workbook to use, generated if missing')
+    parser.add_argument('--ceiling-mb', type=float, help='fail above this streamed peak')
+    parser.add_argument('--skip-load', action='store_true', help='only run the streamed mode')
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(*args.child)))
+        return 0
+
+    modes = ['stream'] if args.skip_load else ['stream', 'load']
+    with tempfile.TemporaryDirectory() as work_dir:
+        ticket_file = args.file or os.path.join(work_dir, 'ticket_%d.xlsx' % args.rows)
+        result = run(args.rows, ticket_file, modes)
+    for line in result:
+        print(json.dumps(line))
+
+    if args.ceiling_mb is not None and result[0]['peak_kb'] > args.ceiling_mb * 1024:
+        print('Streamed peak is above %s MB.' % args.ceiling_mb)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,176 @@
+'''
+Repeatable benchmarks of the ticket operations, results as JSON.
+
+    python -m benchmark.suite --rows 1000 10000 100000 --output result.json
+    python -m benchmark.suite --rows 1000 10000 --compare result.json
+
+Each benchmark runs --repeat times on the same generated workbook and
+reports the minimum and the median seconds. With --compare the medians
+are put against an earlier result, exit status is 1 when one of them is
+slower than --tolerance allows.
+
+Index:
+    BENCHMARKS
+    run_suite
+    compare
+'''
+
+import argparse
+from contextlib import redirect_stdout
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, List
+
+from benchmark.workbook import write_workbook
+from crud import CrudHandler, TicketReader
+from ticket_db import NormalGetSheetColumn, ParseTicketDB, TicketFormat, WriteDB
+from ticket_output import write_tickets
+from ticket_store import TicketStore
+from user import UserPM, UserQA, UserRD
+
+def parse(context: dict) -> Callable:
+    return lambda: ParseTicketDB(context['ticket_file'], NormalGetSheetColumn()).get_content()
+
+def read_as(user_factory: Callable) -> Callable:
+    '''Benchmark TicketReader.read with the read condition of a user.'''
+    def setup(context: dict) -> Callable:
+        condition = user_factory().read_condition
+        return lambda: TicketReader(condition, TicketStore(context['all_ticket'])).read
+    return setup
+
+def crud_lookup(action: str, request: Callable) -> Callable:
+    '''Benchmark a PM updating or deleting one ticket by title, on a fresh copy each repeat.'''
+    def setup(context: dict) -> Callable:
+        rows = [ticket.to_row() for ticket in context['all_ticket']]
+        title = 'ticket_%d' % (len(rows) * 2 // 3)
+        def prepare() -> Callable:
+            ticket_store = TicketStore([TicketFormat.from_row(row) for row in rows])
+            handler = CrudHandler(UserPM('pm'), ticket_store)
+            return lambda: handler.choose_crud(action, request(title))
+        return prepare
+    return setup
+
+def fill_in(context: dict) -> Callable:
+    output_file = os.path.join(context['work_dir'], 'written.xlsx')
+    return lambda: lambda: WriteDB(context['all_ticket']).fill_in(output_file)
+
+def export(output_format: str) -> Callable:
+    '''Benchmark writing all the tickets to a file in one of the output formats.'''
+    def setup(context: dict) -> Callable:
+        output_file = os.path.join(context['work_dir'], 'export.' + output_format)
+        def run() -> None:
+            with open(output_file, 'w', encoding='utf-8', newline='') as output:
+                write_tickets(context['all_ticket'], output, output_format)
+        return lambda: run
+    return setup
+
+def parse_get_content(context: dict) -> Callable:
+    return lambda: parse(context)
+
+# name: setup(context) -> prepare(), prepare() -> the operation, only the
+# operation is timed.
+BENCHMARKS = {
+    'parse_get_content': parse_get_content,
+    'read_pm': read_as(lambda: UserPM('pm')),
+    'read_qa': read_as(lambda: UserQA('submitter_3')),
+    'read_rd': read_as(lambda: UserRD('assignee_8')),
+    'update_lookup': crud_lookup('U', lambda title: {'title': title, 'description': 'x'}),
+    'delete_lookup': crud_lookup('D', lambda title: {'title': title}),
+    'write_fill_in': fill_in,
+    'export_jsonl': export('jsonl'),
+    'export_csv': export('csv'),
+}
+
+def measure(prepare: Callable, repeat: int) -> List[float]:
+    '''Seconds of each repeat, the printed output is dropped.'''
+    seconds = []
+    for _ in range(repeat):
+        operation = prepare()
+        with redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            operation()
+            seconds.append(time.perf_counter() - start)
+    return seconds
+
+def run_suite(row_nums: List[int], repeat: int, names: List[str] = None, **workbook_args) -> dict:
+    '''Run the benchmarks for each row count.'''
+    results = []
+    for row_num in row_nums:
+        with tempfile.TemporaryDirectory() as work_dir:
+            ticket_file = write_workbook(os.path.join(work_dir, 'ticket.xlsx'), row_num,
+                                         **workbook_args)
+            context = {'work_dir': work_dir, 'ticket_file': ticket_file}
+            context['all_ticket'] = parse(context)()
+            for name in names or BENCHMARKS:
+                seconds = measure(BENCHMARKS[name](context), repeat)
+                results.append({'bench': name,
+                                'rows': row_num,
+                                'repeat': repeat,
+                                'min_seconds': round(min(seconds), 6),
+                                'median_seconds': round(statistics.median(seconds), 6)})
+                print(json.dumps(results[-1]), file=sys.stderr)
+    return {'created': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'workbook': workbook_args,
+            'results': results}
+
+def compare(current: dict, previous: dict, tolerance: float) -> List[dict]:
+    '''Ratio of the current medians to the previous ones, for the benchmarks in both.'''
+    previous_median = {(result['bench'], result['rows']): result['median_seconds']
+                       for result in previous['results']}
+    compared = []
+    for result in current['results']:
+        key = (result['bench'], result['rows'])
+        if key not in previous_median or previous_median[key] == 0:
+            continue
+        ratio = result['median_seconds'] / previous_median[key]
+        compared.append({'bench': result['bench'],
+                         'rows': result['rows'],
+                         'ratio': round(ratio, 3),
+                         'regression': ratio > 1 + tolerance})
+    return compared
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--bench', nargs='+', choices=list(BENCHMARKS), help='default all')
+    parser.add_argument('--assignees', type=int, default=50)
+    parser.add_argument('--submitters', type=int, default=20)
+    parser.add_argument('--description-length', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the result here instead of stdout')
+    parser.add_argument('--compare', help='an earlier result to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed slowdown of a median, 0.2 is 20%%')
+    args = parser.parse_args()
+
+    current = run_suite(args.rows, args.repeat, args.bench,
+                        assignees=args.assignees,
+                        submitters=args.submitters,
+                        description_length=args.description_length,
+                        seed=args.seed)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(current, output, indent=1)
+    else:
+        print(json.dumps(current, indent=1))
+
+    if not args.compare:
+        return 0
+    with open(args.compare, encoding='utf-8') as previous:
+        compared = compare(current, json.load(previous), args.tolerance)
+    for line in compared:
+        print(json.dumps(line), file=sys.stderr)
+    return 1 if any(line['regression'] for line in compared) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,56 @@
+'''
+Memory of the ticket list, slotted TicketFormat against the former plain class.
+
+    python -m benchmark.ticket_memory --rows 200000
+'''
+
+import argparse
+import json
+import tracemalloc
+
+from ticket_db import TicketFormat
+
+class LegacyTicketFormat():
+    '''The plain TicketFormat, one __dict__ and free strings per ticket.'''
+    def __init__(self, title, description, assign_to, status, submitter, ticket_type) -> None:
+        self.title = title
+        self.description = description
+        self.assign_to = assign_to
+        self.status = status
+        self.submitter = submitter
+        self.ticket_type = ticket_type
+
+def make_row(i: int) -> tuple:
+    '''A row whose strings are fresh objects, as a parser returns them.'''
+    return ('ticket_%d' % i,
+            'This is ticket_%d.' % i,
+            ''.join(['assignee_', str(i % 50)]),
+            ''.join(['Wait', 'ing']) if i % 4 == 0 else ''.join(['Do', 'ne']),
+            ''.join(['submitter_', str(i % 20)]),
+            ''.join(['B', 'ug']) if i % 3 else ''.join(['New', 'Feature']))
+
+def measure(ticket_class: type, row_num: int) -> int:
+    '''Bytes held by row_num tickets of the class.'''
+    tracemalloc.start()
+    all_ticket = [ticket_class(*make_row(i)) for i in range(row_num)]
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del all_ticket
+    return current
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    args = parser.parse_args()
+
+    result = {}
+    for name, ticket_class in (('legacy', LegacyTicketFormat), ('slotted', TicketFormat)):
+        result[name] = measure(ticket_class, args.rows)
+        print(json.dumps({'class': name,
+                          'rows': args.rows,
+                          'bytes': result[name],
+                          'bytes_per_ticket': round(result[name] / args.rows, 1)}))
+    print(json.dumps({'saving': round(1 - result['slotted'] / result['legacy'], 3)}))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+'''
+Synthetic ticket workbooks.
+
+    python -m benchmark.workbook ticket.xlsx --rows 100000 --assignees 50
+
+Names are ticket_<i>, assignee_<i % assignees> and
+submitter_<i % submitters>, so the benchmarks know which users own which
+tickets. The rest is drawn from a seeded random generator, the same
+arguments always give the same workbook.
+
+Index:
+    make_rows
+    write_workbook
+'''
+
+import argparse
+import random
+from typing import Iterator
+
+from openpyxl import Workbook
+
+HEADER = ['title', 'description', 'assign_to', 'status', 'submitter', 'type']
+WORDS = ('crash', 'login', 'page', 'report', 'slow', 'button', 'export', 'save',
+         'error', 'after', 'when', 'the', 'user', 'opens', 'ticket', 'list',
+         'timeout', 'layout', 'missing', 'value', 'mail', 'filter', 'update', 'sheet')
+
+def make_rows(row_num: int,
+              assignees: int = 50,
+              submitters: int = 20,
+              description_length: int = 40,
+              seed: int = 0) -> Iterator[tuple]:
+    '''Yield row_num rows in TicketFormat.FIELD order.'''
+    rand = random.Random(seed)
+    for i in range(row_num):
+        description = []
+        length = 0
+        while length < description_length:
+            word = rand.choice(WORDS)
+            description.append(word)
+            length += len(word) + 1
+        yield ('ticket_%d' % i,
+               ' '.join(description)[:description_length],
+               'assignee_%d' % (i % assignees),
+               'Waiting' if rand.random() < 0.25 else 'Done',
+               'submitter_%d' % (i % submitters),
+               'NewFeature' if rand.random() < 0.3 else 'Bug')
+
+def write_workbook(ticket_file: str,
+                   row_num: int,
+                   assignees: int = 50,
+                   submitters: int = 20,
+                   description_length: int = 40,
+                   seed: int = 0) -> str:
+    '''Write a workbook with row_num synthetic tickets.'''
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet('Sheet')
+    worksheet.append(HEADER)
+    for row in make_rows(row_num, assignees, submitters, description_length, seed):
+        worksheet.append(row)
+    workbook.save(ticket_file)
+    return ticket_file
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('ticket_file')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--assignees', type=int, default=50)
+    parser.add_argument('--submitters', type=int, default=20)
+    parser.add_argument('--description-length', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    write_workbook(args.ticket_file, args.rows, args.assignees, args.submitters,
+                   args.description_length, args.seed)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+'''
+Append-only feed of the ticket changes, for tools following the tickets.
+
+    python change_feed.py ticket.xlsx --consumer tracker > new_events.jsonl
+
+Every create, update and delete done through CrudHandler is an event, a
+JSON line with the operation, the ticket id, the fields before and after,
+the user, the identity and the time. A PendingFeed holds the events of a
+session until the storage has saved its changes, so the feed only tells
+what is saved, and a created ticket comes with the id the storage gave
+it. The feed is a directory of segment
+files next to the workbook. A segment is named by the offset of its first
+byte in the whole feed, and a new one is started when the last is full,
+so an offset is found by a seek in one segment.
+
+A FeedConsumer keeps the offset it has read up to in a checkpoint file
+and reads only the events after it.
+
+Index:
+    ChangeFeed
+    PendingFeed
+    FeedConsumer
+'''
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import threading
+from typing import Iterator, List, Tuple
+
+from file_lock import FileLock
+from instrument import count
+from ticket_db import TicketFormat
+from ticket_journal import TicketChange
+
+SEGMENT_BYTES = 16 * 1024 * 1024
+
+def _now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+class ChangeFeed():
+    '''Segments of a feed, appended to by the sessions under a file lock.'''
+    SUFFIX = '.feed'
+    SEGMENT_SUFFIX = '.log'
+
+    def __init__(self, feed_dir: str, segment_bytes: int = SEGMENT_BYTES) -> None:
+        self.feed_dir = feed_dir
+        self.__segment_bytes = segment_bytes
+
+    def __path(self, start: int) -> str:
+        return os.path.join(self.feed_dir, '%020d%s' % (start, self.SEGMENT_SUFFIX))
+
+    def segments(self) -> List[int]:
+        '''Offsets of the first byte of each segment, oldest first.'''
+        try:
+            names = os.listdir(self.feed_dir)
+        except FileNotFoundError:
+            return []
+        return sorted(int(name[:-len(self.SEGMENT_SUFFIX)]) for name in names
+                      if name.endswith(self.SEGMENT_SUFFIX))
+
+    def end(self) -> int:
+        '''Offset after the last event.'''
+        segments = self.segments()
+        if not segments:
+            return 0
+        return segments[-1] + os.path.getsize(self.__path(segments[-1]))
+
+    @staticmethod
+    def to_event(change: TicketChange, user_name: str, identity: str, time: str) -> dict:
+        '''Get the event of a change.'''
+        return {'time': time,
+                'user': user_name,
+                'identity': identity,
+                'op': change.op,
+                'id': change.ticket_id,
+                'before': None if change.before is None
+                          else dict(zip(TicketFormat.FIELD, change.before)),
+                'after': None if change.after is None
+                         else dict(zip(TicketFormat.FIELD, change.after))}
+
+    def publish(self, changes: List[TicketChange], user_name: str, identity: str) -> int:
+        '''Append the events of the changes made by the user, return the end offset.'''
+        time = _now()
+        return self.publish_events([self.to_event(change, user_name, identity, time)
+                                    for change in changes])
+
+    def publish_events(self, events: List[dict]) -> int:
+        '''Append the events, return the end offset.'''
+        if not events:
+            return self.end()
+        content = ''.join(json.dumps(event, ensure_ascii=False) + '\n'
+                          for event in events).encode('utf-8')
+        os.makedirs(self.feed_dir, exist_ok=True)
+        with FileLock(self.feed_dir):
+            segments = self.segments()
+            start = segments[-1] if segments else 0
+            size = os.path.getsize(self.__path(start)) if segments else 0
+            if size >= self.__segment_bytes:
+                start, size = start + size, 0
+            with open(self.__path(start), 'ab') as segment:
+                segment.write(content)
+                segment.flush()
+                os.fsync(segment.fileno())
+        count('feed_events', len(events))
+        count('bytes_written', len(content))
+        return start + size + len(content)
+
+    def read(self, offset: int = 0) -> Iterator[Tuple[int, dict]]:
+        '''Yield (offset after the event, event) of the events from the offset on.
+
+        An offset in a dropped segment starts at the oldest event kept. A
+        line still being written is left for the next read.
+        '''
+        segments = self.segments()
+        for i, start in enumerate(segments):
+            end = segments[i + 1] if i + 1 < len(segments) else None
+            if end is not None and end <= offset:
+                continue
+            position = max(offset - start, 0)
+            with open(self.__path(start), 'rb') as segment:
+                segment.seek(position)
+                for line in segment:
+                    if not line.endswith(b'\n'):
+                        return
+                    position += len(line)
+                    yield start + position, json.loads(line)
+
+    def trim(self, offset: int) -> int:
+        '''Drop the segments whose events are all before the offset, return how many.'''
+        with FileLock(self.feed_dir):
+            segments = self.segments()
+            dropped = 0
+            for start, end in zip(segments, segments[1:]):
+                if end > offset:
+                    break
+                os.remove(self.__path(start))
+                dropped += 1
+        return dropped
+
+class PendingFeed():
+    '''Events of the changes made in memory, published once they are saved.'''
+    def __init__(self, change_feed: ChangeFeed) -> None:
+        self.change_feed = change_feed
+        self.__pending = [] # (TicketChange, user name, identity, time)
+        self.__lock = threading.Lock() # the handlers of many threads add
+
+    def add(self, changes: List[TicketChange], user_name: str, identity: str) -> None:
+        '''Hold the changes the user committed, in the order applied.'''
+        time = _now()
+        with self.__lock:
+            self.__pending.extend((change, user_name, identity, time) for change in changes)
+
+    def publish(self, saved: List[TicketChange], conflicts: List[TicketChange]) -> int:
+        '''Publish the events of the tickets saved, drop the others, return how many.
+
+        saved are the changes of the session given to the storage and
+        conflicts those it returned unsaved. The events of a ticket in
+        conflict, or whose changes came to nothing, are dropped.
+        '''
+        with self.__lock:
+            pending, self.__pending = self.__pending, []
+        unsaved = {id(change.ticket) for change in conflicts}
+        new_id = {id(change.ticket): change.ticket_id for change in saved
+                  if id(change.ticket) not in unsaved}
+        events = []
+        for change, user_name, identity, time in pending:
+            if id(change.ticket) not in new_id:
+                continue
+            event = ChangeFeed.to_event(change, user_name, identity, time)
+            if event['id'] is None: # created in the session
+                event['id'] = new_id[id(change.ticket)]
+            events.append(event)
+        self.change_feed.publish_events(events)
+        return len(events)
+
+class FeedConsumer():
+    '''Reader of a feed that resumes where its last commit left off.'''
+    CHECKPOINT_SUFFIX = '.checkpoint'
+
+    def __init__(self, change_feed: ChangeFeed, name: str) -> None:
+        self.__change_feed = change_feed
+        self.__checkpoint = os.path.join(change_feed.feed_dir, name + self.CHECKPOINT_SUFFIX)
+        self.offset = self.__load()
+
+    def __load(self) -> int:
+        try:
+            with open(self.__checkpoint, encoding='utf-8') as checkpoint:
+                return int(checkpoint.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def poll(self, max_events: int = None) -> List[dict]:
+        '''Get the events after the offset, at most max_events, and move the offset.'''
+        events = []
+        if max_events == 0:
+            return events
+        for offset, event in self.__change_feed.read(self.offset):
+            self.offset = offset
+            events.append(event)
+            if max_events is not None and len(events) >= max_events:
+                break
+        return events
+
+    def commit(self) -> None:
+        '''Keep the offset, a consumer made again starts from it.'''
+        os.makedirs(os.path.dirname(self.__checkpoint), exist_ok=True)
+        temp_file = self.__checkpoint + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as checkpoint:
+            checkpoint.write('%d\n' % self.offset)
+        os.replace(temp_file, self.__checkpoint)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Write the new events of a consumer as JSON Lines.')
+    parser.add_argument('ticket_file', help='workbook or database')
+    parser.add_argument('--consumer', required=True, help='name of the checkpoint')
+    parser.add_argument('--max-events', type=int)
+    args = parser.parse_args()
+
+    consumer = FeedConsumer(ChangeFeed(args.ticket_file + ChangeFeed.SUFFIX), args.consumer)
+    for event in consumer.poll(args.max_events):
+        sys.stdout.write(json.dumps(event, ensure_ascii=False) + '\n')
+    sys.stdout.flush()
+    consumer.commit()
+
+if __name__ == '__main__':
+    main()
@@ -3,83 +3,239 @@ Index:
     CrudHandler
     TicketCreater
     TicketReader
+    TicketSearcher
     TicketUpdater
     TicketDeleter
+    TicketBulkEditor
     TicketAccessChecker
     TicketExistChecker
+    RequestReader
     EmilSender
 '''
 
-from copy import deepcopy
-from typing import List
-
-# import win32com.client as win32
+from itertools import islice
+import json
+import sys
+from typing import Callable, Iterable, List, Optional
 
+from change_feed import PendingFeed
 from error_handler import AuthorizationException, InputException
+from instrument import count, timed
 from namespace import TicketStatus, TicketType
 from namespace import Authorization, AuthorizeationError, InputError
-from ticket_db import TicketFormat
+from notification import MAIL_DOMAIN, NotificationOutbox, default_outbox
+from query import from_condition, parse_filter
+from ticket_db import STATUS_VALUE, TYPE_VALUE, TicketFormat
+from ticket_journal import TicketChange
+from ticket_output import write_tickets
+from ticket_stats import GROUP_FIELD, GroupReport
+from ticket_store import TicketStore
 from user import UserInterface
 
+PAGE_SIZE = 20 # tickets per page on a terminal
+
 class CrudHandler():
-    '''Handle create, read, update, and delete.'''
-    def __init__(self, user: UserInterface, all_ticket: List[TicketFormat]) -> None:
-        self.__user = user
-        self.__all_ticket = all_ticket
+    '''Handle create, read, update, and delete.
+
+    With a pending feed, the changes of each operation that succeeds are
+    added to it, to be published once the storage has saved them.
+
+    Handlers of many threads may share one store. A read runs beside the
+    other reads, an operation changing tickets runs alone from its lookup
+    to its commit, so no change is lost to another made meanwhile.
+    '''
+    READ_ACTION = (Authorization.Read.value,
+                   Authorization.Search.value,
+                   Authorization.Report.value)
 
-    def choose_crud(self, action: str) -> None:
-        '''Choose and execute the funciton.'''
+    def __init__(self,
+                user: UserInterface,
+                all_ticket: Iterable[TicketFormat] or TicketStore,
+                search_file: str = None,
+                change_feed: PendingFeed = None) -> None:
+        self.__user = user
+        self.__change_feed = change_feed
+        if isinstance(all_ticket, TicketStore):
+            self.__ticket_store = all_ticket # shared with other users of a batch
+        else:
+            self.__ticket_store = TicketStore(all_ticket, search_file)
+
+    @timed('CrudHandler.choose_crud')
+    def choose_crud(self, action: str, request: dict = None):
+        '''Choose and execute the funciton.
+
+        Without a request the user is prompted. A request dict answers the
+        prompts instead, and the result of the operation is returned.
+        '''
+        if action in self.READ_ACTION:
+            with self.__ticket_store.reading():
+                return self.__choose(action, request)
+        with self.__ticket_store.writing():
+            if self.__change_feed is None:
+                return self.__choose(action, request)
+            with self.__ticket_store.recording() as committed:
+                result = self.__choose(action, request)
+            # added in the lock, so the feed is in the order applied
+            self.__change_feed.add(committed, self.__user.name,
+                                   self.__user.user_identity.value)
+            return result
+
+    def __choose(self, action: str, request: dict = None):
         if action == Authorization.Create.value:
             if self.__user.is_creatable:
-                self.__create_ticket()
+                return self.__create_ticket(request)
             else:
                 raise AuthorizationException(AuthorizeationError.NoAuthorization)
 
         elif action == Authorization.Read.value:
             if self.__user.is_readable:
-                self.__read_ticket()
+                return self.__read_ticket(request)
+            else:
+                raise AuthorizationException(AuthorizeationError.NoAuthorization)
+
+        elif action == Authorization.Search.value:
+            if self.__user.is_readable:
+                return self.__search_ticket(request)
+            else:
+                raise AuthorizationException(AuthorizeationError.NoAuthorization)
+
+        elif action == Authorization.Report.value:
+            if self.__user.is_readable:
+                return self.__report_ticket(request)
             else:
                 raise AuthorizationException(AuthorizeationError.NoAuthorization)
 
         elif action == Authorization.Update.value:
             if self.__user.is_updatable:
-                self.__update_ticket()
+                return self.__update_ticket(request)
             else:
                 raise AuthorizationException(AuthorizeationError.NoAuthorization)
 
         elif action == Authorization.Delete.value:
             if self.__user.is_deletable:
-                self.__delete_ticket()
+                return self.__delete_ticket(request)
+            else:
+                raise AuthorizationException(AuthorizeationError.NoAuthorization)
+
+        elif action == Authorization.BulkUpdate.value:
+            if self.__user.is_updatable:
+                return self.__bulk_update(request)
+            else:
+                raise AuthorizationException(AuthorizeationError.NoAuthorization)
+
+        elif action == Authorization.BulkDelete.value:
+            if self.__user.is_deletable:
+                return self.__bulk_delete(request)
             else:
                 raise AuthorizationException(AuthorizeationError.NoAuthorization)
 
         else:
             raise InputException(InputError.NoSuchOperation)
 
-        return self.__all_ticket
+    def get_changes(self) -> List[TicketChange]:
+        '''Get the changes of the tickets made in this session.'''
+        return self.__ticket_store.get_changes()
 
-    def __create_ticket(self) -> None:
+    def __create_ticket(self, request: dict = None) -> TicketFormat:
         '''Create a ticket.'''
-        new_ticket = TicketCreater(self.__user.name, self.__user.create_condition).create()
-        self.__all_ticket.append(new_ticket)
+        new_ticket = TicketCreater(self.__user.name,
+                                   self.__user.create_condition).create(request)
+        with self.__ticket_store.transaction() as transaction:
+            transaction.create(new_ticket)
+        return new_ticket
 
-    def __read_ticket(self) -> None:
+    def __read_ticket(self, request: dict = None) -> List[TicketFormat]:
         '''Read a ticket.'''
         read_cond = self.__user.read_condition
-        TicketReader(read_cond, self.__all_ticket).read()
-
-    def __update_ticket(self) -> None:
+        ticket_reader = TicketReader(read_cond, self.__ticket_store)
+        if request is None:
+            if sys.stdout.isatty():
+                ticket_reader.read(page_size=PAGE_SIZE, more=self.__ask_more)
+            else:
+                ticket_reader.read()
+            return None
+        return ticket_reader.select(RequestReader.number(request, 'offset', 0) or 0,
+                                    RequestReader.number(request, 'page_size', 1))
+
+    def __search_ticket(self, request: dict = None) -> List[TicketFormat]:
+        '''Search the tickets the user can read.'''
+        ticket_searcher = TicketSearcher(self.__user.read_condition, self.__ticket_store)
+        if request is None:
+            tickets = ticket_searcher.search(input('Search: '))
+            if sys.stdout.isatty():
+                write_tickets(tickets, page_size=PAGE_SIZE, more=self.__ask_more)
+            else:
+                write_tickets(tickets)
+            return None
+        return ticket_searcher.search(RequestReader.require(request, 'query'),
+                                      RequestReader.number(request, 'limit', 1))
+
+    def __report_ticket(self, request: dict = None) -> GroupReport:
+        '''Count the tickets the user can read by group.'''
+        if request is None:
+            group_by = input('Group by %s: ' % ','.join(GROUP_FIELD))
+        else:
+            group_by = request.get('group_by', 'status')
+        report = self.__ticket_store.group_by(group_by, self.__user.read_condition)
+        if request is None:
+            report.write()
+        return report
+
+    @staticmethod
+    def __ask_more() -> bool:
+        '''Ask whether to show the next page.'''
+        return input('-- More (Enter), Q to stop: ').strip().upper() != 'Q'
+
+    def __update_ticket(self, request: dict = None) -> TicketFormat:
         '''Update a ticket.'''
         read_cond = self.__user.read_condition
         update_cont = self.__user.update_content
-        TicketUpdater(read_cond, update_cont, self.__all_ticket).update_ticket()
+        return TicketUpdater(read_cond, update_cont, self.__ticket_store).update_ticket(request)
         #self._read_ticket()
 
-    def __delete_ticket(self) -> None:
+    def __delete_ticket(self, request: dict = None) -> TicketFormat:
         '''Delete a ticket.'''
-        TicketDeleter(self.__all_ticket).delete_ticket()
+        return TicketDeleter(self.__ticket_store).delete_ticket(request)
         # self._read_ticket()
 
+    def __bulk_editor(self) -> 'TicketBulkEditor':
+        return TicketBulkEditor(self.__user.read_condition,
+                                self.__user.update_content,
+                                self.__ticket_store)
+
+    @staticmethod
+    def __ask_apply(tickets: List[TicketFormat], what: str) -> bool:
+        '''Ask whether to go on after the dry run.'''
+        return bool(tickets) and input('%s these %d tickets? (Y/N): '
+                                       % (what, len(tickets))).upper() == 'Y'
+
+    def __bulk_update(self, request: dict = None) -> List[TicketFormat]:
+        '''Update every readable ticket matching a filter.'''
+        bulk_editor = self.__bulk_editor()
+        if request is not None:
+            return bulk_editor.update(RequestReader.require(request, 'filter'),
+                                      RequestReader.require(request, 'set'),
+                                      RequestReader.flag(request, 'dry_run'),
+                                      RequestReader.send_mail(request))
+        user_filter = input('Filter (JSON): ')
+        fields = input('Set (JSON): ')
+        tickets = bulk_editor.update(user_filter, fields, dry_run=True)
+        if self.__ask_apply(tickets, 'Update'):
+            return bulk_editor.update(user_filter, fields)
+        return []
+
+    def __bulk_delete(self, request: dict = None) -> List[TicketFormat]:
+        '''Delete every readable ticket matching a filter.'''
+        bulk_editor = self.__bulk_editor()
+        if request is not None:
+            return bulk_editor.delete(RequestReader.require(request, 'filter'),
+                                      RequestReader.flag(request, 'dry_run'))
+        user_filter = input('Filter (JSON): ')
+        tickets = bulk_editor.delete(user_filter, dry_run=True)
+        if self.__ask_apply(tickets, 'Delete'):
+            return bulk_editor.delete(user_filter)
+        return []
+
 class TicketCreater():
     '''Create a ticket.'''
     def __init__(self, user_name: str, create_condition: TicketFormat) -> None:
@@ -106,13 +262,34 @@ class TicketCreater():
             raise InputException(InputError.NoSuchOption)
         return choice
 
-    def create(self) -> TicketFormat:
-        '''Create a ticket.'''
-        title = input('Title: ')
-        description = input('Description: ')
-        assign_to = input('Assign_to: ')
+    def __request_ticket_type(self, request: dict) -> str:
+        '''Get the ticket type of the request, checked against the create condition.'''
+        type_create_cond = self.__create_condition.ticket_type
+        ticket_type = request.get('ticket_type')
+        if type_create_cond != False:
+            if ticket_type not in (None, type_create_cond.value):
+                raise AuthorizationException(AuthorizeationError.NoAuthorization)
+            return type_create_cond.value
+        if ticket_type is None:
+            return TicketType.Bug.value
+        if ticket_type not in TYPE_VALUE:
+            raise InputException(InputError.NoSuchOption)
+        return ticket_type
+
+    @timed('TicketCreater.create')
+    def create(self, request: dict = None) -> TicketFormat:
+        '''Create a ticket, from the request if there is one.'''
+        if request is None:
+            title = input('Title: ')
+            description = input('Description: ')
+            assign_to = input('Assign_to: ')
+            ticket_type = self.__choose_ticket_type()
+        else:
+            title = RequestReader.require(request, 'title')
+            description = RequestReader.require(request, 'description')
+            assign_to = RequestReader.require(request, 'assign_to')
+            ticket_type = self.__request_ticket_type(request)
         status = TicketStatus.Waiting.value
-        ticket_type = self.__choose_ticket_type()
         create_ticket = TicketFormat(title,
                                     description,
                                     assign_to,
@@ -121,38 +298,62 @@ class TicketCreater():
                                     ticket_type)
         create_msg = '%s has been created.' % title
         print(create_msg)
-        self.__email_sender.send(assign_to, create_msg)
+        self.__email_sender.send(assign_to,
+                                 create_msg,
+                                 RequestReader.send_mail(request),
+                                 title)
         return create_ticket
 
 class TicketReader():
     '''Read tickets.'''
     def __init__(self,
                 read_condition: TicketFormat,
-                all_ticket: TicketFormat) -> None:
+                ticket_store: TicketStore) -> None:
+        self.__read_condition = read_condition
+        self.__ticket_store = ticket_store
+
+    @timed('TicketReader.select')
+    def select(self, offset: int = 0, page_size: int = None) -> List[TicketFormat]:
+        '''Get a page of the tickets, all of them if page_size is None.'''
+        tickets = self.__ticket_store.select(self.__read_condition)
+        stop = offset + page_size if page_size else None
+        return list(islice(tickets, offset, stop))
+
+    @timed('TicketReader.read')
+    def read(self,
+             output_format: str = 'text',
+             page_size: int = None,
+             offset: int = 0,
+             more: Callable[[], bool] = None) -> Optional[int]:
+        '''Write the tickets out, return the offset of the next page.'''
+        return write_tickets(self.__ticket_store.select(self.__read_condition),
+                             output_format=output_format,
+                             page_size=page_size,
+                             offset=offset,
+                             more=more)
+
+class TicketSearcher():
+    '''Search tickets by the words of their title and description.'''
+    def __init__(self,
+                read_condition: TicketFormat,
+                ticket_store: TicketStore) -> None:
         self.__read_condition = read_condition
-        self.__all_ticket = all_ticket
-
-    def read(self) -> None:
-        '''Read all ticket'''
-        for ticket in self.__all_ticket:
-            if TicketAccessChecker(self.__read_condition).check_accessible(ticket):
-                print('Title: %s' % ticket.title)
-                print('\tDescription: %s' % ticket.description)
-                print('\tAssign to: %s' % ticket.assign_to)
-                print('\tStatus: %s' % ticket.status)
-                print('\tSubmitter: %s' % ticket.submitter)
-                print('\tType: %s' % ticket.ticket_type)
-                print('')
+        self.__ticket_store = ticket_store
+
+    @timed('TicketSearcher.search')
+    def search(self, text: str, limit: int = None) -> List[TicketFormat]:
+        '''Get the readable tickets matching the text, best first.'''
+        return self.__ticket_store.search(text, self.__read_condition, limit)
 
 class TicketUpdater():
     '''Update a ticket.'''
     def __init__(self,
                 read_condition: TicketFormat,
                 update_content: TicketFormat,
-                all_ticket: List[TicketFormat])-> None:
+                ticket_store: TicketStore)-> None:
         self.__read_condition = read_condition
         self.__update_content = update_content
-        self.__all_ticket = all_ticket
+        self.__ticket_store = ticket_store
         self.__email_sender = EmilSender()
 
     def __get_dscptn(self) -> bool:
@@ -209,93 +410,183 @@ class TicketUpdater():
             choice = ori_content
         return choice
 
-    def __inform_creater(self, ticket: TicketFormat, update_msg: str) -> None:
+    def __apply_request(self, ticket: TicketFormat, request: dict) -> None:
+        '''Update the fields given in the request, as update_content allows.'''
+        self.apply_fields(ticket, request, self.__update_content)
+
+    @staticmethod
+    def apply_fields(ticket: TicketFormat, fields: dict, update_content: TicketFormat) -> None:
+        '''Set the fields given, other than the title, as update_content allows.'''
+        for field in TicketFormat.FIELD[1:]:
+            if field not in fields:
+                continue
+            value = fields[field]
+            updateable = getattr(update_content, field)
+            if updateable is False or (updateable is not True and updateable != value):
+                raise AuthorizationException(AuthorizeationError.NoAuthorization)
+            if field == 'status' and value not in STATUS_VALUE:
+                raise InputException(InputError.NoSuchOption)
+            if field == 'ticket_type' and value not in TYPE_VALUE:
+                raise InputException(InputError.NoSuchOption)
+            setattr(ticket, field, value)
+
+    def __inform_creater(self,
+                        ticket: TicketFormat,
+                        update_msg: str,
+                        request: dict = None) -> None:
         '''Information creater.'''
         if ticket.status == TicketStatus.Done.value:
-            self.__email_sender.send(ticket.submitter, update_msg)
+            self.__email_sender.send(ticket.submitter,
+                                     update_msg,
+                                     RequestReader.send_mail(request),
+                                     ticket.title)
 
-    def update_ticket(self) -> None:
+    @timed('TicketUpdater.update_ticket')
+    def update_ticket(self, request: dict = None) -> TicketFormat:
         '''Update a ticket according to the ticket name.'''
-        ticket_title = input('Enter a ticket name: ')
-        all_ticket = deepcopy(self.__all_ticket)
+        ticket_title, found = RequestReader.find_ticket(self.__ticket_store, request)
         access_checker = TicketAccessChecker(self.__read_condition)
         ticket_exist = False
 
-        for i, ticket in enumerate(all_ticket):
-            accessible = access_checker.check_accessible(ticket)
-            if ticket_title == ticket.title and accessible:
-                ticket.description = self.__update(self.__get_dscptn(),
-                                                   'description',
-                                                   ticket.description)
-                ticket.assign_to = self.__update(self.__get_assign_to(),
-                                                 'assign_to',
-                                                 ticket.assign_to)
-                ticket.status = self.__multiple_choice(self.__get_status(),
-                                                       'status',
-                                                       ticket.status,
-                                                       TicketStatus)
-                ticket.submitter = self.__update(self.__get_submtr(),
-                                                 'submitter',
-                                                 ticket.submitter)
-                ticket.ticket_type = self.__multiple_choice(self.__get_tkt_type(),
-                                                            'ticket_type',
-                                                            ticket.ticket_type, TicketType)
-                self.__all_ticket[i] = ticket
+        for ori_ticket in found:
+            if access_checker.check_accessible(ori_ticket):
+                # an InputException in the middle rolls the edit back
+                with self.__ticket_store.transaction() as transaction:
+                    ticket = transaction.edit(ori_ticket)
+                    if request is not None:
+                        self.__apply_request(ticket, request)
+                    else:
+                        self.__prompt_update(ticket)
                 update_msg = '%s has been updated.' % ticket_title
                 print(update_msg)
-                self.__inform_creater(ticket, update_msg)
+                self.__inform_creater(ori_ticket, update_msg, request)
                 ticket_exist = True
                 break
         TicketExistChecker.check_exist(ticket_exist)
+        return ori_ticket
+
+    def __prompt_update(self, ticket: TicketFormat) -> None:
+        '''Ask the user for each updatable field.'''
+        ticket.description = self.__update(self.__get_dscptn(),
+                                           'description',
+                                           ticket.description)
+        ticket.assign_to = self.__update(self.__get_assign_to(),
+                                         'assign_to',
+                                         ticket.assign_to)
+        ticket.status = self.__multiple_choice(self.__get_status(),
+                                               'status',
+                                               ticket.status,
+                                               TicketStatus)
+        ticket.submitter = self.__update(self.__get_submtr(),
+                                         'submitter',
+                                         ticket.submitter)
+        ticket.ticket_type = self.__multiple_choice(self.__get_tkt_type(),
+                                                    'ticket_type',
+                                                    ticket.ticket_type, TicketType)
 
 class TicketDeleter():
     '''Delete a ticket.'''
-    def __init__(self, all_ticket: List[TicketFormat]) -> None:
-        self.__all_ticket = all_ticket
+    def __init__(self, ticket_store: TicketStore) -> None:
+        self.__ticket_store = ticket_store
 
-    def delete_ticket(self) -> None:
+    @timed('TicketDeleter.delete_ticket')
+    def delete_ticket(self, request: dict = None) -> TicketFormat:
         '''Delete.'''
-        ticket_title = input('Enter a ticket name: ')
-        all_ticket = deepcopy(self.__all_ticket)
+        ticket_title, found = RequestReader.find_ticket(self.__ticket_store, request)
         ticket_exist = False
 
-        for i, ticket in enumerate(all_ticket):
-            if ticket.title == ticket_title:
-                print('%s has been deleted.' % ticket_title)
-                del self.__all_ticket[i]
-                ticket_exist = True
-                break
+        for ticket in found:
+            with self.__ticket_store.transaction() as transaction:
+                transaction.delete(ticket)
+            print('%s has been deleted.' % ticket_title)
+            ticket_exist = True
+            break
         TicketExistChecker.check_exist(ticket_exist)
+        return ticket
+
+class TicketBulkEditor():
+    '''Update or delete every readable ticket matching a filter, in one transaction.
+
+    The filter is the JSON-like filter of query.parse_filter. A dry run
+    only tells how many tickets would change.
+    '''
+    def __init__(self,
+                read_condition: TicketFormat,
+                update_content: TicketFormat,
+                ticket_store: TicketStore) -> None:
+        self.__read_condition = read_condition
+        self.__update_content = update_content
+        self.__ticket_store = ticket_store
+        self.__email_sender = EmilSender()
+
+    def __select(self, user_filter: dict or str) -> List[TicketFormat]:
+        '''Get the readable tickets matching the filter, an empty filter is refused.'''
+        user_filter = RequestReader.json_value(user_filter)
+        if not user_filter:
+            raise InputException(InputError.NoSuchOption)
+        query = parse_filter(user_filter) & from_condition(self.__read_condition)
+        return list(self.__ticket_store.select(query))
+
+    def __check_fields(self, fields: dict) -> None:
+        '''Refuse fields that are not updatable or values update_content does not allow.'''
+        if not fields or not set(fields) <= set(TicketFormat.FIELD[1:]):
+            raise InputException(InputError.NoSuchOption)
+        TicketUpdater.apply_fields(TicketFormat(), fields, self.__update_content)
+
+    def __inform_submitters(self, tickets: List[TicketFormat], confirm: bool = None) -> None:
+        '''One mail to each submitter of the tickets now Done.'''
+        done = {}
+        for ticket in tickets:
+            if ticket.status == TicketStatus.Done.value:
+                done.setdefault(ticket.submitter, []).append(ticket.title)
+        for submitter, titles in done.items():
+            self.__email_sender.send(submitter,
+                                     '%d tickets have been updated: %s.'
+                                     % (len(titles), ', '.join(titles)),
+                                     confirm)
+
+    @timed('TicketBulkEditor.update')
+    def update(self,
+               user_filter: dict or str,
+               fields: dict or str,
+               dry_run: bool = False,
+               confirm: bool = None) -> List[TicketFormat]:
+        '''Set the fields of the matching tickets, return the tickets.'''
+        fields = RequestReader.json_value(fields)
+        self.__check_fields(fields)
+        tickets = self.__select(user_filter)
+        if dry_run:
+            print('%d tickets would be updated.' % len(tickets))
+            return tickets
+        with self.__ticket_store.transaction() as transaction:
+            for ticket in tickets:
+                TicketUpdater.apply_fields(transaction.edit(ticket), fields,
+                                           self.__update_content)
+        print('%d tickets have been updated.' % len(tickets))
+        self.__inform_submitters(tickets, confirm)
+        return tickets
+
+    @timed('TicketBulkEditor.delete')
+    def delete(self, user_filter: dict or str, dry_run: bool = False) -> List[TicketFormat]:
+        '''Delete the matching tickets, return them.'''
+        tickets = self.__select(user_filter)
+        if dry_run:
+            print('%d tickets would be deleted.' % len(tickets))
+            return tickets
+        with self.__ticket_store.transaction() as transaction:
+            for ticket in tickets:
+                transaction.delete(ticket)
+        print('%d tickets have been deleted.' % len(tickets))
+        return tickets
 
 class TicketAccessChecker():
     '''Check ticket accessible for different identity.'''
     def __init__(self, condition: TicketFormat) -> None:
-        self.__condition = condition
-
-    def __check_condition(self, condition: bool, item: str):
-        '''Check condition.'''
-        if condition != False and condition != item:
-            raise False
-        else:
-            pass
+        self.__predicate = from_condition(condition).compile()
 
     def check_accessible(self, one_ticket: TicketFormat) -> bool:
         '''Check accessible.'''
-        try:
-            assignto_cond = self.__condition.assign_to
-            self.__check_condition(assignto_cond, one_ticket.assign_to)
-
-            status_cond = self.__condition.status
-            self.__check_condition(status_cond, one_ticket.status)
-
-            sm_cond = self.__condition.submitter
-            self.__check_condition(sm_cond, one_ticket.submitter)
-
-            ttype_cond = self.__condition.ticket_type
-            self.__check_condition(ttype_cond, one_ticket.ticket_type)
-            return True
-        except:
-            return False
+        return self.__predicate(one_ticket)
 
 class TicketExistChecker():
     '''Check if the ticket exist.'''
@@ -306,23 +597,106 @@ class TicketExistChecker():
         else:
             raise InputException(InputError.NoSuchOption)
 
+class RequestReader():
+    '''Read the answers of a non-interactive request.'''
+    @staticmethod
+    def require(request: dict, key: str) -> str:
+        '''Get a value the request must give.'''
+        value = request.get(key)
+        if value is None or value == '':
+            raise InputException(InputError.NoSuchOption)
+        return value
+
+    @staticmethod
+    def find_ticket(ticket_store: TicketStore, request: dict = None) -> tuple:
+        '''Get the title and the tickets a request names, by its id if it gives one.
+
+        Asked interactively, #12 names the ticket with id 12.
+        '''
+        if request is None:
+            ticket_title = input('Enter a ticket name: ')
+            ticket_id = ticket_title[1:] if ticket_title.startswith('#') else None
+        else:
+            ticket_id = request.get('id')
+            if ticket_id is None or ticket_id == '':
+                ticket_id = None
+                ticket_title = RequestReader.require(request, 'title')
+            else:
+                ticket_title = '#%s' % ticket_id
+        if ticket_id is None:
+            return ticket_title, ticket_store.find_title(ticket_title)
+
+        try:
+            found = ticket_store.find_id(int(ticket_id))
+        except ValueError:
+            raise InputException(InputError.NoSuchOption)
+        return (found[0].title if found else ticket_title), found
+
+    @staticmethod
+    def number(request: dict, key: str, minimum: int) -> Optional[int]:
+        '''Get a whole number of at least minimum the request may give, None if not given.'''
+        value = request.get(key)
+        if value is None or value == '':
+            return None
+        if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+            raise InputException(InputError.NoSuchOption)
+        try:
+            number = int(value)
+        except (TypeError, ValueError):
+            raise InputException(InputError.NoSuchOption)
+        if number < minimum:
+            raise InputException(InputError.NoSuchOption)
+        return number
+
+    @staticmethod
+    def flag(request: dict, key: str) -> bool:
+        '''Get a yes or no of the request, Y, true or 1 as text are yes.'''
+        value = request.get(key, False)
+        if isinstance(value, str):
+            return value.upper() in ('Y', 'TRUE', '1')
+        return bool(value)
+
+    @staticmethod
+    def json_value(value: dict or str) -> dict:
+        '''Get a dict given as it is or as JSON text.'''
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                raise InputException(InputError.NoSuchOption)
+        if not isinstance(value, dict):
+            raise InputException(InputError.NoSuchOption)
+        return value
+
+    @staticmethod
+    def send_mail(request: dict = None) -> bool:
+        '''Whether to send the mail, None asks the user.'''
+        if request is None:
+            return None
+        return bool(request.get('send_mail', False))
+
 class EmilSender():
-    '''Send E-mail.'''
-    # def __init__(self, send_to:str, send_msg:str) -> None:
-    #   self.send_to = send_to
-    #   self.send_msg = send_msg
-
-    def send(self, send_to: str, send_msg: str) -> None:
-        '''Send.'''
-        receiver = send_to + '@XXXXXXX.com'
-        confirm_sending = input(f'Send the mail to {receiver}? (Y/N):').upper()
-        if confirm_sending == 'Y':
-            # outlook = win32.Dispatch('outlook.application')
-            # mail = outlook.CreateItem(0)
-            # mail.To = receiver
-            # mail.Subject = send_msg
-            # mail.body = send_msg
-            # mail.Send()
-            print('An email has been sent to %s' % send_to)
+    '''Send E-mail through the outbox, the delivery happens in the background.'''
+    def __init__(self, outbox: NotificationOutbox = None) -> None:
+        self.__outbox = outbox if outbox is not None else default_outbox()
+
+    @timed('EmilSender.send')
+    def send(self,
+            send_to: str,
+            send_msg: str,
+            confirm: bool = None,
+            ticket_key: str = None) -> None:
+        '''Queue the mail, confirm is asked when not given.
+
+        Pending mails with the same ticket_key to the same person are
+        replaced, so they only get the latest.
+        '''
+        receiver = send_to + MAIL_DOMAIN
+        if confirm is None:
+            confirm = input(f'Send the mail to {receiver}? (Y/N):').upper() == 'Y'
+        if confirm:
+            self.__outbox.put(send_to, send_msg, ticket_key)
+            count('mails_queued')
+            print('An email will be sent to %s' % send_to)
         else:
             print('The email did not send to %s' % send_to)
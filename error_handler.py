@@ -21,9 +21,10 @@ class InputException(Exception):
         self.error_type = error
 
 class TicketDBException(Exception):
-    '''Ticket DB exception.'''
-    def __init__(self, error: TicketDBError) -> None:
+    '''Ticket DB exception, errors is the report of every bad cell when parsing.'''
+    def __init__(self, error: TicketDBError, errors: list = None) -> None:
         self.error_type = error
+        self.errors = errors or []
 
 class ErrorTraceBack():
     '''Error trace back.'''
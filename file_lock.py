@@ -0,0 +1,73 @@
+'''
+Advisory lock between the sessions sharing a ticket file.
+
+Index:
+    FileLock
+'''
+
+import os
+import time
+
+from error_handler import TicketDBException
+from namespace import TicketDBError
+
+try:
+    import fcntl
+except ImportError: # Windows, msvcrt only has exclusive locks
+    fcntl = None
+    import msvcrt
+
+class FileLock():
+    '''Lock on ticket_file + '.lock', shared for reading, exclusive for saving.
+
+    Not reentrant, a process holding the lock must not take it again.
+    '''
+    SUFFIX = '.lock'
+    POLL_INTERVAL = 0.01
+
+    def __init__(self, ticket_file: str, shared: bool = False, timeout: float = 30.0) -> None:
+        self.lock_file = ticket_file + self.SUFFIX
+        self.__shared = shared
+        self.__timeout = timeout
+        self.__fd = None
+
+    def __try_lock(self) -> bool:
+        '''Take the lock if it is free.'''
+        try:
+            if fcntl is not None:
+                mode = fcntl.LOCK_SH if self.__shared else fcntl.LOCK_EX
+                fcntl.flock(self.__fd, mode | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(self.__fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+
+    def acquire(self) -> None:
+        '''Wait for the lock, raise LockTimeout after timeout seconds.'''
+        self.__fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT)
+        deadline = time.monotonic() + self.__timeout
+        while not self.__try_lock():
+            if time.monotonic() >= deadline:
+                os.close(self.__fd)
+                self.__fd = None
+                raise TicketDBException(TicketDBError.LockTimeout)
+            time.sleep(self.POLL_INTERVAL)
+
+    def release(self) -> None:
+        '''Release the lock.'''
+        if self.__fd is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self.__fd, fcntl.LOCK_UN)
+        else:
+            msvcrt.locking(self.__fd, msvcrt.LK_UNLCK, 1)
+        os.close(self.__fd)
+        self.__fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback) -> None:
+        self.release()
@@ -0,0 +1,139 @@
+'''
+Opt-in timers and counters of a session.
+
+    TICKET_TIMING=1 python ticket_system_main.py            # print the summary
+    TICKET_TIMING=timing.json python ticket_system_main.py  # write it as JSON
+    TICKET_PROFILE=session.prof python ticket_system_main.py
+
+Timed functions and counters cost one flag check while disabled. Timers
+are inclusive, a timed function called by another is in both. A read
+session streams the tickets, so its parsing is timed in TicketReader.read
+rather than in TicketSystem.load.
+
+Index:
+    enable
+    enable_from_env
+    disable
+    reset
+    is_enabled
+    timed
+    count
+    counted
+    summary
+    finish
+'''
+
+import functools
+import json
+import os
+import time
+from typing import Iterable, Iterator
+
+_enabled = False
+_timer = {} # name: [calls, total seconds, max seconds]
+_counter = {} # name: count
+_json_file = None
+_profiler = None # cProfile.Profile obj
+_profile_file = None
+
+def enable(json_file: str = None, profile_file: str = None) -> None:
+    '''Start recording, with a cProfile capture when profile_file is given.'''
+    global _enabled, _json_file, _profiler, _profile_file
+    _enabled = True
+    _json_file = json_file
+    _profile_file = profile_file
+    if profile_file:
+        import cProfile
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+def enable_from_env(environ: dict = os.environ) -> None:
+    '''Enable by TICKET_TIMING (1 or a JSON file) and TICKET_PROFILE (a file).'''
+    timing = environ.get('TICKET_TIMING', '')
+    profile_file = environ.get('TICKET_PROFILE', '')
+    if timing or profile_file:
+        enable(json_file=timing if timing not in ('', '1') else None,
+               profile_file=profile_file or None)
+
+def disable() -> None:
+    '''Stop recording, the records are kept.'''
+    global _enabled, _profiler
+    _enabled = False
+    if _profiler is not None:
+        _profiler.disable()
+        _profiler.dump_stats(_profile_file)
+        _profiler = None
+
+def reset() -> None:
+    '''Drop the records.'''
+    _timer.clear()
+    _counter.clear()
+
+def is_enabled() -> bool:
+    return _enabled
+
+def timed(name: str):
+    '''Decorate a function to be timed under name.'''
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                record = _timer.setdefault(name, [0, 0.0, 0.0])
+                record[0] += 1
+                record[1] += seconds
+                record[2] = max(record[2], seconds)
+        return wrapper
+    return decorate
+
+def count(name: str, number: int = 1) -> None:
+    '''Add to a counter.'''
+    if _enabled:
+        _counter[name] = _counter.get(name, 0) + number
+
+def counted(name: str, items: Iterable) -> Iterable:
+    '''Count the items of a stream as they go, the stream itself while disabled.'''
+    if not _enabled:
+        return items
+    return _count_stream(name, items)
+
+def _count_stream(name: str, items: Iterable) -> Iterator:
+    number = 0
+    try:
+        for item in items:
+            number += 1
+            yield item
+    finally:
+        count(name, number)
+
+def summary() -> dict:
+    '''Timers and counters recorded so far.'''
+    return {'timers': {name: {'calls': calls,
+                              'total_seconds': round(total, 6),
+                              'max_seconds': round(longest, 6)}
+                       for name, (calls, total, longest) in _timer.items()},
+            'counters': dict(_counter)}
+
+def finish() -> None:
+    '''End the session, print the summary or write it as JSON.'''
+    if not _enabled:
+        return
+    json_file = _json_file
+    disable()
+    result = summary()
+    if json_file:
+        with open(json_file, 'w', encoding='utf-8') as output:
+            json.dump(result, output, indent=1)
+        return
+    print('------ Timing ------')
+    for name, record in sorted(result['timers'].items(),
+                               key=lambda item: -item[1]['total_seconds']):
+        print('%-28s %6d calls %10.4f s (max %.4f s)' % (
+            name, record['calls'], record['total_seconds'], record['max_seconds']))
+    for name, number in sorted(result['counters'].items()):
+        print('%-28s %d' % (name, number))
@@ -0,0 +1,106 @@
+'''
+Several workbooks, one per team, used as one storage.
+
+The .workbooks file lists the workbooks, one path per line, relative to
+that file. Each workbook keeps its own journal, lock, snapshot and
+archive through XlsxStorage. They are loaded in worker processes and
+every ticket remembers its workbook, so a save gives each workbook the
+changes of its own tickets. A created ticket goes to the first workbook.
+
+Each workbook numbers its tickets from 1, so the ids of the n-th workbook
+of the list, from 0, are shifted up by n * ID_RANGE while loaded and back
+when saved. An id names one ticket of all the workbooks.
+
+Index:
+    MultiXlsxStorage
+'''
+
+import os
+from typing import Iterable, Iterator, List
+
+from error_handler import TicketDBException
+from namespace import TicketDBError
+from parallel_loader import run_parallel
+from storage import StorageInterface
+from ticket_db import TicketFormat
+from ticket_journal import TicketChange
+from xlsx_storage import XlsxStorage
+
+ID_RANGE = 10000000 # ids of a workbook, the search index keeps them as 32 bit
+
+def _load_workbook(job: tuple) -> List[tuple]:
+    '''Load one workbook, in a worker, return the packed rows.'''
+    ticket_file, read_condition = job
+    return [ticket.to_packed() for ticket in XlsxStorage(ticket_file).load(read_condition)]
+
+class MultiXlsxStorage(StorageInterface):
+    '''The workbooks listed in a .workbooks file.'''
+    def __init__(self, list_file: str, max_workers: int = None) -> None:
+        self.__max_workers = max_workers
+        self.ticket_files = self.__read_list(list_file)
+
+    @staticmethod
+    def __read_list(list_file: str) -> List[str]:
+        '''Read the workbooks of the list, blank lines and # comments are skipped.'''
+        base_dir = os.path.dirname(os.path.abspath(list_file))
+        with open(list_file, encoding='utf-8') as workbooks:
+            lines = [line.strip() for line in workbooks]
+        ticket_files = [os.path.join(base_dir, line) for line in lines
+                        if line and not line.startswith('#')]
+        if not ticket_files:
+            raise TicketDBException(TicketDBError.NoWorkbook)
+        return ticket_files
+
+    def load(self, read_condition: TicketFormat = None) -> List[TicketFormat]:
+        '''Load the workbooks in parallel, the tickets in the order of the list.'''
+        jobs = [(ticket_file, read_condition) for ticket_file in self.ticket_files]
+        all_ticket = []
+        for ticket_file, rows in zip(self.ticket_files,
+                                     run_parallel(_load_workbook, jobs, self.__max_workers)):
+            all_ticket.extend(self.__shift(ticket_file, map(TicketFormat.from_packed, rows)))
+        return all_ticket
+
+    def stream(self, read_condition: TicketFormat = None) -> Iterator[TicketFormat]:
+        '''Stream the workbooks one after another.'''
+        for ticket_file in self.ticket_files:
+            yield from self.__shift(ticket_file, XlsxStorage(ticket_file).stream(read_condition))
+
+    def __shift(self, ticket_file: str, tickets: Iterable[TicketFormat]) -> Iterator[TicketFormat]:
+        '''Give the tickets of the workbook their origin and their ids in its range.'''
+        offset = self.ticket_files.index(ticket_file) * ID_RANGE
+        for ticket in tickets:
+            ticket.origin = ticket_file
+            if ticket.ticket_id is not None:
+                if ticket.ticket_id >= ID_RANGE:
+                    raise TicketDBException(TicketDBError.WrongFieldContent)
+                ticket.ticket_id += offset
+            yield ticket
+
+    def save(self, all_ticket: List[TicketFormat], changes: List[TicketChange]) -> List[TicketChange]:
+        '''Save the changes of each workbook into it.'''
+        file_changes = {ticket_file: [] for ticket_file in self.ticket_files}
+        conflicts = []
+        for change in changes:
+            origin = change.origin or self.ticket_files[0]
+            if origin in file_changes:
+                file_changes[origin].append(change)
+            else:
+                conflicts.append(change) # the workbook is no longer listed
+        for position, (ticket_file, changes) in enumerate(file_changes.items()):
+            if not changes:
+                continue
+            # the workbook gets the changes with its own ids, the conflicts
+            # returned are the changes of the session
+            offset = position * ID_RANGE
+            session_change = {}
+            file_change = []
+            for change in changes:
+                if offset and change.ticket_id is not None:
+                    unshifted = TicketChange(change.op, change.before, change.after,
+                                             change.ticket_id - offset, change.origin)
+                    session_change[id(unshifted)] = change
+                    change = unshifted
+                file_change.append(change)
+            conflicts.extend(session_change.get(id(change), change) for change in
+                             XlsxStorage(ticket_file).save(all_ticket, file_change))
+        return conflicts
@@ -16,6 +16,10 @@ class Authorization(Enum):
     Read = "R"
     Update = "U"
     Delete = "D"
+    Search = "S"
+    Report = "P"
+    BulkUpdate = "BU"
+    BulkDelete = "BD"
 
 class AuthorizeationError(Enum):
     NoAuthorization = 1
@@ -34,6 +38,10 @@ class TicketDBError(Enum):
     WrongFieldNumber = 5
     WrongFieldContent = 6
     FillInError = 7
+    JournalError = 8
+    MergeConflict = 9
+    LockTimeout = 10
+    NoWorkbook = 11
 
 class TicketStatus(Enum):
     Waiting = "Waiting"
@@ -0,0 +1,38 @@
+'''
+The next ticket id of a workbook, kept in a file next to it.
+
+An id is not given again after its ticket is deleted, even once the
+workbook is rewritten without it. The file holds only that number, it
+stays valid whatever becomes of the workbook.
+
+Index:
+    TicketNextId
+'''
+
+import marshal
+import os
+
+class TicketNextId():
+    '''Next id of the tickets of a workbook.'''
+    def __init__(self, ticket_file: str) -> None:
+        self.id_file = ticket_file + '.nextid'
+
+    def load(self) -> int:
+        '''Get the next id stored, 1 when there is none.'''
+        try:
+            with open(self.id_file, 'rb') as id_file:
+                next_id = marshal.load(id_file)
+        except (OSError, EOFError, ValueError, TypeError):
+            return 1
+        return next_id if isinstance(next_id, int) else 1
+
+    def store(self, next_id: int) -> None:
+        '''Store the next id.'''
+        temp_file = self.id_file + '.tmp'
+        try:
+            with open(temp_file, 'wb') as id_file:
+                marshal.dump(next_id, id_file)
+            os.replace(temp_file, self.id_file)
+        except OSError:
+            pass # the ids of the workbook and the journal still give a lower bound
+
@@ -0,0 +1,235 @@
+'''
+Mail notifications go through a persistent outbox.
+
+A ticket operation only puts the mail into the outbox. An OutboxWorker
+delivers it in the background: one mail per recipient for everything
+due, the updates of the same ticket coalesced, and failed deliveries
+retried with backoff.
+
+The interactive session only queues. Deliver the outbox with
+    python notification.py outbox.db --smtp-host mail.XXXXXXX.com
+
+Index:
+    TransportInterface
+    PrintTransport
+    SmtpTransport
+    NotificationOutbox
+    OutboxWorker
+    default_outbox
+    add_mail_arguments
+    start_worker
+'''
+
+from abc import ABC, abstractmethod
+import argparse
+import sys
+import threading
+import time
+from typing import Dict, List, TextIO
+
+OUTBOX_FILE = ''
+MAIL_DOMAIN = '@XXXXXXX.com'
+
+class TransportInterface(ABC):
+    @abstractmethod
+    def send(self, recipient: str, messages: List[str]) -> None:
+        '''Deliver the messages to the recipient as one mail, raise if it fails.'''
+
+class PrintTransport(TransportInterface):
+    '''Print instead of sending.'''
+    def __init__(self, file: TextIO = None) -> None:
+        self.__file = file
+
+    def send(self, recipient: str, messages: List[str]) -> None:
+        print('An email has been sent to %s: %s' % (recipient, ' '.join(messages)),
+              file=self.__file or sys.stdout)
+
+class SmtpTransport(TransportInterface):
+    '''Send through an SMTP server.'''
+    def __init__(self, host: str, port: int = 25, sender: str = 'ticket' + MAIL_DOMAIN) -> None:
+        self.__host = host
+        self.__port = port
+        self.__sender = sender
+
+    def send(self, recipient: str, messages: List[str]) -> None:
+        from email.message import EmailMessage # the mail libraries are only needed here
+        import smtplib
+        mail = EmailMessage()
+        mail['From'] = self.__sender
+        mail['To'] = recipient + MAIL_DOMAIN
+        mail['Subject'] = messages[0] if len(messages) == 1 else '%d ticket notifications' % len(messages)
+        mail.set_content('\n'.join(messages))
+        with smtplib.SMTP(self.__host, self.__port, timeout=10) as smtp:
+            smtp.send_message(mail)
+
+class NotificationOutbox():
+    '''Persistent queue of mails, a SQLite file next to the tickets.
+
+    A mail about a ticket replaces the pending mail about the same ticket
+    to the same recipient, so a burst of updates becomes one line.
+    '''
+    def __init__(self, outbox_file: str = ':memory:') -> None:
+        import sqlite3 # the outbox is first opened by a mail, not at start
+        # one connection shared by the operations and the worker thread
+        self.__connection = sqlite3.connect(outbox_file, check_same_thread=False)
+        self.__lock = threading.Lock()
+        with self.__lock, self.__connection:
+            self.__connection.execute('CREATE TABLE IF NOT EXISTS outbox ('
+                                      'id INTEGER PRIMARY KEY, '
+                                      'recipient TEXT, ticket_key TEXT, message TEXT, '
+                                      'attempts INTEGER DEFAULT 0, '
+                                      'next_attempt REAL DEFAULT 0, '
+                                      'failed INTEGER DEFAULT 0, '
+                                      'version INTEGER DEFAULT 0)')
+            columns = [row[1] for row in self.__connection.execute('PRAGMA table_info(outbox)')]
+            if 'version' not in columns: # an outbox from before the version column
+                self.__connection.execute('ALTER TABLE outbox ADD COLUMN version INTEGER DEFAULT 0')
+            self.__connection.execute('CREATE INDEX IF NOT EXISTS outbox_due '
+                                      'ON outbox (failed, next_attempt)')
+        self.__taken = {} # id -> version of the mails given by take_due
+
+    def put(self, recipient: str, message: str, ticket_key: str = None) -> None:
+        '''Queue a mail.'''
+        with self.__lock, self.__connection:
+            if ticket_key is not None:
+                updated = self.__connection.execute(
+                    'UPDATE outbox SET message = ?, version = version + 1 '
+                    'WHERE recipient = ? AND ticket_key = ? '
+                    'AND failed = 0', (message, recipient, ticket_key)).rowcount
+                if updated:
+                    return
+            self.__connection.execute(
+                'INSERT INTO outbox (recipient, ticket_key, message) VALUES (?, ?, ?)',
+                (recipient, ticket_key, message))
+
+    def take_due(self, limit: int = 500) -> Dict[str, List[tuple]]:
+        '''Get the due mails grouped by recipient, {recipient: [(id, message)]}.'''
+        with self.__lock:
+            rows = self.__connection.execute(
+                'SELECT id, recipient, message, version FROM outbox '
+                'WHERE failed = 0 AND next_attempt <= ? ORDER BY id LIMIT ?',
+                (time.time(), limit)).fetchall()
+            due = {}
+            for mail_id, recipient, message, version in rows:
+                self.__taken[mail_id] = version
+                due.setdefault(recipient, []).append((mail_id, message))
+        return due
+
+    def done(self, mail_ids: List[int]) -> None:
+        '''Drop delivered mails.
+
+        A mail replaced by put() since take_due() stays, its new message
+        is not delivered yet.
+        '''
+        with self.__lock, self.__connection:
+            self.__connection.executemany('DELETE FROM outbox WHERE id = ? AND version = ?',
+                                          [(mail_id, self.__taken.pop(mail_id, 0))
+                                           for mail_id in mail_ids])
+
+    def retry(self, mail_ids: List[int], backoff: float, max_attempts: int) -> None:
+        '''Schedule mails again, give up on them after max_attempts.'''
+        with self.__lock, self.__connection:
+            for mail_id in mail_ids:
+                self.__taken.pop(mail_id, None)
+                self.__connection.execute(
+                    'UPDATE outbox SET attempts = attempts + 1, '
+                    'next_attempt = ? * (1 << attempts) + ?, '
+                    'failed = (attempts + 1 >= ?) WHERE id = ?',
+                    (backoff, time.time(), max_attempts, mail_id))
+
+    def count(self, failed: bool = False) -> int:
+        '''Count the pending, or the given up, mails.'''
+        with self.__lock:
+            return self.__connection.execute('SELECT COUNT(*) FROM outbox WHERE failed = ?',
+                                             (int(failed),)).fetchone()[0]
+
+class OutboxWorker():
+    '''Deliver the outbox in a background thread.'''
+    def __init__(self,
+                outbox: NotificationOutbox,
+                transport: TransportInterface,
+                interval: float = 1.0,
+                backoff: float = 5.0,
+                max_attempts: int = 5) -> None:
+        self.__outbox = outbox
+        self.__transport = transport
+        self.__interval = interval
+        self.__backoff = backoff
+        self.__max_attempts = max_attempts
+        self.__stop_event = threading.Event()
+        self.__thread = None
+
+    def run_once(self) -> int:
+        '''Deliver what is due, one mail per recipient, return the mails sent.'''
+        sent = 0
+        for recipient, mails in self.__outbox.take_due().items():
+            mail_ids = [mail_id for mail_id, _ in mails]
+            try:
+                self.__transport.send(recipient, [message for _, message in mails])
+            except Exception:
+                self.__outbox.retry(mail_ids, self.__backoff, self.__max_attempts)
+                continue
+            self.__outbox.done(mail_ids)
+            sent += 1
+        return sent
+
+    def __run(self) -> None:
+        while not self.__stop_event.wait(self.__interval):
+            self.run_once()
+        self.run_once()
+
+    def start(self) -> None:
+        '''Start delivering.'''
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        '''Deliver what is due once more and stop.'''
+        self.__stop_event.set()
+        if self.__thread is not None:
+            self.__thread.join(timeout)
+
+_default_outbox = None
+
+def default_outbox() -> NotificationOutbox:
+    '''The outbox at OUTBOX_FILE, in memory if it is not set.'''
+    global _default_outbox
+    if _default_outbox is None:
+        _default_outbox = NotificationOutbox(OUTBOX_FILE or ':memory:')
+    return _default_outbox
+
+def add_mail_arguments(parser: argparse.ArgumentParser) -> None:
+    '''Options of the outbox and its delivery.'''
+    parser.add_argument('--outbox', default='', help='outbox file, in memory if not given')
+    parser.add_argument('--smtp-host', help='print the mails to stderr if not given')
+    parser.add_argument('--smtp-port', type=int, default=25)
+
+def start_worker(args: argparse.Namespace, interval: float = 1.0) -> OutboxWorker:
+    '''Use the outbox of the options and start delivering it.'''
+    global OUTBOX_FILE
+    OUTBOX_FILE = args.outbox
+    if args.smtp_host:
+        transport = SmtpTransport(args.smtp_host, args.smtp_port)
+    else:
+        transport = PrintTransport(sys.stderr)
+    worker = OutboxWorker(default_outbox(), transport, interval)
+    worker.start()
+    return worker
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Deliver the outbox until interrupted.')
+    parser.add_argument('outbox')
+    parser.add_argument('--smtp-host', help='print the mails to stderr if not given')
+    parser.add_argument('--smtp-port', type=int, default=25)
+    parser.add_argument('--interval', type=float, default=5.0)
+    args = parser.parse_args()
+
+    worker = start_worker(args, args.interval)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        worker.stop()
+
+if __name__ == '__main__':
+    main()
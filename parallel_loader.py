@@ -0,0 +1,27 @@
+'''
+Run a function over several items in worker processes.
+
+MultiXlsxStorage loads its workbooks with it, each one through
+XlsxStorage so that its journal and archive are applied. A worker sends
+back the packed rows of its tickets and the parent process builds them.
+A workbook is the unit that scales with the cores: splitting one sheet
+gains little on .xlsx, every worker still reads it from its start.
+
+Index:
+    run_parallel
+'''
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+from typing import Callable, List
+
+def run_parallel(function: Callable, items: List, max_workers: int = None) -> list:
+    '''Call the function on each item in worker processes, return the results in order.
+
+    A single item, or a single worker, is done in this process.
+    '''
+    max_workers = min(max_workers or os.cpu_count() or 1, len(items))
+    if max_workers <= 1:
+        return [function(item) for item in items]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(function, items))
@@ -0,0 +1,198 @@
+'''
+Index:
+    Query
+    MatchAll
+    Eq
+    In
+    And
+    Or
+    from_condition
+    parse_filter
+'''
+
+from abc import ABC, abstractmethod
+from typing import Callable, Iterable, List, Optional
+
+from error_handler import InputException
+from instrument import count, counted
+from namespace import InputError
+from ticket_db import TicketFormat
+from ticket_index import TicketIndex
+
+class Query(ABC):
+    '''A filter over tickets.
+
+    compile() turns it into one Python function, so a ticket is checked
+    with a single call. run() answers it from a TicketIndex when the
+    fields allow, and falls back to the compiled predicate otherwise.
+    '''
+    @abstractmethod
+    def _source(self, values: list) -> str:
+        '''Python expression over the ticket t, constants go into values.'''
+
+    @abstractmethod
+    def plan(self, ticket_index: TicketIndex) -> Optional[dict]:
+        '''Candidate tickets {sequence: ticket} from the index, None if a scan is needed.'''
+
+    def compile(self) -> Callable[[TicketFormat], bool]:
+        '''Compile into a predicate.'''
+        values = []
+        source = self._source(values)
+        namespace = {'v%d' % i: value for i, value in enumerate(values)}
+        return eval('lambda t: %s' % source, namespace)
+
+    def run(self, ticket_index: TicketIndex) -> List[TicketFormat]:
+        '''Get the matching tickets of the index, in ticket list order.'''
+        predicate = self.compile()
+        candidate = self.plan(ticket_index)
+        if candidate is None:
+            count('tickets_scanned', len(ticket_index))
+            return [ticket for ticket in ticket_index if predicate(ticket)]
+        count('tickets_scanned', len(candidate))
+        return [candidate[seq] for seq in sorted(candidate) if predicate(candidate[seq])]
+
+    def filter(self, tickets: Iterable[TicketFormat]) -> Iterable[TicketFormat]:
+        '''Filter a stream of tickets.'''
+        predicate = self.compile()
+        return (ticket for ticket in counted('tickets_scanned', tickets) if predicate(ticket))
+
+    def __and__(self, other):
+        return And(self, other)
+
+    def __or__(self, other):
+        return Or(self, other)
+
+class MatchAll(Query):
+    '''Every ticket.'''
+    def _source(self, values: list) -> str:
+        return 'True'
+
+    def plan(self, ticket_index: TicketIndex) -> Optional[dict]:
+        return None
+
+    def run(self, ticket_index: TicketIndex) -> List[TicketFormat]:
+        count('tickets_scanned', len(ticket_index))
+        return list(ticket_index)
+
+class Eq(Query):
+    '''field == value'''
+    def __init__(self, field: str, value) -> None:
+        if field not in TicketFormat.FIELD:
+            raise InputException(InputError.NoSuchOption)
+        self.field = field
+        self.value = value
+
+    def _source(self, values: list) -> str:
+        values.append(self.value)
+        return 't.%s == v%d' % (self.field, len(values) - 1)
+
+    def plan(self, ticket_index: TicketIndex) -> Optional[dict]:
+        if self.field not in TicketIndex.INDEXED_FIELD:
+            return None
+        return ticket_index.lookup(self.field, self.value)
+
+class In(Query):
+    '''field in values'''
+    def __init__(self, field: str, values: Iterable) -> None:
+        if field not in TicketFormat.FIELD:
+            raise InputException(InputError.NoSuchOption)
+        self.field = field
+        self.values = frozenset(values)
+
+    def _source(self, values: list) -> str:
+        values.append(self.values)
+        return 't.%s in v%d' % (self.field, len(values) - 1)
+
+    def plan(self, ticket_index: TicketIndex) -> Optional[dict]:
+        if self.field not in TicketIndex.INDEXED_FIELD:
+            return None
+        candidate = {}
+        for value in self.values:
+            candidate.update(ticket_index.lookup(self.field, value))
+        return candidate
+
+class And(Query):
+    '''All of the queries.'''
+    def __init__(self, *queries: Query) -> None:
+        self.queries = queries
+
+    def _source(self, values: list) -> str:
+        if not self.queries:
+            return 'True'
+        return '(%s)' % ' and '.join(query._source(values) for query in self.queries)
+
+    def plan(self, ticket_index: TicketIndex) -> Optional[dict]:
+        # the smallest candidate set wins, the predicate checks the rest
+        plans = [query.plan(ticket_index) for query in self.queries]
+        plans = [candidate for candidate in plans if candidate is not None]
+        if not plans:
+            return None
+        return min(plans, key=len)
+
+class Or(Query):
+    '''Any of the queries.'''
+    def __init__(self, *queries: Query) -> None:
+        self.queries = queries
+
+    def _source(self, values: list) -> str:
+        if not self.queries:
+            return 'False'
+        return '(%s)' % ' or '.join(query._source(values) for query in self.queries)
+
+    def plan(self, ticket_index: TicketIndex) -> Optional[dict]:
+        candidate = {}
+        for query in self.queries:
+            sub_candidate = query.plan(ticket_index)
+            if sub_candidate is None:
+                return None
+            candidate.update(sub_candidate)
+        return candidate
+
+def from_condition(condition) -> Query:
+    '''Build the query of a read condition, a field set to False is not a constraint.
+
+    A Query is returned as it is.
+    '''
+    if isinstance(condition, Query):
+        return condition
+    queries = [Eq(field, getattr(condition, field))
+               for field in TicketFormat.FIELD
+               if getattr(condition, field) is not False]
+    if not queries:
+        return MatchAll()
+    if len(queries) == 1:
+        return queries[0]
+    return And(*queries)
+
+def _check_scalar(value) -> None:
+    '''A filter compares a field to a string, a number or null only.'''
+    if value is not None and not isinstance(value, (str, int, float)):
+        raise InputException(InputError.NoSuchOption)
+
+def parse_filter(user_filter: dict) -> Query:
+    '''Build a query from a JSON-like filter.
+
+    {"status": "Waiting", "assign_to": ["Amy", "Joseph"]} is status equal
+    to Waiting and assign_to in the list. "and"/"or" take a list of filters.
+    '''
+    if not isinstance(user_filter, dict):
+        raise InputException(InputError.NoSuchOption)
+    queries = []
+    for key, value in user_filter.items():
+        if key in ('and', 'or'):
+            if not isinstance(value, list):
+                raise InputException(InputError.NoSuchOption)
+            sub_queries = [parse_filter(item) for item in value]
+            queries.append(And(*sub_queries) if key == 'and' else Or(*sub_queries))
+        elif isinstance(value, list):
+            for item in value:
+                _check_scalar(item)
+            queries.append(In(key, value))
+        else:
+            _check_scalar(value)
+            queries.append(Eq(key, value))
+    if not queries:
+        return MatchAll()
+    if len(queries) == 1:
+        return queries[0]
+    return And(*queries)
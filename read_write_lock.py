@@ -0,0 +1,101 @@
+'''
+Lock between the threads sharing a ticket store.
+
+Index:
+    ReadWriteLock
+'''
+
+from contextlib import contextmanager
+import threading
+from typing import Iterator
+
+class ReadWriteLock():
+    '''Many readers at once or one writer.
+
+    A waiting writer holds off new readers, so a stream of reads cannot
+    starve it. A thread may take the lock again while it holds it: a
+    reader may read again, a writer may read or write again. A reader
+    cannot become a writer, that would wait for itself.
+    '''
+    def __init__(self) -> None:
+        self.__condition = threading.Condition(threading.Lock())
+        self.__readers = 0          # threads holding the read lock
+        self.__writer = None        # ident of the thread holding the write lock
+        self.__writes = 0           # times the writer took the write lock
+        self.__writers_waiting = 0
+        self.__local = threading.local() # reads of this thread
+
+    def __held_reads(self) -> int:
+        return getattr(self.__local, 'reads', 0)
+
+    def acquire_read(self) -> None:
+        '''Wait until no writer holds or waits for the lock.'''
+        reads = self.__held_reads()
+        if reads or self.__writer == threading.get_ident():
+            self.__local.reads = reads + 1
+            return
+        with self.__condition:
+            while self.__writer is not None or self.__writers_waiting:
+                self.__condition.wait()
+            self.__readers += 1
+        self.__local.reads = 1
+
+    def release_read(self) -> None:
+        reads = self.__held_reads() - 1
+        if reads < 0:
+            raise RuntimeError('release_read without acquire_read')
+        self.__local.reads = reads
+        if reads or self.__writer == threading.get_ident():
+            return
+        with self.__condition:
+            self.__readers -= 1
+            if not self.__readers:
+                self.__condition.notify_all()
+
+    def acquire_write(self) -> None:
+        '''Wait until no other thread holds the lock.'''
+        ident = threading.get_ident()
+        if self.__writer == ident:
+            self.__writes += 1
+            return
+        if self.__held_reads():
+            raise RuntimeError('a reader cannot take the write lock')
+        with self.__condition:
+            self.__writers_waiting += 1
+            try:
+                while self.__writer is not None or self.__readers:
+                    self.__condition.wait()
+            finally:
+                self.__writers_waiting -= 1
+            self.__writer = ident
+            self.__writes = 1
+
+    def release_write(self) -> None:
+        if self.__writer != threading.get_ident():
+            raise RuntimeError('release_write by a thread not holding it')
+        self.__writes -= 1
+        if self.__writes:
+            return
+        with self.__condition:
+            self.__writer = None
+            if self.__held_reads(): # the reads taken while writing go on
+                self.__readers += 1
+            self.__condition.notify_all()
+
+    @contextmanager
+    def read_locked(self) -> Iterator[None]:
+        '''Hold the read lock in the block.'''
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write_locked(self) -> Iterator[None]:
+        '''Hold the write lock in the block.'''
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
@@ -0,0 +1,283 @@
+'''
+Full-text search over the title and description of the tickets.
+
+Each indexed version of a ticket is a document with its own number. The
+postings of a word are arrays of document numbers, one for the titles
+and one for the descriptions, so a million tickets take tens of MB.
+Changing or removing a ticket only marks its document dead; the dead
+ones are dropped when they are a quarter of the index.
+
+A query matches the tickets holding every word of it, the last word is
+also taken as a prefix, and a word ending with * is only a prefix.
+Results are ranked by the rarity of the words matched, a match in the
+title counts double.
+
+Index:
+    tokenize
+    SearchIndex
+'''
+
+from array import array
+from bisect import bisect_left
+import heapq
+import math
+import marshal
+from operator import itemgetter
+import os
+import re
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+import zlib
+
+from instrument import count, timed
+from ticket_db import TicketFormat
+
+SEARCH_INDEX_VERSION = 2
+WORD = re.compile(r'[^\W_]+')
+PREFIX_LIMIT = 200 # words a prefix expands to at most
+
+def tokenize(text: str) -> List[str]:
+    '''Split the text into lower case words, _ separates words too.'''
+    return WORD.findall(str(text).lower())
+
+def signature(ticket: TicketFormat) -> int:
+    '''Checksum of the text of the ticket, stable between runs.'''
+    return zlib.crc32(('%s\0%s' % (ticket.title, ticket.description)).encode('utf-8'))
+
+class SearchIndex():
+    '''Inverted index of the tickets by key, the ticket id for a saved ticket.'''
+    SUFFIX = '.search'
+
+    def __init__(self) -> None:
+        self.__title = {}           # word -> array of document numbers
+        self.__description = {}     # word -> array of document numbers
+        self.__key = []             # document number -> key, None when dead
+        self.__document = {}        # key -> (document number, signature)
+        self.__dead = 0
+        self.__words = None         # sorted words, rebuilt after new words
+        self.changed = False
+
+    def __len__(self) -> int:
+        return len(self.__document)
+
+    @staticmethod
+    def __get(postings: dict, word: str) -> array:
+        '''Get the posting of the word, a loaded one is decoded at its first use.'''
+        posting = postings.get(word)
+        if type(posting) is bytes:
+            content = posting
+            posting = postings[word] = array('i')
+            posting.frombytes(content)
+        return posting
+
+    def __post(self, postings: dict, words: Iterable[str], doc: int) -> None:
+        for word in set(words):
+            posting = self.__get(postings, word)
+            if posting is None:
+                posting = postings[word] = array('i')
+                self.__words = None
+            posting.append(doc)
+
+    def add(self, key: Hashable, ticket: TicketFormat) -> None:
+        '''Index the ticket under the key, replacing what the key had.'''
+        self.remove(key)
+        doc = len(self.__key)
+        self.__key.append(key)
+        self.__document[key] = (doc, signature(ticket))
+        self.__post(self.__title, tokenize(ticket.title), doc)
+        self.__post(self.__description, tokenize(ticket.description), doc)
+        self.changed = True
+
+    def remove(self, key: Hashable) -> None:
+        '''Forget the ticket of the key.'''
+        document = self.__document.pop(key, None)
+        if document is None:
+            return
+        self.__key[document[0]] = None
+        self.__dead += 1
+        self.changed = True
+        if self.__dead * 4 > len(self.__key) and self.__dead > 1000:
+            self.__compact()
+
+    def sync(self, keyed_tickets: Iterable[Tuple[Hashable, TicketFormat]]) -> int:
+        '''Bring the index up to the tickets, return how many are indexed again.'''
+        seen = set()
+        reindexed = 0
+        for key, ticket in keyed_tickets:
+            seen.add(key)
+            document = self.__document.get(key)
+            if document is None or document[1] != signature(ticket):
+                self.add(key, ticket)
+                reindexed += 1
+        for key in [key for key in self.__document if key not in seen]:
+            self.remove(key)
+        return reindexed
+
+    def __renumber(self, keep) -> tuple:
+        '''Keys and postings of the documents whose key is kept, numbered again.'''
+        renumber = {}
+        keys = []
+        for doc, key in enumerate(self.__key):
+            if key is not None and keep(key):
+                renumber[doc] = len(keys)
+                keys.append(key)
+        renumbered = []
+        for postings in (self.__title, self.__description):
+            kept = {}
+            for word in postings:
+                posting = array('i', (renumber[doc] for doc in self.__get(postings, word)
+                                      if doc in renumber))
+                if posting:
+                    kept[word] = posting
+            renumbered.append(kept)
+        return keys, renumbered[0], renumbered[1]
+
+    def __compact(self) -> None:
+        '''Drop the dead documents.'''
+        self.__key, self.__title, self.__description = self.__renumber(lambda key: True)
+        self.__document = {key: (doc, self.__document[key][1])
+                           for doc, key in enumerate(self.__key)}
+        self.__dead = 0
+        self.__words = None
+
+    def __sorted_words(self) -> List[str]:
+        if self.__words is None:
+            self.__words = sorted(self.__title.keys() | self.__description.keys())
+        return self.__words
+
+    def __expand(self, word: str, prefix: bool) -> List[str]:
+        '''The indexed words for a query word.'''
+        if not prefix:
+            return [word]
+        self.__sorted_words()
+        matched = []
+        for i in range(bisect_left(self.__words, word), len(self.__words)):
+            if not self.__words[i].startswith(word) or len(matched) >= PREFIX_LIMIT:
+                break
+            matched.append(self.__words[i])
+        return matched
+
+    def __match(self, word: str, prefix: bool) -> List[Tuple[float, array]]:
+        '''(score, posting) of the indexed words for a query word, lowest score first.'''
+        live = len(self.__document) or 1
+        matched = []
+        for indexed in self.__expand(word, prefix):
+            for postings, weight in ((self.__description, 1.0), (self.__title, 2.0)):
+                posting = self.__get(postings, indexed)
+                if posting:
+                    matched.append((weight * math.log(1 + live / len(posting)), posting))
+        matched.sort(key=itemgetter(0))
+        return matched
+
+    @staticmethod
+    def __score(matched: List[Tuple[float, array]]) -> Dict[int, float]:
+        '''Best score of each document of the postings.'''
+        score = {}
+        for value, posting in matched: # a higher score overwrites a lower one
+            score.update(dict.fromkeys(posting, value))
+        return score
+
+    @staticmethod
+    def __probe(total: Dict[int, float], matched: List[Tuple[float, array]]) -> Dict[int, float]:
+        '''Keep the documents found in the postings, by binary search in each.'''
+        kept = {}
+        for doc, value in total.items():
+            best = 0
+            for score, posting in matched:
+                i = bisect_left(posting, doc)
+                if i < len(posting) and posting[i] == doc:
+                    best = score
+            if best:
+                kept[doc] = value + best
+        return kept
+
+    @timed('SearchIndex.search')
+    def search(self, query: str, limit: int = None, keep: Set[Hashable] = None) -> List[Hashable]:
+        '''Keys of the tickets matching every word of the query, best first.
+
+        Only the keys in keep are returned when it is given.
+
+        The rarest word gives the candidates. A much more common word is
+        checked by binary search in its postings, which are in document
+        order, instead of being read through.
+        '''
+        words = query.split()
+        terms = []
+        for i, word in enumerate(words):
+            prefix = word.endswith('*') or i == len(words) - 1
+            for token in tokenize(word):
+                terms.append(self.__match(token, prefix))
+        if not terms:
+            return []
+
+        terms.sort(key=lambda matched: sum(len(posting) for _, posting in matched))
+        total = self.__score(terms[0])
+        for matched in terms[1:]:
+            size = sum(len(posting) for _, posting in matched)
+            if len(total) * 32 < size:
+                total = self.__probe(total, matched)
+            else:
+                score = self.__score(matched)
+                total = {doc: value + score[doc] for doc, value in total.items() if doc in score}
+            if not total:
+                return []
+
+        keys = self.__key
+        if keep is not None:
+            total = {doc: value for doc, value in total.items() if keys[doc] in keep}
+        count('search_candidates', len(total))
+        ranked = sorted(total.items(), key=itemgetter(1), reverse=True) if limit is None \
+            else heapq.nlargest(limit * 2, total.items(), key=itemgetter(1))
+        result = [keys[doc] for doc, _ in ranked if keys[doc] is not None]
+        if limit is not None and len(result) < limit and len(ranked) < len(total):
+            # dead documents took places, rank them all
+            ranked = sorted(total.items(), key=itemgetter(1), reverse=True)
+            result = [keys[doc] for doc, _ in ranked if keys[doc] is not None]
+        return result[:limit]
+
+    def save(self, index_file: str) -> None:
+        '''Write the index of the saved tickets, those keyed by their ticket id.'''
+        if self.__dead or any(type(key) is not int for key in self.__document):
+            keys, title, description = self.__renumber(lambda key: type(key) is int)
+            words = sorted(title.keys() | description.keys())
+        else:
+            keys, title, description = self.__key, self.__title, self.__description
+            words = self.__sorted_words()
+        def to_bytes(postings: dict) -> dict:
+            return {word: posting if type(posting) is bytes else posting.tobytes()
+                    for word, posting in postings.items()}
+        content = (SEARCH_INDEX_VERSION,
+                   keys,
+                   [self.__document[key][1] for key in keys],
+                   to_bytes(title),
+                   to_bytes(description),
+                   words) # the words are shared with the postings in the file
+        temp_file = index_file + '.tmp'
+        try:
+            with open(temp_file, 'wb') as index:
+                marshal.dump(content, index)
+            os.replace(temp_file, index_file)
+        except OSError:
+            return # it is built again from the tickets
+        self.changed = False
+        count('bytes_written', os.path.getsize(index_file))
+
+    @staticmethod
+    def load(index_file: str):
+        '''Read an index, an empty one when there is none.'''
+        search_index = SearchIndex()
+        try:
+            with open(index_file, 'rb') as index:
+                content = index.read() # much faster than marshal.load on the file
+            version, keys, signatures, title, description, words = marshal.loads(content)
+        except (OSError, EOFError, ValueError, TypeError):
+            return search_index
+        if version != SEARCH_INDEX_VERSION:
+            return search_index
+
+        search_index.__key = keys
+        search_index.__document = {key: (doc, sig)
+                                   for doc, (key, sig) in enumerate(zip(keys, signatures))}
+        search_index.__title = title # bytes until a posting is used
+        search_index.__description = description
+        search_index.__words = words
+        return search_index
@@ -0,0 +1,71 @@
+'''
+Parsed workbook kept in a binary file next to it.
+
+Decoding the workbook is the slow part of a start. The snapshot holds
+the parsed tickets in marshal format, status and ticket_type as codes,
+and is only used while the workbook has the same size, mtime and
+content hash as when the snapshot was taken.
+
+Index:
+    TicketSnapshot
+'''
+
+import hashlib
+import marshal
+import os
+from typing import List
+
+from instrument import count
+from ticket_db import TicketFormat
+
+SNAPSHOT_VERSION = 2
+
+class TicketSnapshot():
+    '''Snapshot of the tickets of a workbook.'''
+    def __init__(self, ticket_file: str) -> None:
+        self.__ticket_file = ticket_file
+        self.snapshot_file = ticket_file + '.snapshot'
+
+    def __stat(self) -> tuple:
+        '''Size and mtime of the workbook.'''
+        stat = os.stat(self.__ticket_file)
+        return stat.st_size, stat.st_mtime_ns
+
+    def __content_hash(self) -> str:
+        '''Hash of the workbook content.'''
+        digest = hashlib.blake2b(digest_size=16)
+        with open(self.__ticket_file, 'rb') as workbook:
+            for block in iter(lambda: workbook.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def load(self) -> List[TicketFormat] or None:
+        '''Get the tickets, None when there is no valid snapshot.'''
+        try:
+            with open(self.snapshot_file, 'rb') as snapshot:
+                header = marshal.load(snapshot)
+                if header != (SNAPSHOT_VERSION, *self.__stat(), self.__content_hash()):
+                    return None
+                rows = marshal.load(snapshot)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        count('rows_from_snapshot', len(rows))
+        return [TicketFormat.from_packed(row) for row in rows]
+
+    def store(self, all_ticket: List[TicketFormat]) -> None:
+        '''Take a snapshot of the tickets just parsed from, or written to, the workbook.'''
+        header = (SNAPSHOT_VERSION, *self.__stat(), self.__content_hash())
+        rows = [ticket.to_packed() for ticket in all_ticket]
+        temp_file = self.snapshot_file + '.tmp'
+        try:
+            with open(temp_file, 'wb') as snapshot:
+                marshal.dump(header, snapshot)
+                marshal.dump(rows, snapshot)
+            os.replace(temp_file, self.snapshot_file)
+        except OSError:
+            pass # no snapshot only means the next start decodes the workbook
+
+    def clear(self) -> None:
+        '''Drop the snapshot.'''
+        if os.path.exists(self.snapshot_file):
+            os.remove(self.snapshot_file)
@@ -0,0 +1,127 @@
+'''
+Index:
+    SqliteStorage
+'''
+
+import sqlite3
+from typing import Iterator, List
+
+from error_handler import TicketDBException
+from namespace import Authorization
+from storage import StorageInterface, split_origin
+from ticket_db import TicketFormat
+from ticket_journal import TicketChange, rebase
+
+class SqliteStorage(StorageInterface):
+    '''SQLite database, one row per ticket, the ticket id is the row id.'''
+    CONDITION_FIELD = ('assign_to', 'status', 'submitter', 'ticket_type')
+    INDEXED_FIELD = ('title', 'assign_to', 'status', 'submitter')
+
+    def __init__(self, db_file: str) -> None:
+        self.__db_file = db_file
+        self.__connection = None
+
+    def __connect(self) -> sqlite3.Connection:
+        '''Open the database, create the table at the first time.'''
+        if self.__connection is None:
+            connection = sqlite3.connect(self.__db_file)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS ticket ('
+                               'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                               'title TEXT, description TEXT, assign_to TEXT, '
+                               'status TEXT, submitter TEXT, ticket_type TEXT)')
+            for field in self.INDEXED_FIELD:
+                connection.execute('CREATE INDEX IF NOT EXISTS ticket_%s ON ticket (%s)'
+                                   % (field, field))
+            connection.commit()
+            self.__connection = connection
+        return self.__connection
+
+    def close(self) -> None:
+        '''Close the database.'''
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+
+    def __build_where(self, read_condition: TicketFormat) -> tuple:
+        '''Build the WHERE clause from the read condition.'''
+        clause = []
+        value = []
+        if read_condition is not None:
+            for field in self.CONDITION_FIELD:
+                cond = getattr(read_condition, field)
+                if cond is not False:
+                    clause.append('%s = ?' % field)
+                    value.append(cond)
+        if not clause:
+            return '', value
+        return ' WHERE ' + ' AND '.join(clause), value
+
+    def load(self, read_condition: TicketFormat = None) -> List[TicketFormat]:
+        '''Load the tickets matching the read condition.'''
+        return list(self.stream(read_condition))
+
+    def stream(self, read_condition: TicketFormat = None) -> Iterator[TicketFormat]:
+        '''Yield the tickets matching the read condition from the cursor.'''
+        where, value = self.__build_where(read_condition)
+        cursor = self.__connect().execute(
+            'SELECT id, %s FROM ticket%s ORDER BY id' % (', '.join(TicketFormat.FIELD), where),
+            value)
+        for row in cursor:
+            yield TicketFormat.from_row(row[1:], row[0])
+
+    def save(self, all_ticket: List[TicketFormat], changes: List[TicketChange]) -> List[TicketChange]:
+        '''Merge each change into the saved rows, all in one write transaction.
+
+        The changes of tickets loaded from a workbook are returned unsaved.
+        '''
+        fields = ', '.join(TicketFormat.FIELD)
+        assign = ', '.join('%s = ?' % field for field in TicketFormat.FIELD)
+        changes, conflicts = split_origin(changes, self.__db_file)
+        connection = self.__connect()
+        created = [] # (change, id of the inserted row)
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            for change in changes:
+                if change.ticket_id is not None:
+                    current = connection.execute('SELECT id, %s FROM ticket WHERE id = ?'
+                                                 % fields, (change.ticket_id,)).fetchall()
+                else:
+                    title = (change.before or change.after)[0]
+                    current = connection.execute('SELECT id, %s FROM ticket WHERE title = ? '
+                                                 'ORDER BY id' % fields, (title,)).fetchall()
+                try:
+                    rebased = rebase(change, [row[1:] for row in current])
+                except TicketDBException:
+                    conflicts.append(change)
+                    continue
+                if rebased is None:
+                    continue
+
+                if rebased.op == Authorization.Create.value:
+                    created.append((change, connection.execute(
+                        'INSERT INTO ticket (%s) VALUES (?, ?, ?, ?, ?, ?)'
+                        % fields, rebased.after).lastrowid))
+                    continue
+                row_id = next(row[0] for row in current if row[1:] == rebased.before)
+                if rebased.op == Authorization.Update.value:
+                    connection.execute('UPDATE ticket SET %s WHERE id = ?' % assign,
+                                       rebased.after + (row_id,))
+                elif rebased.op == Authorization.Delete.value:
+                    connection.execute('DELETE FROM ticket WHERE id = ?', (row_id,))
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        for change, ticket_id in created:
+            change.ticket_id = ticket_id
+        return conflicts
+
+    def insert(self, all_ticket: List[TicketFormat]) -> None:
+        '''Insert the tickets in one transaction, keeping their ids.'''
+        connection = self.__connect()
+        with connection:
+            connection.executemany('INSERT INTO ticket (id, %s) VALUES (?, ?, ?, ?, ?, ?, ?)'
+                                   % ', '.join(TicketFormat.FIELD),
+                                   ((ticket.ticket_id,) + ticket.to_row()
+                                    for ticket in all_ticket))
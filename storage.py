@@ -0,0 +1,94 @@
+'''
+Storages of the tickets, chosen by the file extension.
+
+A backend is registered as 'module.Class' and its module, with the
+workbook or database library it needs, is only imported when a file of
+its kind is opened.
+
+Index:
+    StorageInterface
+    register_storage
+    get_storage_class
+    open_storage
+    split_origin
+    import_xlsx
+'''
+
+from abc import ABC, abstractmethod
+import importlib
+import os
+import sys
+from typing import Iterable, Iterator, List
+
+from ticket_db import TicketFormat
+from ticket_journal import TicketChange
+
+STORAGE_BACKEND = {} # extension: 'module.Class'
+DEFAULT_BACKEND = 'xlsx_storage.XlsxStorage'
+
+class StorageInterface(ABC):
+    @abstractmethod
+    def load(self, read_condition: TicketFormat = None) -> List[TicketFormat]:
+        '''Load the tickets. A storage may load only those matching read_condition.'''
+
+    def stream(self, read_condition: TicketFormat = None) -> Iterator[TicketFormat]:
+        '''Yield the tickets without holding them all, for sessions that walk them once.'''
+        return iter(self.load(read_condition))
+
+    @abstractmethod
+    def save(self, all_ticket: List[TicketFormat], changes: List[TicketChange]) -> List[TicketChange]:
+        '''Save the changes of the session.
+
+        Other sessions may have saved since the load. Their changes are
+        kept, the changes of this session are merged on top of them and
+        the ones in conflict are returned unsaved. A created ticket saved
+        gives its id to its change.
+        '''
+
+def register_storage(extensions: Iterable[str], backend: str) -> None:
+    '''Use the backend, 'module.Class', for the files with the extensions.'''
+    for extension in extensions:
+        STORAGE_BACKEND[extension.lower()] = backend
+
+register_storage(('.xlsx', '.xlsm'), 'xlsx_storage.XlsxStorage')
+register_storage(('.db', '.sqlite', '.sqlite3'), 'sqlite_storage.SqliteStorage')
+register_storage(('.workbooks',), 'multi_storage.MultiXlsxStorage')
+
+def get_storage_class(ticket_file: str) -> type:
+    '''Import the backend of the file extension, the workbook one if unknown.'''
+    backend = STORAGE_BACKEND.get(os.path.splitext(ticket_file)[1].lower(), DEFAULT_BACKEND)
+    module_name, class_name = backend.rsplit('.', 1)
+    return getattr(importlib.import_module(module_name), class_name)
+
+def open_storage(ticket_file: str) -> StorageInterface:
+    '''Choose the storage by the file extension.'''
+    return get_storage_class(ticket_file)(ticket_file)
+
+def split_origin(changes: List[TicketChange], ticket_file: str) -> tuple:
+    '''Split the changes of the tickets of ticket_file from the others.
+
+    A ticket without an origin is of the storage that loaded it. One of
+    another workbook has ids that do not name the rows of ticket_file,
+    its changes cannot be saved into it.
+    '''
+    own, foreign = [], []
+    for change in changes:
+        if change.origin is None or os.path.abspath(change.origin) == os.path.abspath(ticket_file):
+            own.append(change)
+        else:
+            foreign.append(change)
+    return own, foreign
+
+def import_xlsx(ticket_file: str, db_file: str) -> int:
+    '''Copy the tickets of the workbook, with its journal, into the database.'''
+    all_ticket = open_storage(ticket_file).load()
+    sqlite_storage = open_storage(db_file)
+    sqlite_storage.insert(all_ticket)
+    sqlite_storage.close()
+    return len(all_ticket)
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3:
+        print('%d tickets imported.' % import_xlsx(sys.argv[1], sys.argv[2]))
+    else:
+        print('python storage.py ticket.xlsx ticket.db')
@@ -0,0 +1,39 @@
+'''
+Index:
+    TestTicketArchive
+'''
+
+import os
+import tempfile
+import unittest
+
+from archive import TicketArchive
+from ticket_db import TicketFormat
+
+class TestTicketArchive(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.archive = TicketArchive(os.path.join(self.work_dir.name, 'ticket.xlsx'))
+        self.done = [TicketFormat('bug_%d' % i, 'd', 'Joseph', 'Done', 'Cooper', 'Bug', i)
+                     for i in range(3)]
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def test_partitions(self):
+        self.assertEqual(self.archive.load(), {})
+        self.archive.add(self.done[:1], '2026-01')
+        self.archive.add(self.done[1:2], '2026-02')
+        self.archive.add(self.done[2:], '2026-01')
+        self.assertEqual(self.archive.months(), ['2026-01', '2026-02'])
+        loaded = self.archive.load()
+        self.assertEqual([ticket.ticket_id for ticket in loaded['2026-01']], [0, 2])
+        self.assertEqual(loaded['2026-02'][0].to_row(), self.done[1].to_row())
+        self.assertEqual([ticket.ticket_id for ticket in
+                          TicketArchive.iter_open(self.archive.open())], [0, 2, 1])
+
+        self.archive.store('2026-01', [])
+        self.assertEqual(self.archive.months(), ['2026-02'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,256 @@
+'''
+Index:
+    TestBatchRunner
+'''
+
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import tempfile
+import unittest
+
+from batch import BatchRunner, read_operations, run_operation
+from change_feed import ChangeFeed, PendingFeed
+from sqlite_storage import SqliteStorage
+from ticket_db import TicketFormat
+from ticket_store import TicketStore
+
+class TestBatchRunner(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.storage = SqliteStorage(os.path.join(self.work_dir.name, 'ticket.db'))
+        self.storage.insert([
+            TicketFormat('bug_1', 'd1', 'Joseph', 'Waiting', 'Cooper', 'Bug'),
+            TicketFormat('bug_2', 'd2', 'Amy', 'Waiting', 'Cooper', 'Bug'),
+        ])
+
+    def tearDown(self):
+        self.storage.close()
+        self.work_dir.cleanup()
+
+    def test_run(self):
+        results = BatchRunner(self.storage).run([
+            {'user': 'Cooper', 'identity': 'QA', 'op': 'C', 'title': 'bug_3',
+             'description': 'd3', 'assign_to': 'Joseph'},
+            {'user': 'Cooper', 'identity': 'QA', 'op': 'D', 'title': 'bug_1'},
+            {'user': 'Joseph', 'identity': 'RD', 'op': 'U', 'title': 'bug_1', 'status': 'Done'},
+            {'user': 'Joseph', 'identity': 'RD', 'op': 'U', 'title': 'bug_3', 'description': 'x'},
+            {'user': 'Joseph', 'identity': 'RD', 'op': 'U', 'title': 'bug_2', 'status': 'Done'},
+            {'user': 'Joseph', 'identity': 'RD', 'op': 'R'},
+            {'user': 'Boss', 'identity': 'CEO', 'op': 'R'},
+        ])
+
+        self.assertEqual([result['ok'] for result in results],
+                         [True, False, True, False, False, True, False])
+        self.assertEqual(results[1]['error'], 'AuthorizeationError.NoAuthorization')
+        self.assertEqual(results[4]['error'], 'InputError.NoSuchOption')
+        self.assertEqual([row[0] for row in results[5]['tickets']], ['bug_3'])
+        self.assertEqual(results[0]['message'], 'bug_3 has been created.\n'
+                                                'The email did not send to Joseph')
+
+        saved = {ticket.title: ticket for ticket in self.storage.load()}
+        self.assertEqual(saved['bug_1'].status, 'Done')
+        self.assertEqual(saved['bug_3'].description, 'd3')
+        self.assertEqual(saved['bug_3'].submitter, 'Cooper')
+
+    def test_by_id(self):
+        self.storage.insert([TicketFormat('bug_1', 'd3', 'Amy', 'Waiting', 'Cooper', 'Bug')])
+        results = BatchRunner(self.storage).run([
+            {'user': 'Amy', 'identity': 'PM', 'op': 'U', 'id': '3', 'description': 'x'},
+            {'user': 'Amy', 'identity': 'PM', 'op': 'D', 'id': '9'},
+        ])
+        self.assertEqual([result['ok'] for result in results], [True, False])
+        saved = self.storage.load()
+        self.assertEqual([ticket.description for ticket in saved], ['d1', 'd2', 'x'])
+
+    def test_search(self):
+        results = BatchRunner(self.storage).run([
+            {'user': 'Amy', 'identity': 'PM', 'op': 'C', 'title': 'crash_3',
+             'description': 'login', 'assign_to': 'Amy'},
+            {'user': 'Amy', 'identity': 'PM', 'op': 'S', 'query': 'bug'},
+            {'user': 'Joseph', 'identity': 'RD', 'op': 'S', 'query': 'bug'},
+            {'user': 'Joseph', 'identity': 'RD', 'op': 'S', 'query': 'cra'},
+            {'user': 'Amy', 'identity': 'PM', 'op': 'S', 'query': 'crash log', 'limit': 1},
+            {'user': 'Amy', 'identity': 'PM', 'op': 'S'},
+            {'user': 'Amy', 'identity': 'PM', 'op': 'S', 'query': 'bug', 'limit': 0},
+            {'user': 'Amy', 'identity': 'PM', 'op': 'S', 'query': 'bug', 'limit': 'z'},
+        ])
+        self.assertEqual([result['ok'] for result in results], [True] * 5 + [False] * 3)
+        self.assertEqual(results[-1]['error'], 'InputError.NoSuchOption')
+        self.assertEqual([len(result['tickets']) for result in results[1:5]], [2, 1, 0, 1])
+        self.assertEqual(results[2]['tickets'][0][0], 'bug_1')
+        self.assertEqual(results[4]['tickets'][0][0], 'crash_3')
+
+    def test_report(self):
+        results = BatchRunner(self.storage).run([
+            {'user': 'Amy', 'identity': 'PM', 'op': 'P', 'group_by': 'assign_to'},
+            {'user': 'Amy', 'identity': 'PM', 'op': 'U', 'title': 'bug_2', 'status': 'Done'},
+            {'user': 'Amy', 'identity': 'PM', 'op': 'P', 'group_by': ['status']},
+            {'user': 'Joseph', 'identity': 'RD', 'op': 'P', 'group_by': 'assign_to,status'},
+            {'user': 'Amy', 'identity': 'PM', 'op': 'P', 'group_by': 'title'},
+        ])
+        self.assertEqual([result['ok'] for result in results], [True] * 4 + [False])
+        self.assertEqual(results[0]['groups'], [{'assign_to': 'Amy', 'count': 1},
+                                                {'assign_to': 'Joseph', 'count': 1}])
+        self.assertEqual(results[2]['groups'], [{'status': 'Done', 'count': 1},
+                                                {'status': 'Waiting', 'count': 1}])
+        self.assertEqual(results[3]['groups'],
+                         [{'assign_to': 'Joseph', 'status': 'Waiting', 'count': 1}])
+
+    def test_change_feed(self):
+        change_feed = ChangeFeed(os.path.join(self.work_dir.name, 'ticket.db.feed'))
+        BatchRunner(self.storage, change_feed).run([
+            {'user': 'Cooper', 'identity': 'QA', 'op': 'C', 'title': 'bug_3',
+             'description': 'd3', 'assign_to': 'Joseph'},
+            {'user': 'Cooper', 'identity': 'QA', 'op': 'D', 'title': 'bug_1'},
+            {'user': 'Joseph', 'identity': 'RD', 'op': 'U', 'title': 'bug_1', 'status': 'Done'},
+            {'user': 'Joseph', 'identity': 'RD', 'op': 'R'},
+            {'user': 'Amy', 'identity': 'PM', 'op': 'U', 'title': 'bug_3', 'description': 'x'},
+            {'user': 'Amy', 'identity': 'PM', 'op': 'D', 'id': '2'},
+            # nothing of it is saved
+            {'user': 'Amy', 'identity': 'PM', 'op': 'C', 'title': 'bug_5',
+             'description': 'd5', 'assign_to': 'Amy'},
+            {'user': 'Amy', 'identity': 'PM', 'op': 'D', 'title': 'bug_5'},
+        ])
+        events = [event for _, event in change_feed.read()]
+        # the created ticket is published with the id it was saved with
+        self.assertEqual([(event['op'], event['user'], event['id']) for event in events],
+                         [('C', 'Cooper', 3), ('U', 'Joseph', 1), ('U', 'Amy', 3),
+                          ('D', 'Amy', 2)])
+        self.assertEqual(events[0]['after']['title'], 'bug_3')
+        self.assertIsNone(events[0]['before'])
+        self.assertEqual((events[1]['before']['status'], events[1]['after']['status']),
+                         ('Waiting', 'Done'))
+        self.assertEqual(events[3]['before']['title'], 'bug_2')
+        self.assertIsNone(events[3]['after'])
+
+    def test_bulk(self):
+        self.storage.insert([TicketFormat('bug_3', 'd3', 'Joseph', 'Waiting', 'Tom', 'NewFeature'),
+                             TicketFormat('bug_4', 'd4', 'Joseph', 'Done', 'Tom', 'Bug')])
+        waiting = {'assign_to': 'Joseph', 'status': 'Waiting'}
+        results = BatchRunner(self.storage).run([
+            {'user': 'Joseph', 'identity': 'RD', 'op': 'BU', 'filter': waiting,
+             'set': {'status': 'Done'}, 'dry_run': True},
+            {'user': 'Joseph', 'identity': 'RD', 'op': 'BU', 'filter': waiting,
+             'set': {'description': 'x'}},
+            {'user': 'Joseph', 'identity': 'RD', 'op': 'BU', 'filter': {},
+             'set': {'status': 'Done'}},
+            {'user': 'Joseph', 'identity': 'RD', 'op': 'BU', 'filter': json.dumps(waiting),
+             'set': '{"status": "Done"}'},
+            {'user': 'Joseph', 'identity': 'RD', 'op': 'BD', 'filter': {'status': 'Done'}},
+            {'user': 'Amy', 'identity': 'PM', 'op': 'BD',
+             'filter': {'status': 'Done', 'ticket_type': 'NewFeature'}, 'dry_run': 'Y'},
+            {'user': 'Amy', 'identity': 'PM', 'op': 'BD',
+             'filter': {'status': 'Done', 'ticket_type': 'NewFeature'}},
+        ])
+        self.assertEqual([result['ok'] for result in results],
+                         [True, False, False, True, False, True, True])
+        self.assertEqual(results[1]['error'], 'AuthorizeationError.NoAuthorization')
+        self.assertEqual(results[0]['message'], '2 tickets would be updated.')
+        self.assertEqual([row[0] for row in results[3]['tickets']], ['bug_1', 'bug_3'])
+        # one mail for each submitter
+        self.assertEqual(results[3]['message'].splitlines(),
+                         ['2 tickets have been updated.',
+                          'The email did not send to Cooper',
+                          'The email did not send to Tom'])
+        self.assertEqual([row[0] for row in results[6]['tickets']], ['bug_3'])
+
+        saved = {ticket.title: ticket for ticket in self.storage.load()}
+        self.assertEqual(sorted(saved), ['bug_1', 'bug_2', 'bug_4'])
+        self.assertEqual(saved['bug_1'].status, 'Done')
+        self.assertEqual(saved['bug_2'].status, 'Waiting')
+
+    def test_threads(self):
+        # handlers of a thread pool sharing one store
+        change_feed = ChangeFeed(os.path.join(self.work_dir.name, 'ticket.db.feed'))
+        ticket_store = TicketStore(self.storage.load())
+        operations = []
+        for number in range(3, 43):
+            operations.append({'user': 'Cooper', 'identity': 'QA', 'op': 'C',
+                               'title': 'bug_%d' % number, 'description': 'd',
+                               'assign_to': 'Joseph'})
+            operations.append({'user': 'Joseph', 'identity': 'RD', 'op': 'R'})
+            operations.append({'user': 'Amy', 'identity': 'PM', 'op': 'U', 'id': '1',
+                               'description': 'x%d' % number})
+        pending_feed = PendingFeed(change_feed)
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(lambda operation: run_operation(
+                ticket_store, operation, pending_feed), operations))
+        self.assertEqual(list(change_feed.read()), []) # not saved yet
+        changes = ticket_store.get_changes()
+        pending_feed.publish(changes, self.storage.save(ticket_store.all_ticket, changes))
+
+        self.assertTrue(all(result['ok'] for result in results))
+        # each operation got its own messages
+        for operation, result in zip(operations[::3], results[::3]):
+            self.assertEqual(result['message'].splitlines()[0],
+                             '%s has been created.' % operation['title'])
+        self.assertEqual(len(ticket_store.all_ticket), 42)
+        # each read saw the tickets of Joseph as they were after some create
+        joseph = [ticket.title for ticket in ticket_store.all_ticket
+                  if ticket.assign_to == 'Joseph']
+        for result in results[1::3]:
+            seen = [row[0] for row in result['tickets']]
+            self.assertEqual(seen, joseph[:len(seen)])
+        events = [event for _, event in change_feed.read()]
+        self.assertEqual(len(events), 80)
+        # the feed is in the order applied, the last update is the description kept
+        updates = [event for event in events if event['op'] == 'U']
+        self.assertEqual(updates[-1]['after']['description'],
+                         ticket_store.find_id(1)[0].description)
+        for before, after in zip(updates, updates[1:]):
+            self.assertEqual(before['after']['description'], after['before']['description'])
+
+    def test_malformed(self):
+        results = BatchRunner(self.storage).run([
+            {'user': 'Amy', 'identity': 'PM', 'op': 'R', 'page_size': 'abc'},
+            {'user': 'Amy', 'identity': 'PM', 'op': 'S', 'query': 'bug', 'limit': 'z'},
+            {'user': 'Amy', 'identity': 'PM', 'op': 'BU', 'filter': {'status': [['x']]},
+             'set': {'status': 'Done'}},
+            {'user': 'Amy', 'identity': 'PM', 'op': 'BD', 'filter': {'title': {'a': 1}}},
+            {'user': 'Amy', 'identity': 'PM', 'op': 'U', 'title': 'bug_1', 'status': 'Done'},
+        ])
+        self.assertEqual([result['ok'] for result in results], [False] * 4 + [True])
+        self.assertTrue(all(result['error'] for result in results[:4]))
+        self.assertEqual(results[0]['error'], 'InputError.NoSuchOption')
+        # the operations after a malformed one are saved
+        saved = {ticket.title: ticket for ticket in self.storage.load()}
+        self.assertEqual(saved['bug_1'].status, 'Done')
+
+    def test_page(self):
+        reads = [{'user': 'Amy', 'identity': 'PM', 'op': 'R', 'offset': offset,
+                  'page_size': page_size}
+                 for offset, page_size in ((1, 1), ('0', '5'), (None, None), (-1, 1),
+                                           (0, 0), (0, -2), ('1.5', 1), (0, True))]
+        results = BatchRunner(self.storage).run(reads)
+        self.assertEqual([result['ok'] for result in results], [True] * 3 + [False] * 5)
+        self.assertEqual([len(result['tickets']) for result in results[:3]], [1, 2, 2])
+        self.assertEqual({result['error'] for result in results[3:]},
+                         {'InputError.NoSuchOption'})
+
+    def test_read_csv(self):
+        batch_file = os.path.join(self.work_dir.name, 'operations.csv')
+        with open(batch_file, 'w', newline='', encoding='utf-8') as operations:
+            operations.write('user,identity,op,title,status,send_mail\n'
+                             'Joseph,RD,U,bug_1,Done,Y\n'
+                             'Amy,PM,R,,,\n')
+        self.assertEqual(list(read_operations(batch_file)),
+                         [{'user': 'Joseph', 'identity': 'RD', 'op': 'U',
+                           'title': 'bug_1', 'status': 'Done', 'send_mail': True},
+                          {'user': 'Amy', 'identity': 'PM', 'op': 'R'}])
+
+    def test_malformed_line(self):
+        batch_file = os.path.join(self.work_dir.name, 'operations.jsonl')
+        with open(batch_file, 'w', encoding='utf-8') as operations:
+            operations.write('{"user": "Cooper", "identity": "QA", "op": "C", "title": "bug_3", '
+                             '"description": "d3", "assign_to": "Joseph"}\n'
+                             'not json\n'
+                             '[1, 2]\n')
+        results = BatchRunner(self.storage).run(read_operations(batch_file))
+        self.assertEqual([(result['line'], result['ok']) for result in results],
+                         [(1, True), (2, False), (3, False)])
+        self.assertEqual(results[1]['error'], 'InputError.NoSuchOperation')
+        self.assertIn('bug_3', [ticket.title for ticket in self.storage.load()])
+
+if __name__ == '__main__':
+    unittest.main()
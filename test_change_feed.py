@@ -0,0 +1,136 @@
+'''
+Index:
+    TestChangeFeed
+    TestPendingFeed
+    TestFeedConsumer
+'''
+
+import os
+import tempfile
+import unittest
+
+from change_feed import ChangeFeed, FeedConsumer, PendingFeed
+from ticket_db import TicketFormat
+from ticket_journal import TicketChange
+from ticket_store import TicketStore
+
+def make_change(number: int) -> TicketChange:
+    return TicketChange('U',
+                        ('bug_%d' % number, 'd', 'Joseph', 'Waiting', 'Cooper', 'Bug'),
+                        ('bug_%d' % number, 'd', 'Joseph', 'Done', 'Cooper', 'Bug'),
+                        ticket_id=number)
+
+class TestChangeFeed(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.feed_dir = os.path.join(self.work_dir.name, 'ticket.xlsx' + ChangeFeed.SUFFIX)
+        self.change_feed = ChangeFeed(self.feed_dir, segment_bytes=1000)
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def test_publish_read(self):
+        self.assertEqual(list(self.change_feed.read()), [])
+        end = self.change_feed.publish([make_change(1), make_change(2)], 'Joseph', 'RD')
+        self.assertEqual(end, self.change_feed.end())
+        events = list(self.change_feed.read())
+        self.assertEqual([event['id'] for _, event in events], [1, 2])
+        self.assertEqual(events[0][1]['before']['status'], 'Waiting')
+        self.assertEqual(events[0][1]['after']['status'], 'Done')
+        self.assertEqual((events[0][1]['user'], events[0][1]['identity']), ('Joseph', 'RD'))
+        self.assertEqual(events[-1][0], end)
+        # from the offset after the first event
+        self.assertEqual([event['id'] for _, event in self.change_feed.read(events[0][0])], [2])
+
+    def test_rotate_trim(self):
+        for number in range(20):
+            self.change_feed.publish([make_change(number)], 'Joseph', 'RD')
+        segments = self.change_feed.segments()
+        self.assertGreater(len(segments), 2)
+        events = list(self.change_feed.read())
+        self.assertEqual([event['id'] for _, event in events], list(range(20)))
+        offset = events[10][0]
+        self.assertEqual([event['id'] for _, event in self.change_feed.read(offset)],
+                         list(range(11, 20)))
+
+        dropped = self.change_feed.trim(offset)
+        self.assertEqual(len(self.change_feed.segments()), len(segments) - dropped)
+        self.assertGreater(dropped, 0)
+        self.assertEqual([event['id'] for _, event in self.change_feed.read(offset)],
+                         list(range(11, 20)))
+
+    def test_partial_line(self):
+        end = self.change_feed.publish([make_change(1)], 'Joseph', 'RD')
+        segment = os.path.join(self.feed_dir, os.listdir(self.feed_dir)[0])
+        with open(segment, 'ab') as content:
+            content.write(b'{"op": "U"')
+        self.assertEqual([offset for offset, _ in self.change_feed.read()], [end])
+
+class TestPendingFeed(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.change_feed = ChangeFeed(os.path.join(self.work_dir.name, 'ticket.xlsx.feed'))
+        self.pending_feed = PendingFeed(self.change_feed)
+        self.all_ticket = [TicketFormat('bug_1', 'd', 'Joseph', 'Waiting', 'Cooper', 'Bug', 1),
+                           TicketFormat('bug_2', 'd', 'Joseph', 'Waiting', 'Cooper', 'Bug', 2)]
+        self.ticket_store = TicketStore(self.all_ticket)
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def __commit(self, user_name: str, edit) -> None:
+        with self.ticket_store.recording() as committed:
+            with self.ticket_store.transaction() as transaction:
+                edit(transaction)
+        self.pending_feed.add(committed, user_name, 'PM')
+
+    def test_publish_saved(self):
+        created = TicketFormat('bug_3', 'd', 'Amy', 'Waiting', 'Cooper', 'Bug')
+        self.__commit('Amy', lambda transaction: transaction.create(created))
+        self.__commit('Amy', lambda transaction: setattr(transaction.edit(created), 'status', 'Done'))
+        self.__commit('Tom', lambda transaction: setattr(
+            transaction.edit(self.all_ticket[0]), 'status', 'Done'))
+        self.__commit('Tom', lambda transaction: transaction.delete(self.all_ticket[1]))
+        self.assertEqual(list(self.change_feed.read()), [])
+
+        changes = self.ticket_store.get_changes()
+        # as a storage does: bug_1 in conflict, bug_3 saved with id 7
+        conflicts = [change for change in changes if change.ticket is self.all_ticket[0]]
+        next(change for change in changes if change.ticket is created).ticket_id = 7
+        self.assertEqual(self.pending_feed.publish(changes, conflicts), 3)
+        events = [event for _, event in self.change_feed.read()]
+        self.assertEqual([(event['op'], event['user'], event['id']) for event in events],
+                         [('C', 'Amy', 7), ('U', 'Amy', 7), ('D', 'Tom', 2)])
+        # published once
+        self.assertEqual(self.pending_feed.publish(changes, conflicts), 0)
+
+        self.assertEqual(self.ticket_store.search('bug_3'), [created])
+        self.ticket_store.assign_ids(changes)
+        self.assertEqual(self.ticket_store.find_id(7), [created])
+        self.assertEqual(self.ticket_store.search('bug_3'), [created])
+
+class TestFeedConsumer(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.change_feed = ChangeFeed(os.path.join(self.work_dir.name, 'ticket.xlsx.feed'),
+                                      segment_bytes=1000)
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def test_checkpoint(self):
+        consumer = FeedConsumer(self.change_feed, 'tracker')
+        self.assertEqual(consumer.poll(), [])
+        self.change_feed.publish([make_change(number) for number in range(3)], 'Amy', 'PM')
+        self.assertEqual([event['id'] for event in consumer.poll(2)], [0, 1])
+        consumer.commit()
+
+        # a new consumer resumes from the commit
+        consumer = FeedConsumer(self.change_feed, 'tracker')
+        self.change_feed.publish([make_change(3)], 'Amy', 'PM')
+        self.assertEqual([event['id'] for event in consumer.poll()], [2, 3])
+        self.assertEqual(consumer.poll(), [])
+        self.assertEqual(FeedConsumer(self.change_feed, 'dashboard').offset, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+'''
+Index:
+    TestFileLock
+'''
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from error_handler import TicketDBException
+from file_lock import FileLock
+from namespace import TicketDBError
+
+HOLD_LOCK = '''
+import sys, time
+sys.path.insert(0, %r)
+from file_lock import FileLock
+with FileLock(sys.argv[1], shared=sys.argv[2] == 'shared'):
+    print('locked', flush=True)
+    time.sleep(float(sys.argv[3]))
+'''
+
+class TestFileLock(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.ticket_file = os.path.join(self.work_dir.name, 'ticket.xlsx')
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def __hold(self, mode: str, seconds: float) -> subprocess.Popen:
+        '''Hold the lock in another process.'''
+        holder = subprocess.Popen([sys.executable, '-c',
+                                   HOLD_LOCK % os.path.dirname(os.path.abspath(__file__)),
+                                   self.ticket_file, mode, str(seconds)],
+                                  stdout=subprocess.PIPE, text=True)
+        self.assertEqual(holder.stdout.readline().strip(), 'locked')
+        return holder
+
+    def test_exclusive(self):
+        holder = self.__hold('exclusive', 5)
+        with self.assertRaises(TicketDBException) as error:
+            FileLock(self.ticket_file, timeout=0.1).acquire()
+        self.assertEqual(error.exception.error_type, TicketDBError.LockTimeout)
+        holder.kill()
+        holder.wait()
+        holder.stdout.close()
+        with FileLock(self.ticket_file, timeout=5):
+            pass
+
+    @unittest.skipIf(sys.platform == 'win32', 'shared locks need fcntl')
+    def test_shared(self):
+        holder = self.__hold('shared', 5)
+        with FileLock(self.ticket_file, shared=True, timeout=0.1):
+            pass
+        with self.assertRaises(TicketDBException):
+            FileLock(self.ticket_file, timeout=0.1).acquire()
+        holder.kill()
+        holder.wait()
+        holder.stdout.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+'''
+Index:
+    TestInstrument
+'''
+
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from instrument import count, counted, disable, enable, enable_from_env
+from instrument import finish, is_enabled, reset, summary, timed
+
+@timed('work')
+def _work(value: int) -> int:
+    count('items', value)
+    return value * 2
+
+class TestInstrument(unittest.TestCase):
+    def setUp(self):
+        reset()
+
+    def tearDown(self):
+        disable()
+        reset()
+
+    def test_disabled(self):
+        self.assertEqual(_work(3), 6)
+        self.assertEqual(list(counted('streamed', iter([1, 2]))), [1, 2])
+        self.assertEqual(summary(), {'timers': {}, 'counters': {}})
+
+    def test_enabled(self):
+        enable()
+        _work(3)
+        _work(4)
+        self.assertEqual(list(counted('streamed', iter([1, 2]))), [1, 2])
+        result = summary()
+        self.assertEqual(result['timers']['work']['calls'], 2)
+        self.assertEqual(result['counters'], {'items': 7, 'streamed': 2})
+
+    def test_json_and_profile(self):
+        with tempfile.TemporaryDirectory() as work_dir:
+            json_file = os.path.join(work_dir, 'timing.json')
+            profile_file = os.path.join(work_dir, 'session.prof')
+            enable_from_env({'TICKET_TIMING': json_file, 'TICKET_PROFILE': profile_file})
+            _work(1)
+            finish()
+            with open(json_file, encoding='utf-8') as output:
+                self.assertEqual(json.load(output)['timers']['work']['calls'], 1)
+            self.assertGreater(os.path.getsize(profile_file), 0)
+        self.assertFalse(is_enabled())
+
+    def test_disabled_overhead(self):
+        def plain(value: int) -> int:
+            return value * 2
+        wrapped = timed('plain')(plain)
+        calls = 100000
+        start = time.perf_counter()
+        for i in range(calls):
+            wrapped(i)
+        per_call = (time.perf_counter() - start) / calls
+        self.assertLess(per_call, 5e-6)
+        self.assertEqual(summary()['timers'], {})
+
+if __name__ == '__main__':
+    unittest.main()
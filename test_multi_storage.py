@@ -0,0 +1,103 @@
+'''
+Index:
+    TestMultiXlsxStorage
+'''
+
+import os
+import tempfile
+import unittest
+
+from batch import BatchRunner
+from multi_storage import ID_RANGE, MultiXlsxStorage
+from storage import open_storage
+from ticket_db import TicketFormat, WriteDB
+from ticket_store import TicketStore
+from xlsx_storage import XlsxStorage
+
+class TestMultiXlsxStorage(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.team_a = os.path.join(self.work_dir.name, 'team_a.xlsx')
+        self.team_b = os.path.join(self.work_dir.name, 'team_b.xlsx')
+        # the same title and ids in both workbooks
+        for ticket_file, assign_to in ((self.team_a, 'Joseph'), (self.team_b, 'Amy')):
+            WriteDB([TicketFormat('bug_%d' % i, 'd', assign_to, 'Waiting', 'Cooper', 'Bug')
+                     for i in range(3)]).fill_in(ticket_file)
+        self.list_file = os.path.join(self.work_dir.name, 'teams.workbooks')
+        with open(self.list_file, 'w', encoding='utf-8') as workbooks:
+            workbooks.write('# one workbook per team\nteam_a.xlsx\n\nteam_b.xlsx\n')
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def test_load(self):
+        storage = open_storage(self.list_file)
+        self.assertIsInstance(storage, MultiXlsxStorage)
+        all_ticket = MultiXlsxStorage(self.list_file, max_workers=2).load()
+        self.assertEqual([ticket.origin for ticket in all_ticket],
+                         [self.team_a] * 3 + [self.team_b] * 3)
+        self.assertEqual([ticket.assign_to for ticket in storage.stream()],
+                         ['Joseph'] * 3 + ['Amy'] * 3)
+
+        # the workers load each workbook with its journal
+        team_b = XlsxStorage(self.team_b)
+        ticket_store = TicketStore(team_b.load())
+        with ticket_store.transaction() as transaction:
+            transaction.edit(ticket_store.all_ticket[0]).status = 'Done'
+        self.assertEqual(team_b.save(ticket_store.all_ticket, ticket_store.get_changes()), [])
+        all_ticket = MultiXlsxStorage(self.list_file, max_workers=2).load()
+        self.assertEqual([ticket.status for ticket in all_ticket[3:]],
+                         ['Done', 'Waiting', 'Waiting'])
+
+    def test_save_other_workbook(self):
+        # a ticket of team a has id 1 too, its change must not hit bug_0 of team b
+        all_ticket = MultiXlsxStorage(self.list_file).load()[:3]
+        ticket_store = TicketStore(all_ticket)
+        with ticket_store.transaction() as transaction:
+            transaction.edit(all_ticket[0]).status = 'Done'
+        changes = ticket_store.get_changes()
+        self.assertEqual(XlsxStorage(self.team_b).save(all_ticket, changes), changes)
+        self.assertEqual({ticket.status for ticket in XlsxStorage(self.team_b).load()},
+                         {'Waiting'})
+
+    def test_save_to_origin(self):
+        storage = MultiXlsxStorage(self.list_file)
+        ticket_store = TicketStore(storage.load())
+        with ticket_store.transaction() as transaction:
+            ticket = transaction.edit(ticket_store.all_ticket[4]) # bug_1 of team b
+            ticket.status = 'Done'
+            transaction.delete(ticket_store.all_ticket[0])
+            transaction.create(TicketFormat('bug_9', 'd', 'Murphy', 'Waiting', 'Cooper', 'Bug'))
+        self.assertEqual(storage.save(ticket_store.all_ticket, ticket_store.get_changes()), [])
+
+        team_a = XlsxStorage(self.team_a).load()
+        team_b = XlsxStorage(self.team_b).load()
+        self.assertEqual([(ticket.title, ticket.ticket_id) for ticket in team_a],
+                         [('bug_1', 2), ('bug_2', 3), ('bug_9', 4)])
+        self.assertEqual([ticket.status for ticket in team_b], ['Waiting', 'Done', 'Waiting'])
+
+    def test_ids(self):
+        storage = MultiXlsxStorage(self.list_file)
+        all_ticket = storage.load()
+        self.assertEqual([ticket.ticket_id for ticket in all_ticket],
+                         [1, 2, 3, ID_RANGE + 1, ID_RANGE + 2, ID_RANGE + 3])
+        self.assertEqual([ticket.ticket_id for ticket in storage.stream()],
+                         [ticket.ticket_id for ticket in all_ticket])
+        ticket_store = TicketStore(all_ticket)
+        self.assertEqual(ticket_store.find_id(1), [all_ticket[0]])
+        self.assertEqual(ticket_store.find_id(ID_RANGE + 1), [all_ticket[3]])
+        self.assertEqual(ticket_store.search('bug_0'), [all_ticket[0], all_ticket[3]])
+
+        # a change by id goes to the ticket of its workbook
+        results = BatchRunner(storage).run([
+            {'user': 'Amy', 'identity': 'PM', 'op': 'U', 'id': str(ID_RANGE + 1),
+             'status': 'Done'},
+            {'user': 'Amy', 'identity': 'PM', 'op': 'D', 'id': '2'},
+        ])
+        self.assertEqual([result['ok'] for result in results], [True, True])
+        self.assertEqual([ticket.status for ticket in XlsxStorage(self.team_b).load()],
+                         ['Done', 'Waiting', 'Waiting'])
+        self.assertEqual([ticket.ticket_id for ticket in XlsxStorage(self.team_a).load()], [1, 3])
+
+if __name__ == '__main__':
+    unittest.main()
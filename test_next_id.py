@@ -0,0 +1,48 @@
+'''
+Index:
+    TestTicketNextId
+'''
+
+import os
+import tempfile
+import unittest
+
+from next_id import TicketNextId
+from ticket_db import NormalGetSheetColumn, ParseTicketDB, TicketFormat, WriteDB
+
+class TestTicketNextId(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.ticket_file = os.path.join(self.work_dir.name, 'ticket.xlsx')
+        self.all_ticket = [TicketFormat('bug_1', 'd1', 'Joseph', 'Waiting', 'Cooper', 'Bug'),
+                           TicketFormat('bug_1', 'd2', 'Amy', 'Done', 'Cooper', 'NewFeature', 7),
+                           TicketFormat('bug_3', 'd3', 'Amy', 'Done', 'Cooper', 'Bug')]
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def test_fill_in(self):
+        WriteDB(self.all_ticket).fill_in(self.ticket_file, next_id=3)
+        self.assertEqual([ticket.ticket_id for ticket in self.all_ticket], [8, 7, 9])
+        self.assertEqual(TicketNextId(self.ticket_file).load(), 10)
+
+        parsed = ParseTicketDB(self.ticket_file, NormalGetSheetColumn()).get_content()
+        self.assertEqual([ticket.ticket_id for ticket in parsed], [8, 7, 9])
+
+    def test_next_id_is_kept(self):
+        WriteDB(self.all_ticket).fill_in(self.ticket_file)
+        WriteDB(self.all_ticket[:1]).fill_in(self.ticket_file)
+        self.assertEqual(TicketNextId(self.ticket_file).load(), 10)
+
+        parser = ParseTicketDB(self.ticket_file, NormalGetSheetColumn())
+        parser.get_content()
+        self.assertEqual(parser.get_next_id(), 10)
+
+    def test_workbook_without_id(self):
+        parsed = ParseTicketDB(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ticket.xlsx'),
+                               NormalGetSheetColumn()).get_content()
+        self.assertEqual([ticket.ticket_id for ticket in parsed],
+                         list(range(1, len(parsed) + 1)))
+
+if __name__ == '__main__':
+    unittest.main()
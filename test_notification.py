@@ -0,0 +1,109 @@
+'''
+Index:
+    TestNotificationOutbox
+    TestOutboxWorker
+'''
+
+import socketserver
+import threading
+import unittest
+from typing import List
+
+from notification import NotificationOutbox, OutboxWorker
+from notification import SmtpTransport, TransportInterface
+
+class LocalSmtpServer(socketserver.ThreadingTCPServer):
+    '''Just enough SMTP to receive mails from smtplib.'''
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        self.received = []
+        super().__init__(('127.0.0.1', 0), LocalSmtpHandler)
+        self.port = self.server_address[1]
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+class LocalSmtpHandler(socketserver.StreamRequestHandler):
+    def __reply(self, line: str) -> None:
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self) -> None:
+        self.__reply('220 localhost')
+        while True:
+            command = self.rfile.readline().decode().strip()
+            verb = command[:4].upper()
+            if not command or verb == 'QUIT':
+                self.__reply('221 bye')
+                return
+            if verb == 'DATA':
+                self.__reply('354 go on')
+                data = []
+                while True:
+                    line = self.rfile.readline().decode()
+                    if line.rstrip('\r\n') == '.':
+                        break
+                    data.append(line)
+                self.server.received.append(''.join(data))
+            self.__reply('250 ok')
+
+class FailingTransport(TransportInterface):
+    def send(self, recipient: str, messages: List[str]) -> None:
+        raise ConnectionError('down')
+
+class TestNotificationOutbox(unittest.TestCase):
+    def test_coalesce(self):
+        outbox = NotificationOutbox()
+        outbox.put('Cooper', 'bug_1 has been updated.', 'bug_1')
+        outbox.put('Cooper', 'bug_1 has been updated again.', 'bug_1')
+        outbox.put('Cooper', 'bug_2 has been created.', 'bug_2')
+        outbox.put('Amy', 'bug_2 has been created.', 'bug_2')
+
+        due = outbox.take_due()
+        self.assertEqual([message for _, message in due['Cooper']],
+                         ['bug_1 has been updated again.', 'bug_2 has been created.'])
+        self.assertEqual(len(due['Amy']), 1)
+
+    def test_put_while_sending(self):
+        outbox = NotificationOutbox()
+        outbox.put('Cooper', 'bug_1 has been updated.', 'bug_1')
+        outbox.put('Cooper', 'bug_2 has been created.', 'bug_2')
+        mail_ids = [mail_id for mail_id, _ in outbox.take_due()['Cooper']]
+        outbox.put('Cooper', 'bug_1 has been updated again.', 'bug_1')
+        outbox.done(mail_ids)
+
+        due = outbox.take_due()
+        self.assertEqual([message for _, message in due['Cooper']],
+                         ['bug_1 has been updated again.'])
+
+    def test_retry(self):
+        outbox = NotificationOutbox()
+        outbox.put('Cooper', 'bug_1 has been updated.', 'bug_1')
+        worker = OutboxWorker(outbox, FailingTransport(), backoff=0, max_attempts=2)
+        self.assertEqual(worker.run_once(), 0)
+        self.assertEqual(outbox.count(), 1)
+        self.assertEqual(worker.run_once(), 0)
+        self.assertEqual(outbox.count(), 0)
+        self.assertEqual(outbox.count(failed=True), 1)
+
+class TestOutboxWorker(unittest.TestCase):
+    def test_deliver_by_smtp(self):
+        smtp_server = LocalSmtpServer()
+        outbox = NotificationOutbox()
+        for i in range(3):
+            outbox.put('Cooper', 'bug_%d has been updated.' % i, 'bug_%d' % i)
+        outbox.put('Amy', 'bug_9 has been created.', 'bug_9')
+
+        worker = OutboxWorker(outbox, SmtpTransport('127.0.0.1', smtp_server.port),
+                              interval=0.01)
+        worker.start()
+        worker.stop(timeout=10)
+        smtp_server.shutdown()
+        smtp_server.server_close()
+
+        self.assertEqual(outbox.count(), 0)
+        self.assertEqual(len(smtp_server.received), 2)
+        cooper_mail = [mail for mail in smtp_server.received if 'Cooper' in mail][0]
+        self.assertIn('3 ticket notifications', cooper_mail)
+
+if __name__ == '__main__':
+    unittest.main()
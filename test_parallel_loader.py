@@ -0,0 +1,18 @@
+'''
+Index:
+    TestParallelLoader
+'''
+
+import unittest
+
+from parallel_loader import run_parallel
+
+class TestParallelLoader(unittest.TestCase):
+    def test_run_parallel(self):
+        items = list(range(-5, 5))
+        for max_workers in (1, 2):
+            self.assertEqual(run_parallel(abs, items, max_workers), [abs(item) for item in items])
+        self.assertEqual(run_parallel(abs, [], 2), [])
+
+if __name__ == '__main__':
+    unittest.main()
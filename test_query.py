@@ -0,0 +1,51 @@
+'''
+Index:
+    TestQuery
+'''
+
+import unittest
+
+from error_handler import InputException
+from query import Eq, In, Query, from_condition, parse_filter
+from ticket_db import TicketFormat
+from ticket_index import TicketIndex
+
+class TestQuery(unittest.TestCase):
+    def setUp(self):
+        self.all_ticket = [
+            TicketFormat('bug_1', 'd1', 'Joseph', 'Waiting', 'Cooper', 'Bug'),
+            TicketFormat('bug_2', 'd2', 'Joseph', 'Done', 'Cooper', 'Bug'),
+            TicketFormat('feature_1', 'd3', 'Amy', 'Waiting', 'Tom', 'NewFeature'),
+            TicketFormat('bug_3', 'd4', 'Murphy', 'Waiting', 'Tom', 'Bug'),
+        ]
+        self.ticket_index = TicketIndex(self.all_ticket)
+
+    def __check(self, query: Query, expected: list) -> None:
+        expected = [self.all_ticket[i] for i in expected]
+        self.assertEqual(query.run(self.ticket_index), expected)
+        self.assertEqual(list(query.filter(self.all_ticket)), expected)
+
+    def test_from_condition(self):
+        condition = TicketFormat.Empty()
+        condition.assign_to = 'Joseph'
+        condition.status = 'Waiting'
+        self.__check(from_condition(condition), [0])
+        self.__check(from_condition(TicketFormat.Empty()), [0, 1, 2, 3])
+
+    def test_in_or(self):
+        self.__check(In('assign_to', ['Amy', 'Murphy']), [2, 3])
+        self.__check(Eq('status', 'Done') | Eq('ticket_type', 'NewFeature'), [1, 2])
+        self.__check(Eq('submitter', 'Tom') & Eq('ticket_type', 'Bug'), [3])
+
+    def test_parse_filter(self):
+        query = parse_filter({'status': 'Waiting',
+                              'or': [{'assign_to': 'Joseph'}, {'submitter': ['Tom']}]})
+        self.__check(query, [0, 2, 3])
+        with self.assertRaises(InputException):
+            parse_filter({'no_such_field': 1})
+        for bad_value in ([['Waiting']], {'in': 'Waiting'}, [{}]):
+            with self.assertRaises(InputException):
+                parse_filter({'status': bad_value})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+'''
+Index:
+    TestReadWriteLock
+'''
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import unittest
+
+from read_write_lock import ReadWriteLock
+
+class TestReadWriteLock(unittest.TestCase):
+    def setUp(self):
+        self.lock = ReadWriteLock()
+
+    def test_readers_together(self):
+        # every reader waits inside the lock for all the others
+        barrier = threading.Barrier(4, timeout=5)
+        def read() -> None:
+            with self.lock.read_locked():
+                barrier.wait()
+        with ThreadPoolExecutor(4) as executor:
+            for future in [executor.submit(read) for _ in range(4)]:
+                future.result()
+
+    def test_writer_alone(self):
+        inside = []
+        def write(number: int) -> None:
+            with self.lock.write_locked():
+                inside.append(number)
+                time.sleep(0.001)
+                self.assertEqual(inside, [number])
+                inside.remove(number)
+        with ThreadPoolExecutor(8) as executor:
+            for future in [executor.submit(write, number) for number in range(40)]:
+                future.result()
+
+    def test_waiting_writer_first(self):
+        order = []
+        def write() -> None:
+            with self.lock.write_locked():
+                order.append('write')
+        def read() -> None:
+            with self.lock.read_locked():
+                order.append('read')
+        self.lock.acquire_read()
+        writer = threading.Thread(target=write)
+        writer.start()
+        while not self.lock._ReadWriteLock__writers_waiting:
+            time.sleep(0.001)
+        reader = threading.Thread(target=read)
+        reader.start()
+        time.sleep(0.05)
+        self.assertEqual(order, [])
+        self.lock.release_read()
+        writer.join(5)
+        reader.join(5)
+        self.assertEqual(order, ['write', 'read'])
+
+    def test_reentrant(self):
+        with self.lock.write_locked():
+            with self.lock.write_locked(), self.lock.read_locked():
+                pass
+        with self.lock.read_locked():
+            with self.lock.read_locked():
+                with self.assertRaises(RuntimeError):
+                    self.lock.acquire_write()
+        # free again
+        done = threading.Event()
+        def write() -> None:
+            with self.lock.write_locked():
+                done.set()
+        threading.Thread(target=write).start()
+        self.assertTrue(done.wait(5))
+
+if __name__ == '__main__':
+    unittest.main()
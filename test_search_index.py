@@ -0,0 +1,87 @@
+'''
+Index:
+    TestTokenize
+    TestSearchIndex
+'''
+
+import os
+import tempfile
+import unittest
+
+from search_index import SearchIndex, tokenize
+from ticket_db import TicketFormat
+
+class TestTokenize(unittest.TestCase):
+    def test_tokenize(self):
+        self.assertEqual(tokenize('Login_page CRASH, after 2 clicks!'),
+                         ['login', 'page', 'crash', 'after', '2', 'clicks'])
+        self.assertEqual(tokenize('Überweisung fällt aus'), ['überweisung', 'fällt', 'aus'])
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tickets = {1: TicketFormat('login crash', 'the page is blank'),
+                        2: TicketFormat('slow report', 'login takes a minute'),
+                        3: TicketFormat('export crash', 'crash when the sheet is big'),
+                        4: TicketFormat('layout', 'button is missing')}
+        self.search_index = SearchIndex()
+        self.search_index.sync(self.tickets.items())
+
+    def test_search(self):
+        self.assertEqual(self.search_index.search('crash'), [3, 1])
+        self.assertEqual(self.search_index.search('login crash'), [1])
+        self.assertEqual(self.search_index.search('LOGIN'), [1, 2])
+        self.assertEqual(self.search_index.search('zzz'), [])
+        self.assertEqual(self.search_index.search(''), [])
+        self.assertEqual(self.search_index.search('crash', limit=1), [3])
+        self.assertEqual(self.search_index.search('crash', keep={1, 2}), [1])
+
+    def test_prefix(self):
+        self.assertEqual(self.search_index.search('expo'), [3])
+        self.assertEqual(self.search_index.search('cras* page'), [1])
+        # only the last word is a prefix without *
+        self.assertEqual(self.search_index.search('cras page'), [])
+
+    def test_update(self):
+        self.search_index.add(4, TicketFormat('layout crash', 'button is missing'))
+        self.search_index.add(5, TicketFormat('new', 'crash'))
+        self.search_index.remove(3)
+        # equal scores keep the order of indexing
+        self.assertEqual(self.search_index.search('crash'), [1, 4, 5])
+        self.assertEqual(self.search_index.search('button'), [4])
+        self.assertEqual(len(self.search_index), 4)
+
+    def test_sync(self):
+        self.tickets[2] = TicketFormat('slow report', 'export takes a minute')
+        del self.tickets[4]
+        self.assertEqual(self.search_index.sync(self.tickets.items()), 1)
+        self.assertEqual(self.search_index.search('export'), [3, 2])
+        self.assertEqual(self.search_index.search('layout'), [])
+
+    def test_compact(self):
+        for key in range(10, 3010):
+            self.search_index.add(key, TicketFormat('ticket %d' % key, 'crash'))
+        for key in range(10, 2010):
+            self.search_index.remove(key)
+        self.assertEqual(self.search_index.search('3000'), [3000])
+        self.assertEqual(len(self.search_index.search('ticket')), 1000)
+
+    def test_save_load(self):
+        self.search_index.add(('new', 1), TicketFormat('unsaved crash'))
+        self.search_index.remove(4)
+        with tempfile.TemporaryDirectory() as work_dir:
+            index_file = os.path.join(work_dir, 'ticket.xlsx' + SearchIndex.SUFFIX)
+            self.search_index.save(index_file)
+            self.assertFalse(self.search_index.changed)
+            loaded = SearchIndex.load(index_file)
+        # the tickets without an id are not saved
+        self.assertEqual(loaded.search('crash'), [3, 1])
+        self.assertEqual(loaded.search('cr'), [3, 1])
+        self.assertEqual(len(loaded), 3)
+        self.assertEqual(loaded.sync(self.tickets.items()), 1)
+        self.assertEqual(loaded.search('layout'), [4])
+
+    def test_load_missing(self):
+        self.assertEqual(len(SearchIndex.load('no_such_file.search')), 0)
+
+if __name__ == '__main__':
+    unittest.main()
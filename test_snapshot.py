@@ -0,0 +1,58 @@
+'''
+Index:
+    TestTicketSnapshot
+'''
+
+import os
+import tempfile
+import unittest
+
+from snapshot import TicketSnapshot
+from ticket_db import TicketFormat, WriteDB
+
+class TestTicketSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.ticket_file = os.path.join(self.work_dir.name, 'ticket.xlsx')
+        self.all_ticket = [TicketFormat('bug_1', 'd1', 'Joseph', 'Waiting', 'Cooper', 'Bug'),
+                           TicketFormat('bug_2', 'd2', 'Amy', 'Done', 'Cooper', 'NewFeature')]
+        WriteDB(self.all_ticket).fill_in(self.ticket_file)
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def test_load(self):
+        snapshot = TicketSnapshot(self.ticket_file)
+        self.assertIsNone(snapshot.load())
+        snapshot.store(self.all_ticket)
+        loaded = snapshot.load()
+        self.assertEqual([ticket.to_row() for ticket in loaded],
+                         [ticket.to_row() for ticket in self.all_ticket])
+        self.assertIs(loaded[0].submitter, loaded[1].submitter)
+
+    def test_invalidate(self):
+        snapshot = TicketSnapshot(self.ticket_file)
+        snapshot.store(self.all_ticket)
+        WriteDB(self.all_ticket[:1]).fill_in(self.ticket_file)
+        self.assertIsNone(snapshot.load())
+
+    def test_same_stat_other_content(self):
+        snapshot = TicketSnapshot(self.ticket_file)
+        snapshot.store(self.all_ticket)
+        stat = os.stat(self.ticket_file)
+        with open(self.ticket_file, 'r+b') as workbook:
+            workbook.seek(-1, os.SEEK_END)
+            last = workbook.read(1)
+            workbook.seek(-1, os.SEEK_END)
+            workbook.write(bytes([last[0] ^ 0xFF]))
+        os.utime(self.ticket_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertIsNone(snapshot.load())
+
+    def test_broken_snapshot(self):
+        snapshot = TicketSnapshot(self.ticket_file)
+        with open(snapshot.snapshot_file, 'wb') as broken:
+            broken.write(b'not a snapshot')
+        self.assertIsNone(snapshot.load())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+'''
+Index:
+    TestSqliteStorage
+'''
+
+import os
+import tempfile
+import unittest
+
+from sqlite_storage import SqliteStorage
+from ticket_db import TicketFormat
+from ticket_journal import TicketChange
+
+class TestSqliteStorage(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.storage = SqliteStorage(os.path.join(self.work_dir.name, 'ticket.db'))
+        self.storage.insert([
+            TicketFormat('bug_1', 'd1', 'Joseph', 'Waiting', 'Cooper', 'Bug'),
+            TicketFormat('bug_2', 'd2', 'Joseph', 'Done', 'Cooper', 'Bug'),
+            TicketFormat('feature_1', 'd3', 'Amy', 'Waiting', 'Tom', 'NewFeature'),
+        ])
+
+    def tearDown(self):
+        self.storage.close()
+        self.work_dir.cleanup()
+
+    def test_load_with_condition(self):
+        read_condition = TicketFormat.Empty()
+        read_condition.assign_to = 'Joseph'
+        read_condition.status = 'Waiting'
+        result = self.storage.load(read_condition)
+        self.assertEqual([ticket.title for ticket in result], ['bug_1'])
+        self.assertEqual(len(self.storage.load()), 3)
+
+    def test_save(self):
+        changes = [
+            TicketChange('U', ('bug_1', 'd1', 'Joseph', 'Waiting', 'Cooper', 'Bug'),
+                              ('bug_1', 'd1', 'Joseph', 'Done', 'Cooper', 'Bug')),
+            TicketChange('D', before=('bug_2', 'd2', 'Joseph', 'Done', 'Cooper', 'Bug')),
+            TicketChange('C', after=('bug_3', 'd4', 'Amy', 'Waiting', 'Cooper', 'Bug')),
+        ]
+        self.storage.save([], changes)
+        result = self.storage.load()
+        self.assertEqual([ticket.to_row() for ticket in result],
+                         [('bug_1', 'd1', 'Joseph', 'Done', 'Cooper', 'Bug'),
+                          ('feature_1', 'd3', 'Amy', 'Waiting', 'Tom', 'NewFeature'),
+                          ('bug_3', 'd4', 'Amy', 'Waiting', 'Cooper', 'Bug')])
+
+    def test_save_by_id(self):
+        self.storage.insert([TicketFormat('bug_1', 'd1', 'Joseph', 'Waiting', 'Cooper', 'Bug')])
+        row = ('bug_1', 'd1', 'Joseph', 'Waiting', 'Cooper', 'Bug')
+        self.assertEqual(self.storage.save([], [
+            TicketChange('U', row, ('bug_1', 'd1', 'Joseph', 'Done', 'Cooper', 'Bug'), 4),
+            TicketChange('D', before=('bug_2', 'd2', 'Joseph', 'Done', 'Cooper', 'Bug'),
+                         ticket_id=2)]), [])
+        self.storage.save([], [TicketChange('C', after=row)])
+        result = self.storage.load()
+        self.assertEqual([(ticket.ticket_id, ticket.status) for ticket in result],
+                         [(1, 'Waiting'), (3, 'Waiting'), (4, 'Done'), (5, 'Waiting')])
+
+    def test_save_conflict(self):
+        theirs = TicketChange('U', ('bug_1', 'd1', 'Joseph', 'Waiting', 'Cooper', 'Bug'),
+                                   ('bug_1', 'theirs', 'Joseph', 'Waiting', 'Cooper', 'Bug'))
+        self.assertEqual(self.storage.save([], [theirs]), [])
+        mine = [TicketChange('U', ('bug_1', 'd1', 'Joseph', 'Waiting', 'Cooper', 'Bug'),
+                                  ('bug_1', 'd1', 'Joseph', 'Done', 'Cooper', 'Bug')),
+                TicketChange('U', ('bug_1', 'd1', 'Joseph', 'Waiting', 'Cooper', 'Bug'),
+                                  ('bug_1', 'mine', 'Joseph', 'Waiting', 'Cooper', 'Bug')),
+                TicketChange('D', before=('bug_9', 'd', 'a', 'Done', 's', 'Bug'))]
+        self.assertEqual(self.storage.save([], mine), [mine[1]])
+        self.assertEqual(self.storage.load()[0].to_row(),
+                         ('bug_1', 'theirs', 'Joseph', 'Done', 'Cooper', 'Bug'))
+
+if __name__ == '__main__':
+    unittest.main()
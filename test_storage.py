@@ -0,0 +1,34 @@
+'''
+Index:
+    TestOpenStorage
+'''
+
+import os
+import subprocess
+import sys
+import unittest
+
+from sqlite_storage import SqliteStorage
+from storage import open_storage
+from xlsx_storage import XlsxStorage
+
+class TestOpenStorage(unittest.TestCase):
+    def test_open_storage(self):
+        self.assertIsInstance(open_storage('ticket.db'), SqliteStorage)
+        self.assertIsInstance(open_storage('ticket.xlsx'), XlsxStorage)
+
+    def test_lazy_backend(self):
+        # a fresh interpreter, this one has imported every backend already
+        loaded = subprocess.run(
+            [sys.executable, '-c',
+             'import sys, storage; storage.open_storage("ticket.db"); '
+             'print(" ".join(sorted(sys.modules)))'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True).stdout.split()
+        self.assertIn('sqlite_storage', loaded)
+        self.assertNotIn('xlsx_storage', loaded)
+        self.assertNotIn('openpyxl', loaded)
+        self.assertNotIn('xlrd', loaded)
+
+if __name__ == '__main__':
+    unittest.main()
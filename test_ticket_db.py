@@ -0,0 +1,189 @@
+'''
+Index:
+    TestParseTicketDB_
+    TestParseReport
+    TestTicketFormat
+    TestStreamParseTicketDB
+'''
+
+import os
+import tempfile
+import tracemalloc
+import unittest
+
+from openpyxl import Workbook
+
+from error_handler import TicketDBException
+from namespace import TicketDBError, TicketType
+from ticket_db import NormalGetSheetColumn, ParseError, ParseTicketDB, StreamParseTicketDB
+from ticket_db import TestGetSheetColumn, TicketFormat
+
+TICKET_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ticket.xlsx')
+
+class TestParseTicketDB_(unittest.TestCase):
+    def test_normal_prase_ticket_db(self):
+        get_sheet_column_interface = NormalGetSheetColumn()
+        parse_ticket_db = ParseTicketDB(TICKET_FILE, get_sheet_column_interface)
+
+        result = parse_ticket_db.get_column()
+        self.assertEqual(result.title, 0)
+
+    def test_parse_ticket_basic(self):
+        get_sheet_column_interface = TestGetSheetColumn()
+        parse_ticket_db = ParseTicketDB(TICKET_FILE, get_sheet_column_interface)
+
+        result = parse_ticket_db.get_column()
+        self.assertEqual(result.title, 0)
+
+class TestParseReport(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.ticket_file = os.path.join(self.work_dir.name, 'ticket.xlsx')
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def __write(self, rows: list) -> None:
+        workbook = Workbook()
+        worksheet = workbook.active
+        for row in rows:
+            worksheet.append(row)
+        workbook.save(self.ticket_file)
+
+    def test_report(self):
+        self.__write([['id', 'title', 'description', 'assign_to', 'status', 'submitter', 'type'],
+                      [1, 'bug_1', 'd1', 'Joseph', 'Waiting', 'Cooper', 'Bug'],
+                      ['x', 'bug_2', '', 'Joseph', 'Closed', 'Cooper', 'Bug'],
+                      [3, 'bug_3', 'd3', 'Joseph', 'Done', 'Cooper', 'Epic'],
+                      [4, 'bug_4', 'd4', 'Amy', 'Done', 'Cooper', 'NewFeature']])
+        all_ticket, errors = ParseTicketDB(self.ticket_file, NormalGetSheetColumn()).parse()
+        self.assertEqual([(ticket.ticket_id, ticket.title) for ticket in all_ticket],
+                         [(1, 'bug_1'), (4, 'bug_4')])
+        self.assertEqual(all_ticket[1].to_row(),
+                         ('bug_4', 'd4', 'Amy', 'Done', 'Cooper', 'NewFeature'))
+        self.assertEqual(errors, [ParseError(3, 'description', TicketDBError.ValueEmpty),
+                                  ParseError(3, 'status', TicketDBError.WrongFieldContent),
+                                  ParseError(3, 'id', TicketDBError.WrongFieldContent),
+                                  ParseError(4, 'type', TicketDBError.WrongFieldContent)])
+
+        # a load still refuses the workbook, with every bad cell
+        with self.assertRaises(TicketDBException) as raised:
+            ParseTicketDB(self.ticket_file, NormalGetSheetColumn()).get_content()
+        self.assertEqual(raised.exception.error_type, TicketDBError.ValueEmpty)
+        self.assertEqual(len(raised.exception.errors), 4)
+
+    def test_bad_id(self):
+        self.__write([['id', 'title', 'description', 'assign_to', 'status', 'submitter', 'type'],
+                      [1, 'bug_1', 'd1', 'Joseph', 'Waiting', 'Cooper', 'Bug'],
+                      [2.5, 'bug_2', 'd2', 'Joseph', 'Waiting', 'Cooper', 'Bug'],
+                      [1, 'bug_3', 'd3', 'Joseph', 'Done', 'Cooper', 'Bug'],
+                      [4, 'bug_4', 'd4', 'Amy', 'Done', 'Cooper', 'Bug']])
+        all_ticket, errors = ParseTicketDB(self.ticket_file, NormalGetSheetColumn()).parse()
+        self.assertEqual([ticket.ticket_id for ticket in all_ticket], [1, 4])
+        self.assertEqual(errors, [ParseError(3, 'id', TicketDBError.WrongFieldContent),
+                                  ParseError(4, 'id', TicketDBError.WrongFieldContent)])
+
+    def test_missing_header(self):
+        self.__write([['title', 'description', 'assign_to', 'status', 'type'],
+                      ['bug_1', 'd1', 'Joseph', 'Waiting', 'Bug']])
+        with self.assertRaises(TicketDBException) as raised:
+            ParseTicketDB(self.ticket_file, NormalGetSheetColumn()).get_content()
+        self.assertEqual(raised.exception.error_type, TicketDBError.TitleFail)
+
+class TestTicketFormat(unittest.TestCase):
+    def test_field(self):
+        ticket = TicketFormat('bug_1', 'd1', 'Joseph', 'Done', 'Cooper', 'NewFeature')
+        self.assertEqual(ticket.to_row(), ('bug_1', 'd1', 'Joseph', 'Done', 'Cooper', 'NewFeature'))
+        self.assertFalse(hasattr(ticket, '__dict__'))
+
+    def test_condition_value(self):
+        condition = TicketFormat.Empty()
+        condition.ticket_type = TicketType.Bug
+        condition.status = 'Unknown'
+        self.assertIs(condition.assign_to, False)
+        self.assertIs(condition.ticket_type, TicketType.Bug)
+        self.assertEqual(condition.status, 'Unknown')
+
+    def test_number_value(self):
+        with self.assertRaises(TicketDBException):
+            TicketFormat('bug_1', 'd1', 'Joseph', 1, 'Cooper', 'Bug')
+        ticket = TicketFormat('bug_1', 'd1', 'Joseph', 'Done', 'Cooper', 'Bug')
+        with self.assertRaises(TicketDBException):
+            ticket.ticket_type = 7
+        self.assertEqual(ticket.ticket_type, 'Bug')
+
+    def test_intern(self):
+        name = ''.join(['Jo', 'seph'])
+        ticket_1 = TicketFormat('bug_1', 'd1', name, 'Done', 'Cooper', 'Bug')
+        ticket_2 = TicketFormat('bug_2', 'd2', 'Jo' + name[2:], 'Done', 'Cooper', 'Bug')
+        self.assertIs(ticket_1.assign_to, ticket_2.assign_to)
+
+class TestStreamParseTicketDB(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def __write(self, row_num: int) -> str:
+        ticket_file = os.path.join(self.work_dir.name, 'ticket_%d.xlsx' % row_num)
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet('Sheet')
+        worksheet.append(['title', 'description', 'assign_to', 'status', 'submitter', 'type'])
+        for i in range(row_num):
+            worksheet.append(['bug_%d' % i, 'This is bug_%d.' % i,
+                              'Joseph', 'Waiting', 'Cooper', 'Bug'])
+        workbook.save(ticket_file)
+        return ticket_file
+
+    def __peak_memory(self, ticket_file: str, keep: bool) -> int:
+        tracemalloc.start()
+        all_ticket = []
+        for ticket in StreamParseTicketDB(ticket_file).iter_content():
+            if keep:
+                all_ticket.append(ticket)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak
+
+    def test_iter_content(self):
+        result = list(StreamParseTicketDB(self.__write(3)).iter_content())
+        self.assertEqual([ticket.title for ticket in result], ['bug_0', 'bug_1', 'bug_2'])
+        self.assertEqual(result[0].ticket_type, 'Bug')
+
+    def __write_rows(self, rows: list) -> str:
+        ticket_file = os.path.join(self.work_dir.name, 'ticket_rows.xlsx')
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet('Sheet')
+        worksheet.append(['title', 'description', 'assign_to', 'status', 'submitter', 'type', 'id'])
+        worksheet.append(['bug_0', 'd', 'Joseph', 'Waiting', 'Cooper', 'Bug', 1])
+        for row in rows:
+            worksheet.append(row)
+        workbook.save(ticket_file)
+        return ticket_file
+
+    def test_bad_id(self):
+        for bad_id in ('x', 2.5):
+            ticket_file = self.__write_rows([['bug_1', 'd', 'Joseph', 'Waiting', 'Cooper', 'Bug',
+                                              bad_id]])
+            with self.assertRaises(TicketDBException) as raised:
+                list(StreamParseTicketDB(ticket_file).iter_content())
+            self.assertEqual(raised.exception.errors,
+                             [ParseError(3, 'id', TicketDBError.WrongFieldContent)])
+
+    def test_bad_status_type(self):
+        ticket_file = self.__write_rows([['bug_1', 'd', 'Joseph', 1, 'Cooper', 7, 2]])
+        with self.assertRaises(TicketDBException) as raised:
+            list(StreamParseTicketDB(ticket_file).iter_content())
+        self.assertEqual(raised.exception.errors,
+                         [ParseError(3, 'status', TicketDBError.WrongFieldContent),
+                          ParseError(3, 'type', TicketDBError.WrongFieldContent)])
+
+    def test_memory_bounded(self):
+        ticket_file = self.__write(3000)
+        streamed = self.__peak_memory(ticket_file, keep=False)
+        materialised = self.__peak_memory(ticket_file, keep=True)
+        self.assertLess(streamed, materialised)
+
+if __name__ == '__main__':
+    unittest.main()
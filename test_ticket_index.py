@@ -0,0 +1,56 @@
+'''
+Index:
+    TestTicketIndex
+'''
+
+import unittest
+
+from ticket_db import TicketFormat
+from ticket_index import TicketIndex
+
+class TestTicketIndex(unittest.TestCase):
+    def setUp(self):
+        self.all_ticket = [
+            TicketFormat('bug_1', 'd1', 'Joseph', 'Waiting', 'Cooper', 'Bug'),
+            TicketFormat('bug_2', 'd2', 'Joseph', 'Done', 'Cooper', 'Bug'),
+            TicketFormat('feature_1', 'd3', 'Amy', 'Waiting', 'Tom', 'NewFeature'),
+            TicketFormat('bug_1', 'd4', 'Amy', 'Waiting', 'Tom', 'Bug'),
+        ]
+        self.ticket_index = TicketIndex(self.all_ticket)
+
+    def test_find_title(self):
+        result = self.ticket_index.find_title('bug_1')
+        self.assertEqual(result, [self.all_ticket[0], self.all_ticket[3]])
+        self.assertEqual(self.ticket_index.find_title('nothing'), [])
+
+    def test_find_id(self):
+        ticket_index = TicketIndex([TicketFormat('bug_1', ticket_id=1),
+                                    TicketFormat('bug_1', ticket_id=2)])
+        second = ticket_index.find_id(2)
+        self.assertEqual([ticket.ticket_id for ticket in second], [2])
+        ticket_index.remove(second[0])
+        self.assertEqual(ticket_index.find_id(2), [])
+        self.assertEqual(len(ticket_index.find_title('bug_1')), 1)
+
+    def test_lookup(self):
+        result = self.ticket_index.lookup('assign_to', 'Joseph')
+        self.assertEqual(list(result.values()), self.all_ticket[:2])
+        self.assertEqual(self.ticket_index.lookup('status', 'Unknown'), {})
+        self.assertEqual(list(self.ticket_index), self.all_ticket)
+
+    def test_update_keeps_order(self):
+        edited = TicketFormat('bug_1', 'd1', 'Amy', 'Waiting', 'Cooper', 'Bug')
+        self.ticket_index.update(self.all_ticket[0], edited)
+
+        result = self.ticket_index.lookup('assign_to', 'Amy')
+        self.assertEqual([result[seq] for seq in sorted(result)],
+                         [self.all_ticket[0], self.all_ticket[2], self.all_ticket[3]])
+
+    def test_remove(self):
+        self.ticket_index.remove(self.all_ticket[0])
+        self.assertEqual(self.ticket_index.find_title('bug_1'), [self.all_ticket[3]])
+        self.assertNotIn(self.all_ticket[0], self.ticket_index)
+        self.assertEqual(len(self.ticket_index), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+'''
+Index:
+    TestDirtyTracker
+    TestTicketJournal
+    TestMergeChanges
+'''
+
+import os
+import tempfile
+import unittest
+
+from error_handler import TicketDBException
+from namespace import Authorization
+from ticket_db import TicketFormat
+from ticket_journal import DirtyTracker, TicketChange, TicketJournal, merge_changes
+
+class TestDirtyTracker(unittest.TestCase):
+    def test_no_change(self):
+        tracker = DirtyTracker()
+        ticket = TicketFormat('bug_1', 'd1', 'Joseph', 'Waiting', 'Cooper', 'Bug')
+        tracker.track_update(ticket)
+        self.assertFalse(tracker.is_dirty())
+
+    def test_coalesce(self):
+        tracker = DirtyTracker()
+        ticket = TicketFormat('bug_1', 'd1', 'Joseph', 'Waiting', 'Cooper', 'Bug')
+        tracker.track_update(ticket)
+        ticket.status = 'Done'
+        tracker.track_update(ticket)
+        ticket.assign_to = 'Amy'
+
+        changes = tracker.get_changes()
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(changes[0].before[3], 'Waiting')
+        self.assertEqual(changes[0].after[2:4], ('Amy', 'Done'))
+
+    def test_create_then_delete(self):
+        tracker = DirtyTracker()
+        ticket = TicketFormat('bug_1', 'd1', 'Joseph', 'Waiting', 'Cooper', 'Bug')
+        tracker.track_create(ticket)
+        tracker.track_delete(ticket)
+        self.assertFalse(tracker.is_dirty())
+
+class TestTicketJournal(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.ticket_file = os.path.join(self.work_dir.name, 'ticket.xlsx')
+        with open(self.ticket_file, 'wb') as ticket_file:
+            ticket_file.write(b'workbook')
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def __load(self):
+        return [TicketFormat('bug_1', 'd1', 'Joseph', 'Waiting', 'Cooper', 'Bug'),
+                TicketFormat('bug_2', 'd2', 'Joseph', 'Waiting', 'Cooper', 'Bug')]
+
+    def test_replay(self):
+        all_ticket = self.__load()
+        tracker = DirtyTracker()
+        tracker.track_update(all_ticket[0])
+        all_ticket[0].status = 'Done'
+        tracker.track_delete(all_ticket[1])
+        created = TicketFormat('bug_3', 'd3', 'Amy', 'Waiting', 'Tom', 'Bug')
+        tracker.track_create(created)
+
+        journal = TicketJournal(self.ticket_file)
+        journal.append(tracker.get_changes())
+        self.assertEqual(journal.count(), 3)
+
+        result = journal.replay(self.__load())
+        self.assertEqual([ticket.to_row() for ticket in result],
+                         [('bug_1', 'd1', 'Joseph', 'Done', 'Cooper', 'Bug'),
+                          created.to_row()])
+
+    def test_replay_stream_chain(self):
+        journal = TicketJournal(self.ticket_file)
+        journal.append([
+            TicketChange('U', ('bug_1', 'd1', 'Joseph', 'Waiting', 'Cooper', 'Bug'),
+                              ('bug_1', 'd1', 'Amy', 'Waiting', 'Cooper', 'Bug')),
+            TicketChange('C', after=('bug_3', 'd3', 'Amy', 'Waiting', 'Tom', 'Bug'))])
+        journal.append([
+            TicketChange('U', ('bug_1', 'd1', 'Amy', 'Waiting', 'Cooper', 'Bug'),
+                              ('bug_1', 'd1', 'Amy', 'Done', 'Cooper', 'Bug')),
+            TicketChange('D', before=('bug_3', 'd3', 'Amy', 'Waiting', 'Tom', 'Bug'))])
+
+        result = list(journal.replay_stream(iter(self.__load())))
+        self.assertEqual([ticket.to_row() for ticket in result],
+                         [('bug_1', 'd1', 'Amy', 'Done', 'Cooper', 'Bug'),
+                          ('bug_2', 'd2', 'Joseph', 'Waiting', 'Cooper', 'Bug')])
+
+    def test_stale_journal_is_ignored(self):
+        journal = TicketJournal(self.ticket_file)
+        journal.append([TicketChange('C', after=('t', 'd', 'a', 'Waiting', 's', 'Bug'))])
+        with open(self.ticket_file, 'wb') as ticket_file:
+            ticket_file.write(b'compacted workbook')
+
+        self.assertEqual(len(journal.replay(self.__load())), 2)
+
+    def test_unmatched_record(self):
+        journal = TicketJournal(self.ticket_file)
+        journal.append([TicketChange('D', before=('t', 'd', 'a', 'Waiting', 's', 'Bug'))])
+        with self.assertRaises(TicketDBException):
+            journal.replay(self.__load())
+
+class TestMergeChanges(unittest.TestCase):
+    def setUp(self):
+        self.saved = [TicketFormat('bug_1', 'd1', 'Joseph', 'Waiting', 'Cooper', 'Bug'),
+                      TicketFormat('bug_2', 'd2', 'Amy', 'Waiting', 'Cooper', 'Bug')]
+        self.loaded = [ticket.to_row() for ticket in self.saved]
+
+    def __update(self, row: tuple, **edit) -> TicketChange:
+        after = list(row)
+        for field, value in edit.items():
+            after[TicketFormat.FIELD.index(field)] = value
+        return TicketChange(Authorization.Update.value, row, tuple(after))
+
+    def test_clean(self):
+        changes = [self.__update(self.loaded[0], status='Done'),
+                   TicketChange(Authorization.Delete.value, before=self.loaded[1])]
+        merged, conflicts = merge_changes(self.saved, changes)
+        self.assertEqual(conflicts, [])
+        self.assertEqual(merged, changes)
+        self.assertEqual([ticket.to_row() for ticket in self.saved],
+                         [changes[0].after])
+
+    def test_merge_other_field(self):
+        theirs = self.__update(self.loaded[0], description='theirs')
+        merge_changes(self.saved, [theirs])
+        mine = self.__update(self.loaded[0], status='Done')
+        merged, conflicts = merge_changes(self.saved, [mine])
+        self.assertEqual(conflicts, [])
+        self.assertEqual(merged[0].before, theirs.after)
+        self.assertEqual(self.saved[0].to_row(),
+                         ('bug_1', 'theirs', 'Joseph', 'Done', 'Cooper', 'Bug'))
+
+    def test_conflict(self):
+        merge_changes(self.saved, [self.__update(self.loaded[0], description='theirs'),
+                                   TicketChange(Authorization.Delete.value,
+                                                before=self.loaded[1])])
+        changes = [self.__update(self.loaded[0], description='mine'),
+                   self.__update(self.loaded[1], status='Done')]
+        merged, conflicts = merge_changes(self.saved, changes)
+        self.assertEqual(merged, [])
+        self.assertEqual(conflicts, changes)
+        self.assertEqual(self.saved[0].description, 'theirs')
+
+    def test_by_id(self):
+        saved = [TicketFormat('bug_1', 'd1', 'Joseph', 'Waiting', 'Cooper', 'Bug', 1),
+                 TicketFormat('bug_1', 'd1', 'Joseph', 'Waiting', 'Cooper', 'Bug', 2)]
+        change = self.__update(saved[1].to_row(), status='Done')
+        change.ticket_id = 2
+        created = TicketChange(Authorization.Create.value, after=saved[0].to_row())
+        merged, conflicts = merge_changes(saved, [change, created], iter([5]))
+        self.assertEqual(conflicts, [])
+        self.assertEqual([ticket.status for ticket in saved], ['Waiting', 'Done', 'Waiting'])
+        self.assertEqual([ticket.ticket_id for ticket in saved], [1, 2, 5])
+        self.assertEqual(merged[1].ticket_id, 5)
+
+    def test_already_saved(self):
+        change = self.__update(self.loaded[0], status='Done')
+        merge_changes(self.saved, [change])
+        merged, conflicts = merge_changes(self.saved, [
+            change, TicketChange(Authorization.Delete.value, before=self.loaded[1])])
+        self.assertEqual(conflicts, [])
+        self.assertEqual(len(merged), 1)
+        merged, conflicts = merge_changes(self.saved, [
+            TicketChange(Authorization.Delete.value, before=self.loaded[1])])
+        self.assertEqual((merged, conflicts), ([], []))
+
+if __name__ == '__main__':
+    unittest.main()
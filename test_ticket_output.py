@@ -0,0 +1,85 @@
+'''
+Index:
+    TestWriteTickets
+'''
+
+import csv
+import io
+import json
+import unittest
+
+from ticket_db import TicketFormat
+from ticket_output import write_tickets
+import ticket_output
+
+class TestWriteTickets(unittest.TestCase):
+    def setUp(self):
+        self.all_ticket = [TicketFormat('bug_%d' % i, 'd,"%d"' % i, 'Joseph', 'Waiting', 'Cooper', 'Bug',
+                                        i + 1)
+                           for i in range(5)]
+
+    def __write(self, **kwargs) -> tuple:
+        output = io.StringIO()
+        next_offset = write_tickets(self.all_ticket, output, **kwargs)
+        return output.getvalue(), next_offset
+
+    def test_text(self):
+        text, next_offset = self.__write(page_size=1)
+        self.assertEqual(text, 'Title: bug_0\n'
+                               '\tDescription: d,"0"\n'
+                               '\tAssign to: Joseph\n'
+                               '\tStatus: Waiting\n'
+                               '\tSubmitter: Cooper\n'
+                               '\tType: Bug\n'
+                               '\tID: 1\n\n')
+        self.assertEqual(next_offset, 1)
+
+    def test_table(self):
+        lines = self.__write(output_format='table')[0].splitlines()
+        self.assertEqual(len(lines), 7)
+        self.assertTrue(lines[0].startswith('Title'))
+        self.assertTrue(lines[2].startswith('bug_0 '))
+
+    def test_jsonl(self):
+        text, next_offset = self.__write(output_format='jsonl', offset=3)
+        rows = [json.loads(line) for line in text.splitlines()]
+        self.assertEqual([row['title'] for row in rows], ['bug_3', 'bug_4'])
+        self.assertEqual(rows[0]['description'], 'd,"3"')
+        self.assertEqual(rows[0]['id'], 4)
+        self.assertIsNone(next_offset)
+
+    def test_csv(self):
+        text = self.__write(output_format='csv', offset=1, page_size=2)[0]
+        rows = list(csv.reader(io.StringIO(text)))
+        self.assertEqual(rows[0][0], 'title')
+        self.assertEqual(rows[1:], [list(self.all_ticket[1].to_row()) + ['2'],
+                                    list(self.all_ticket[2].to_row()) + ['3']])
+
+    def test_pages(self):
+        # a full last page has no next page
+        self.assertEqual(self.__write(page_size=5)[1], None)
+        self.assertEqual(self.__write(page_size=2, offset=2)[1], 4)
+
+        answers = iter([True, False])
+        text, next_offset = self.__write(output_format='jsonl', page_size=2,
+                                         more=lambda: next(answers))
+        self.assertEqual(len(text.splitlines()), 4)
+        self.assertEqual(next_offset, 4)
+
+    def test_chunks(self):
+        writes = []
+        class Output(io.StringIO):
+            def write(self, text):
+                writes.append(text)
+                return super().write(text)
+        original = ticket_output.CHUNK_SIZE
+        ticket_output.CHUNK_SIZE = 200
+        try:
+            write_tickets(self.all_ticket, Output(), 'jsonl')
+        finally:
+            ticket_output.CHUNK_SIZE = original
+        self.assertLess(len(writes), len(self.all_ticket))
+        self.assertEqual(len(''.join(writes).splitlines()), 5)
+
+if __name__ == '__main__':
+    unittest.main()
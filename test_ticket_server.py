@@ -0,0 +1,118 @@
+'''
+Index:
+    TestTicketServer
+'''
+
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+
+from error_handler import TicketDBException
+from namespace import TicketDBError
+from sqlite_storage import SqliteStorage
+from ticket_db import TicketFormat
+from ticket_server import TicketClient, TicketServer
+
+class FlakyStorage(SqliteStorage):
+    '''Fail the first save, as a workbook locked by someone else.'''
+    def __init__(self, db_file: str) -> None:
+        super().__init__(db_file)
+        self.save_calls = 0
+
+    def save(self, all_ticket: list, changes: list) -> list:
+        self.save_calls += 1
+        if self.save_calls == 1:
+            raise TicketDBException(TicketDBError.LockTimeout)
+        return super().save(all_ticket, changes)
+
+class TestTicketServer(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.db_file = os.path.join(self.work_dir.name, 'ticket.db')
+        storage = SqliteStorage(self.db_file)
+        storage.insert([TicketFormat('bug_%d' % i, 'd', 'Joseph', 'Waiting', 'Cooper', 'Bug')
+                        for i in range(20)])
+        storage.close()
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    async def __session(self) -> list:
+        server = TicketServer(SqliteStorage(self.db_file), flush_interval=0.05)
+        await server.start()
+
+        async def client_run(client_id: int) -> list:
+            client = TicketClient(server.host, server.port)
+            await client.connect()
+            latency = []
+            for i in range(client_id, 20, 4):
+                start = time.perf_counter()
+                result = await client.request({'user': 'Joseph', 'identity': 'RD', 'op': 'U',
+                                               'title': 'bug_%d' % i, 'status': 'Done'})
+                latency.append(time.perf_counter() - start)
+                self.assertTrue(result['ok'])
+            result = await client.request({'user': 'Joseph', 'identity': 'RD', 'op': 'R'})
+            self.assertTrue(result['ok'])
+            bad = await client.request({'user': 'Cooper', 'identity': 'QA', 'op': 'D',
+                                        'title': 'bug_0'})
+            self.assertFalse(bad['ok'])
+            # a malformed request gets an error and the connection stays
+            for operation in ({'user': 'Joseph', 'identity': 'RD', 'op': 'R', 'page_size': 'x'},
+                              ['R'], {'user': 'Joseph', 'identity': 'RD', 'op': 'S',
+                                      'query': 'bug', 'limit': 'z'}):
+                bad = await client.request(operation)
+                self.assertFalse(bad['ok'])
+                self.assertTrue(bad['error'])
+            result = await client.request({'user': 'Amy', 'identity': 'PM', 'op': 'R',
+                                           'page_size': 2})
+            self.assertEqual(len(result['tickets']), 2)
+            await client.close()
+            return latency
+
+        start = time.perf_counter()
+        latency = sum(await asyncio.gather(*(client_run(i) for i in range(4))), [])
+        elapsed = time.perf_counter() - start
+        await asyncio.sleep(0.1) # let the background flush run
+        flushed_left = await server.flush()
+        await server.stop()
+        return latency, elapsed, flushed_left
+
+    def test_concurrent_clients(self):
+        latency, elapsed, flushed_left = asyncio.run(self.__session())
+        self.assertEqual(len(latency), 20)
+        self.assertEqual(flushed_left, 0)
+        self.assertLess(max(latency), 1.0)
+        self.assertGreater(len(latency) / elapsed, 10)
+
+        storage = SqliteStorage(self.db_file)
+        self.assertEqual({ticket.status for ticket in storage.load()}, {'Done'})
+        storage.close()
+
+    async def __failed_flush(self) -> tuple:
+        storage = FlakyStorage(self.db_file)
+        server = TicketServer(storage, flush_interval=0.05)
+        await server.start()
+        client = TicketClient(server.host, server.port)
+        await client.connect()
+        for i in range(2):
+            result = await client.request({'user': 'Joseph', 'identity': 'RD', 'op': 'U',
+                                           'title': 'bug_%d' % i, 'status': 'Done'})
+            self.assertTrue(result['ok'])
+        await asyncio.sleep(0.3) # a failed flush, then one that saves
+        await client.close()
+        flushed_left = await server.flush()
+        await server.stop()
+        return storage.save_calls, flushed_left
+
+    def test_failed_flush(self):
+        save_calls, flushed_left = asyncio.run(self.__failed_flush())
+        self.assertGreaterEqual(save_calls, 2)
+        self.assertEqual(flushed_left, 0)
+        storage = SqliteStorage(self.db_file)
+        self.assertEqual([ticket.status for ticket in storage.load()[:2]], ['Done', 'Done'])
+        storage.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+'''
+Index:
+    TestTicketStats
+'''
+
+import io
+import json
+import unittest
+
+from error_handler import InputException
+from ticket_db import TicketFormat
+from ticket_stats import TicketStats, parse_group_by
+
+class TestTicketStats(unittest.TestCase):
+    def setUp(self):
+        self.all_ticket = [
+            TicketFormat('bug_1', 'd1', 'Joseph', 'Waiting', 'Cooper', 'Bug'),
+            TicketFormat('bug_2', 'd2', 'Joseph', 'Done', 'Cooper', 'Bug'),
+            TicketFormat('new_1', 'd3', 'Amy', 'Waiting', 'Tom', 'NewFeature'),
+            TicketFormat('bug_3', 'd4', 'Joseph', 'Waiting', 'Tom', 'Bug'),
+        ]
+        self.stats = TicketStats(self.all_ticket)
+
+    def test_group_by(self):
+        report = self.stats.group_by(['assign_to'])
+        self.assertEqual(report.groups, [(('Joseph',), 3), (('Amy',), 1)])
+        report = self.stats.group_by('ticket_type,status')
+        self.assertEqual(report.to_dicts(),
+                         [{'ticket_type': 'Bug', 'status': 'Waiting', 'count': 2},
+                          {'ticket_type': 'Bug', 'status': 'Done', 'count': 1},
+                          {'ticket_type': 'NewFeature', 'status': 'Waiting', 'count': 1}])
+        self.assertEqual(self.stats.group_by([]).groups, [((), 4)])
+
+    def test_condition(self):
+        condition = TicketFormat.Empty()
+        condition.assign_to = 'Joseph'
+        condition.status = 'Waiting'
+        report = self.stats.group_by(['submitter'], condition)
+        self.assertEqual(report.groups, [(('Cooper',), 1), (('Tom',), 1)])
+        self.assertEqual(report.total(), 2)
+
+    def test_add_remove(self):
+        self.stats.remove(self.all_ticket[1])
+        self.stats.add(TicketFormat('bug_4', 'd5', 'Amy', 'Done', 'Tom', 'Bug'))
+        self.assertEqual(len(self.stats), 4)
+        self.assertEqual(self.stats.group_by(['assign_to', 'status']).groups,
+                         [(('Joseph', 'Waiting'), 2), (('Amy', 'Done'), 1),
+                          (('Amy', 'Waiting'), 1)])
+
+    def test_write(self):
+        report = self.stats.group_by(['status'])
+        output = io.StringIO()
+        report.write(output, 'csv')
+        self.assertEqual(output.getvalue(), 'status,count\nWaiting,3\nDone,1\n')
+        output = io.StringIO()
+        report.write(output, 'json')
+        self.assertEqual(json.loads(output.getvalue()),
+                         [{'status': 'Waiting', 'count': 3}, {'status': 'Done', 'count': 1}])
+        output = io.StringIO()
+        report.write(output)
+        self.assertEqual(output.getvalue(),
+                         'status   count\nWaiting  3\nDone     1\nTotal: 4\n')
+
+    def test_parse_group_by(self):
+        self.assertEqual(parse_group_by(' status, ticket_type '), ('status', 'ticket_type'))
+        with self.assertRaises(InputException):
+            parse_group_by('title')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+'''
+Index:
+    TestTicketStore
+    TestTicketStoreThreads
+'''
+
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import unittest
+
+from error_handler import InputException
+from namespace import InputError
+from ticket_db import TicketFormat
+from ticket_store import TicketStore
+
+class TestTicketStore(unittest.TestCase):
+    def setUp(self):
+        self.all_ticket = [
+            TicketFormat('bug_1', 'd1', 'Joseph', 'Waiting', 'Cooper', 'Bug'),
+            TicketFormat('bug_2', 'd2', 'Joseph', 'Waiting', 'Cooper', 'Bug'),
+        ]
+        self.ticket_store = TicketStore(self.all_ticket)
+
+    def test_commit(self):
+        with self.ticket_store.transaction() as transaction:
+            ticket = transaction.edit(self.all_ticket[0])
+            ticket.status = 'Done'
+            self.assertEqual(self.all_ticket[0].status, 'Waiting')
+            transaction.delete(self.all_ticket[1])
+            transaction.create(TicketFormat('bug_3', 'd3', 'Amy', 'Waiting', 'Tom', 'Bug'))
+
+        self.assertEqual([ticket.title for ticket in self.all_ticket], ['bug_1', 'bug_3'])
+        self.assertEqual(self.all_ticket[0].status, 'Done')
+        condition = TicketFormat.Empty()
+        condition.status = 'Done'
+        self.assertEqual(self.ticket_store.select(condition), [self.all_ticket[0]])
+        self.assertEqual(len(self.ticket_store.get_changes()), 3)
+
+    def test_rollback(self):
+        with self.assertRaises(InputException):
+            with self.ticket_store.transaction() as transaction:
+                ticket = transaction.edit(self.all_ticket[0])
+                ticket.status = 'Done'
+                raise InputException(InputError.NoSuchOption)
+
+        self.assertEqual(self.all_ticket[0].status, 'Waiting')
+        condition = TicketFormat.Empty()
+        condition.status = 'Done'
+        self.assertEqual(self.ticket_store.select(condition), [])
+        self.assertEqual(self.ticket_store.get_changes(), [])
+
+    def test_stream_select(self):
+        ticket_store = TicketStore(iter(self.all_ticket))
+        condition = TicketFormat.Empty()
+        condition.title = 'bug_2'
+        self.assertEqual(list(ticket_store.select(condition)), [self.all_ticket[1]])
+
+    def test_stream_index(self):
+        ticket_store = TicketStore(iter(self.all_ticket))
+        self.assertEqual(ticket_store.find_title('bug_1'), [self.all_ticket[0]])
+        self.assertEqual(ticket_store.search('bug_2'), [self.all_ticket[1]])
+        self.assertEqual(len(ticket_store.get_stats()), 2)
+
+    def test_search(self):
+        condition = TicketFormat.Empty()
+        condition.assign_to = 'Amy'
+        self.all_ticket[0].ticket_id = 1
+        self.assertEqual(self.ticket_store.search('d1'), [self.all_ticket[0]])
+        self.assertEqual(self.ticket_store.search('bug', condition), [])
+
+        # the index follows the committed changes
+        with self.ticket_store.transaction() as transaction:
+            transaction.edit(self.all_ticket[0]).description = 'crash'
+            transaction.delete(self.all_ticket[1])
+            transaction.create(TicketFormat('bug_3', 'crash', 'Amy', 'Waiting', 'Tom', 'Bug'))
+        self.assertEqual(self.ticket_store.search('d'), [])
+        self.assertEqual(self.ticket_store.search('crash'), self.all_ticket)
+        self.assertEqual(self.ticket_store.search('crash', condition), [self.all_ticket[1]])
+
+    def test_stats(self):
+        stats = self.ticket_store.get_stats()
+        self.assertEqual(stats.group_by(['status']).groups, [(('Waiting',), 2)])
+
+        # the counts follow the committed changes
+        with self.ticket_store.transaction() as transaction:
+            transaction.edit(self.all_ticket[0]).status = 'Done'
+            transaction.delete(self.all_ticket[1])
+            transaction.create(TicketFormat('bug_3', 'd3', 'Amy', 'Waiting', 'Tom', 'Bug'))
+        self.assertEqual(stats.group_by(['assign_to', 'status']).groups,
+                         [(('Amy', 'Waiting'), 1), (('Joseph', 'Done'), 1)])
+        with self.assertRaises(InputException):
+            with self.ticket_store.transaction() as transaction:
+                transaction.edit(self.all_ticket[0]).status = 'Waiting'
+                raise InputException(InputError.NoSuchOption)
+        self.assertEqual(stats.group_by(['status']).groups, [(('Done',), 1), (('Waiting',), 1)])
+
+class TestTicketStoreThreads(unittest.TestCase):
+    '''Readers and writers from a thread pool, switching threads often.'''
+    THREADS = 8
+
+    def setUp(self):
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.all_ticket = [TicketFormat('bug_%d' % i, '0', 'Joseph', 'Waiting', 'Cooper', 'Bug')
+                           for i in range(100)]
+        self.ticket_store = TicketStore(self.all_ticket)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.switch_interval)
+
+    def __run(self, *tasks) -> list:
+        '''Run each task in the pool, return their results.'''
+        with ThreadPoolExecutor(self.THREADS) as executor:
+            futures = [executor.submit(task) for task in tasks]
+            return [future.result() for future in futures]
+
+    def __increment(self) -> None:
+        '''Add one to the counters in bug_0 and bug_1 together.'''
+        with self.ticket_store.writing():
+            number = int(self.ticket_store.find_title('bug_0')[0].description) + 1
+            with self.ticket_store.transaction() as transaction:
+                for title in ('bug_0', 'bug_1'):
+                    ticket = self.ticket_store.find_title(title)[0]
+                    transaction.edit(ticket).description = str(number)
+
+    def __read(self) -> tuple:
+        '''Get the counters of bug_0 and bug_1, and the number of tickets.'''
+        condition = TicketFormat.Empty()
+        condition.assign_to = 'Joseph'
+        with self.ticket_store.reading():
+            first = self.ticket_store.find_title('bug_0')[0].description
+            second = self.ticket_store.find_title('bug_1')[0].description
+            selected = len(self.ticket_store.select(condition))
+            counted = self.ticket_store.group_by(['assign_to'], condition).total()
+            return first, second, selected, counted
+
+    def test_read_write(self):
+        results = self.__run(*[self.__increment if i % 4 == 0 else self.__read
+                               for i in range(800)])
+        for result in results:
+            if result is not None: # a read saw the two counters of one commit
+                first, second, selected, counted = result
+                self.assertEqual(first, second)
+                self.assertEqual((selected, counted), (100, 100))
+        # no increment was lost
+        self.assertEqual(self.all_ticket[0].description, '200')
+        self.assertEqual(self.all_ticket[1].description, '200')
+
+    def test_create_delete(self):
+        def create(number: int) -> None:
+            with self.ticket_store.transaction() as transaction:
+                transaction.create(TicketFormat('new_%d' % number, 'crash', 'Amy',
+                                                'Waiting', 'Tom', 'Bug'))
+        def delete(number: int) -> None:
+            with self.ticket_store.writing():
+                found = self.ticket_store.find_title('bug_%d' % number)
+                with self.ticket_store.transaction() as transaction:
+                    transaction.delete(found[0])
+        self.__run(*[(lambda number=number: create(number)) for number in range(200)],
+                   *[(lambda number=number: delete(number)) for number in range(50)],
+                   *[(lambda: self.ticket_store.search('crash')) for _ in range(50)])
+
+        self.assertEqual(len(self.all_ticket), 250)
+        self.assertEqual(len(self.ticket_store.search('crash')), 200)
+        condition = TicketFormat.Empty()
+        condition.assign_to = 'Amy'
+        self.assertEqual(len(self.ticket_store.select(condition)), 200)
+        self.assertEqual(self.ticket_store.group_by(['assign_to']).to_dicts(),
+                         [{'assign_to': 'Amy', 'count': 200}, {'assign_to': 'Joseph', 'count': 50}])
+        self.assertEqual(len(self.ticket_store.get_changes()), 250)
+
+    def test_recording(self):
+        def record(number: int) -> list:
+            with self.ticket_store.recording() as committed:
+                with self.ticket_store.writing():
+                    ticket = self.ticket_store.find_title('bug_%d' % number)[0]
+                    with self.ticket_store.transaction() as transaction:
+                        transaction.edit(ticket).status = 'Done'
+            return committed
+        results = self.__run(*[(lambda number=number: record(number)) for number in range(100)])
+        # each thread got its own change only
+        self.assertEqual([[change.before[0] for change in committed] for committed in results],
+                         [['bug_%d' % number] for number in range(100)])
+
+if __name__ == '__main__':
+    unittest.main()
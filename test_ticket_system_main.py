@@ -0,0 +1,24 @@
+'''
+Index:
+    TestStartup
+'''
+
+import os
+import subprocess
+import sys
+import unittest
+
+class TestStartup(unittest.TestCase):
+    def test_nothing_heavy_before_the_first_prompt(self):
+        # a fresh interpreter, this one has imported everything already
+        loaded = subprocess.run(
+            [sys.executable, '-c',
+             'import sys, ticket_system_main; print(" ".join(sorted(sys.modules)))'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True).stdout.split()
+        for module in ('xlrd', 'openpyxl', 'sqlite3', 'smtplib', 'unittest',
+                       'xlsx_storage', 'sqlite_storage'):
+            self.assertNotIn(module, loaded)
+
+if __name__ == '__main__':
+    unittest.main()
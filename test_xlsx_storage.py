@@ -0,0 +1,142 @@
+'''
+Index:
+    TestXlsxStorage
+'''
+
+import os
+import tempfile
+import threading
+import unittest
+from typing import List
+
+from archive import TicketArchive
+from ticket_db import TicketFormat, WriteDB
+from ticket_journal import TicketChange, TicketJournal
+from xlsx_storage import XlsxStorage
+
+class TestXlsxStorage(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.TemporaryDirectory()
+        self.ticket_file = os.path.join(self.work_dir.name, 'ticket.xlsx')
+        WriteDB([TicketFormat('bug_%d' % i, 'd', 'Joseph', 'Waiting', 'Cooper', 'Bug')
+                 for i in range(16)]).fill_in(self.ticket_file)
+
+    def tearDown(self):
+        self.work_dir.cleanup()
+
+    def __edit(self, all_ticket: List[TicketFormat], title: str, **edit) -> TicketChange:
+        ticket = next(ticket for ticket in all_ticket if ticket.title == title)
+        before = ticket.to_row()
+        for field, value in edit.items():
+            setattr(ticket, field, value)
+        return TicketChange('U', before, ticket.to_row())
+
+    def test_parallel_sessions(self):
+        session_num = 8
+        loaded = threading.Barrier(session_num)
+        conflicts = []
+
+        def session(session_id: int) -> None:
+            storage = XlsxStorage(self.ticket_file)
+            all_ticket = storage.load()
+            loaded.wait() # everyone holds the same version before anyone saves
+            changes = [self.__edit(all_ticket, 'bug_%d' % i, status='Done')
+                       for i in range(session_id, 16, session_num)]
+            changes.append(self.__edit(all_ticket, 'bug_0', description='d%d' % session_id)
+                           if session_id == 0 else
+                           self.__edit(all_ticket, 'bug_1', assign_to='Amy'))
+            conflicts.extend(storage.save(all_ticket, changes))
+
+        threads = [threading.Thread(target=session, args=(i,)) for i in range(session_num)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        saved = XlsxStorage(self.ticket_file).load()
+        self.assertEqual(conflicts, [])
+        self.assertEqual({ticket.status for ticket in saved}, {'Done'})
+        self.assertEqual(saved[0].description, 'd0')
+        self.assertEqual(saved[1].assign_to, 'Amy')
+
+    def test_conflict_and_compaction(self):
+        storage = XlsxStorage(self.ticket_file)
+        first = storage.load()
+        second = storage.load()
+        self.assertEqual(storage.save(first, [self.__edit(first, 'bug_0', description='first')]),
+                         [])
+        change = self.__edit(second, 'bug_0', description='second')
+        self.assertEqual(storage.save(second, [change]), [change])
+
+        compact_record = TicketJournal.COMPACT_RECORD
+        TicketJournal.COMPACT_RECORD = 1
+        try:
+            # the stale list of the session must not overwrite the first save
+            storage.save(second, [self.__edit(second, 'bug_2', status='Done')])
+        finally:
+            TicketJournal.COMPACT_RECORD = compact_record
+        self.assertEqual(TicketJournal(self.ticket_file).count(), 0)
+        saved = {ticket.title: ticket for ticket in XlsxStorage(self.ticket_file).load()}
+        self.assertEqual((saved['bug_0'].description, saved['bug_2'].status), ('first', 'Done'))
+
+    def test_ids(self):
+        storage = XlsxStorage(self.ticket_file)
+        all_ticket = storage.load()
+        self.assertEqual([ticket.ticket_id for ticket in all_ticket], list(range(1, 17)))
+        row = all_ticket[3].to_row()
+        storage.save(all_ticket, [TicketChange('C', after=row)])
+        all_ticket = storage.load()
+        self.assertEqual(all_ticket[-1].ticket_id, 17)
+
+        # the same title twice, the id tells which one
+        change = self.__edit(all_ticket, 'bug_3', status='Done')
+        self.assertEqual(change.before, row)
+        storage.save(all_ticket, [TicketChange('U', row, change.after, 17),
+                                  TicketChange('D', before=change.after, ticket_id=17)])
+        compact_record = TicketJournal.COMPACT_RECORD
+        TicketJournal.COMPACT_RECORD = 1
+        try:
+            storage.save(all_ticket, [TicketChange('C', after=row)])
+        finally:
+            TicketJournal.COMPACT_RECORD = compact_record
+        saved = XlsxStorage(self.ticket_file).load()
+        self.assertEqual([ticket.ticket_id for ticket in saved], list(range(1, 17)) + [18])
+        self.assertEqual(saved[3].status, 'Waiting')
+
+    def test_archive(self):
+        storage = XlsxStorage(self.ticket_file)
+        all_ticket = storage.load()
+        storage.save(all_ticket, [self.__edit(all_ticket, 'bug_%d' % i, status='Done')
+                                  for i in range(4)])
+        self.assertEqual(storage.compact(), 4)
+        self.assertEqual(len(TicketArchive(self.ticket_file).months()), 1)
+
+        waiting = TicketFormat.Empty()
+        waiting.status = 'Waiting'
+        self.assertEqual(len(storage.load(waiting)), 12)
+        self.assertEqual(len(list(storage.stream(waiting))), 12)
+        all_ticket = storage.load()
+        self.assertEqual([ticket.ticket_id for ticket in all_ticket][-4:], [1, 2, 3, 4])
+        self.assertEqual(len(list(storage.stream())), 16)
+
+        # reopen one, delete one, edit one, all archived
+        changes = [self.__edit(all_ticket, 'bug_0', status='Waiting'),
+                   self.__edit(all_ticket, 'bug_1', description='archived')]
+        for change, ticket_id in zip(changes, (1, 2)):
+            change.ticket_id = ticket_id
+        changes.append(TicketChange('D', before=all_ticket[-2].to_row(), ticket_id=3))
+        self.assertEqual(storage.save(all_ticket, changes), [])
+        active = storage.load(waiting)
+        self.assertEqual(active[-1].ticket_id, 1)
+        saved = {ticket.ticket_id: ticket for ticket in storage.load()}
+        self.assertEqual(len(saved), 15)
+        self.assertEqual(saved[2].description, 'archived')
+        self.assertNotIn(3, saved)
+
+        # a crash after the archive is written keeps the workbook copy
+        TicketArchive(self.ticket_file).add([TicketFormat('bug_9', 'old', 'Joseph', 'Done',
+                                                          'Cooper', 'Bug', 10)])
+        self.assertEqual(len(storage.load()), 15)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,31 +5,101 @@ Index:
     GetSheetColumnInterface
     NormalGetSheetColumn
     TestGetSheetColumn
+    ParseError
     ParseTicketDB
+    StreamParseTicketDB
     WriteDB
-    TestParseTicketDB_
 '''
 
 from abc import ABC, abstractmethod
-import unittest
-
-from xlrd import open_workbook
-from openpyxl import Workbook
+from contextlib import contextmanager
+import gc
+from operator import eq, itemgetter
+import os
+import sys
+from typing import Callable, Iterator, List, Sequence
 
 from error_handler import TicketDBException
+from instrument import count, timed
 from namespace import TicketDBError, TicketStatus, TicketType
+from next_id import TicketNextId
 
 TICKET_FILE = ''
 
+STATUS_VALUE = tuple(status.value for status in TicketStatus)
+STATUS_CODE = {value: code for code, value in enumerate(STATUS_VALUE)}
+TYPE_VALUE = tuple(ticket_type.value for ticket_type in TicketType)
+TYPE_CODE = {value: code for code, value in enumerate(TYPE_VALUE)}
+
+def _encode(value, code_table: dict):
+    '''Store a known value as its small integer code, anything else as it is.
+
+    A number would be read back as a code, it is refused.
+    '''
+    if type(value) is str:
+        return code_table.get(value, value)
+    if type(value) in (int, float):
+        raise TicketDBException(TicketDBError.WrongFieldContent)
+    return value
+
+def _decode(value, value_table: tuple):
+    '''Turn a code back to its value, only _encode gives an int.'''
+    if type(value) is int:
+        return value_table[value]
+    return value
+
+def _intern(value):
+    '''Share one string object between the tickets with the same name.'''
+    if type(value) is str:
+        return sys.intern(value)
+    return value
+
+def _map_distinct(function: Callable, values: Sequence) -> list:
+    '''Map the values, calling the function once per distinct value.'''
+    mapped = {value: function(value) for value in set(values)}
+    return [mapped[value] for value in values]
+
+@contextmanager
+def _gc_paused():
+    '''Pause the cyclic garbage collector while many objects without cycles are made.
+
+    Otherwise it walks the young objects again and again as the tickets
+    pile up, which costs more than making them.
+    '''
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
 class TicketFormat():
-    '''Ticket format'''
+    '''Ticket format
+
+    Slotted, with status and ticket_type kept as small integer codes and
+    the names interned. A field may also hold a condition value (False,
+    True or an enum) which is kept as it is.
+
+    ticket_id is given by the storage when the ticket is first saved and
+    never reused, it is None until then. origin is the workbook a ticket
+    was loaded from when a storage holds several, None otherwise. Neither
+    is one of FIELD, the rows hold the content of a ticket only.
+    '''
+    FIELD = ('title', 'description', 'assign_to', 'status', 'submitter', 'ticket_type')
+    __slots__ = ('title', 'description', '_assign_to', '_status', '_submitter', '_ticket_type',
+                 'ticket_id', 'origin')
+
     def __init__(self,
                 title:str='',
                 description:str='',
                 assign_to:str='',
                 status:str=TicketStatus.Waiting.value,
                 submitter:str='',
-                ticket_type:str=TicketType.Bug.value) -> None:
+                ticket_type:str=TicketType.Bug.value,
+                ticket_id:int=None) -> None:
+        self.ticket_id = ticket_id
+        self.origin = None
         self.title = title
         self.description = description
         self.assign_to= assign_to
@@ -37,15 +107,133 @@ class TicketFormat():
         self.submitter = submitter
         self.ticket_type = ticket_type
 
+    @property
+    def assign_to(self):
+        return self._assign_to
+
+    @assign_to.setter
+    def assign_to(self, value) -> None:
+        self._assign_to = _intern(value)
+
+    @property
+    def status(self):
+        return _decode(self._status, STATUS_VALUE)
+
+    @status.setter
+    def status(self, value) -> None:
+        self._status = _encode(value, STATUS_CODE)
+
+    @property
+    def submitter(self):
+        return self._submitter
+
+    @submitter.setter
+    def submitter(self, value) -> None:
+        self._submitter = _intern(value)
+
+    @property
+    def ticket_type(self):
+        return _decode(self._ticket_type, TYPE_VALUE)
+
+    @ticket_type.setter
+    def ticket_type(self, value) -> None:
+        self._ticket_type = _encode(value, TYPE_CODE)
+
     @staticmethod
     def Empty():
         '''Clear the format.'''
         return TicketFormat(False, False, False, False, False, False)
 
+    def to_row(self) -> tuple:
+        '''Get the values of the fields in FIELD order.'''
+        return (self.title,
+                self.description,
+                self.assign_to,
+                self.status,
+                self.submitter,
+                self.ticket_type)
+
+    @staticmethod
+    def from_row(row, ticket_id: int = None):
+        '''Build a ticket from values in FIELD order.'''
+        return TicketFormat(*row, ticket_id=ticket_id)
+
+    def to_packed(self) -> tuple:
+        '''Get the stored values, status and ticket_type as their codes.'''
+        return (self.ticket_id,
+                self.title,
+                self.description,
+                self._assign_to,
+                self._status,
+                self._submitter,
+                self._ticket_type)
+
+    @staticmethod
+    def from_packed(packed):
+        '''Build a ticket from to_packed values without going through the setters.'''
+        ticket = object.__new__(TicketFormat)
+        (ticket.ticket_id,
+         ticket.title,
+         ticket.description,
+         assign_to,
+         ticket._status,
+         submitter,
+         ticket._ticket_type) = packed
+        ticket._assign_to = _intern(assign_to)
+        ticket._submitter = _intern(submitter)
+        ticket.origin = None
+        return ticket
+
+    @staticmethod
+    def from_columns(ticket_id: Sequence,
+                     title: Sequence,
+                     description: Sequence,
+                     assign_to: Sequence,
+                     status: Sequence,
+                     submitter: Sequence,
+                     ticket_type: Sequence) -> list:
+        '''Build one ticket per row of columns, the values of a field in each.
+
+        The names are interned and status and ticket_type encoded once per
+        distinct value, not once per ticket.
+        '''
+        assign_to = _map_distinct(_intern, assign_to)
+        submitter = _map_distinct(_intern, submitter)
+        status = _map_distinct(lambda value: _encode(value, STATUS_CODE), status)
+        ticket_type = _map_distinct(lambda value: _encode(value, TYPE_CODE), ticket_type)
+        new = object.__new__
+        all_ticket = []
+        append = all_ticket.append
+        for row in zip(ticket_id, title, description, assign_to, status, submitter, ticket_type):
+            ticket = new(TicketFormat)
+            (ticket.ticket_id,
+             ticket.title,
+             ticket.description,
+             ticket._assign_to,
+             ticket._status,
+             ticket._submitter,
+             ticket._ticket_type) = row
+            ticket.origin = None
+            append(ticket)
+        return all_ticket
+
 # ------ Parse Ticket ------
 class SheetColumn():
-    '''Sheet column.'''
+    '''Sheet column.
+
+    ticket_id stays -1 for a workbook written before the id column, its
+    tickets are numbered by their rows.
+    '''
+    HEADER = {'id': 'ticket_id',
+              'title': 'title',
+              'description': 'description',
+              'assign_to': 'assign_to',
+              'status': 'status',
+              'submitter': 'submitter',
+              'type': 'ticket_type'}
+
     def __init__(self) -> None:
+        self.ticket_id = -1
         self.title = -1
         self.description = -1
         self.assign_to= -1
@@ -62,6 +250,18 @@ class SheetColumn():
         self.submitter = submitter
         self.ticket_type = t_type
 
+    @staticmethod
+    def from_header(header: tuple):
+        '''Find the columns by the header row.'''
+        sheet_column = SheetColumn()
+        for i, item in enumerate(header):
+            field = SheetColumn.HEADER.get(item)
+            if field is not None:
+                setattr(sheet_column, field, i)
+        if -1 in (getattr(sheet_column, field) for field in TicketFormat.FIELD):
+            raise TicketDBException(TicketDBError.TitleFail)
+        return sheet_column
+
 class GetSheetColumnInterface(ABC):
     @abstractmethod
     def get_sheet_column(self, data_sheet):
@@ -70,28 +270,10 @@ class GetSheetColumnInterface(ABC):
 
 class NormalGetSheetColumn(GetSheetColumnInterface):
     def get_sheet_column(self, data_sheet) -> SheetColumn:
-        for i, item in enumerate(data_sheet.row_values(0)):
-            if item == 'title':
-                title_column = i
-            elif item == 'description':
-                description_column = i
-            elif item == 'assign_to':
-                assign_to_column = i
-            elif item == 'status':
-                status_column = i
-            elif item == 'submitter':
-                submitter_column = i
-            elif item == 'type':
-                ticket_type_column = i
-
-        sheet_column = SheetColumn()
-        sheet_column.assign_value(title_column,
-                                description_column,
-                                assign_to_column,
-                                status_column,
-                                submitter_column,
-                                ticket_type_column)
-        return sheet_column
+        '''Find the columns by the header row, TitleFail when one is missing.'''
+        if data_sheet.nrows == 0:
+            raise TicketDBException(TicketDBError.TitleFail)
+        return SheetColumn.from_header(tuple(data_sheet.row_values(0)))
 
 class TestGetSheetColumn(GetSheetColumnInterface):
     def get_sheet_column(self, data_sheet) -> SheetColumn:
@@ -99,17 +281,39 @@ class TestGetSheetColumn(GetSheetColumnInterface):
         sheet_column.assign_value(0, 1, 2, 3, 4, 5)
         return sheet_column
 
+class ParseError():
+    '''A cell that cannot be parsed, row as in the sheet and column as its header.'''
+    def __init__(self, row: int, column: str, reason: TicketDBError) -> None:
+        self.row = row
+        self.column = column
+        self.reason = reason
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, ParseError)
+                and (self.row, self.column, self.reason) == (other.row, other.column, other.reason))
+
+    def __repr__(self) -> str:
+        return 'row %d, %s: %s' % (self.row, self.column, self.reason.name)
+
 class ParseTicketDB():
+    '''Parse a whole sheet, column by column.
+
+    Each column is read in one call and checked in one pass. Every bad
+    cell goes into the error report, the rows with one are left out.
+    '''
     def __init__(self,
                 file_path: str,
                 get_sheet_column_interface: GetSheetColumnInterface) -> None:
+        self.__file_path = file_path
         self.__data_sheet = self.__get_data_sheet(file_path)
         self.__all_ticket = []
+        self.errors = [] # [ParseError] of the last parse
 
         self.get_sheet_column = get_sheet_column_interface
         self.sheet_title_column = None # SheetColumn()
 
     def __get_data_sheet(self, file_path: str):
+        from xlrd import open_workbook # imported when a workbook is read
         work_book = open_workbook(file_path)
         return work_book.sheet_by_name("Sheet")
 
@@ -117,84 +321,220 @@ class ParseTicketDB():
         self.sheet_title_column = self.get_sheet_column.get_sheet_column(self.__data_sheet)
         return self.sheet_title_column
 
-    def __get_cell_value(self, row: int, column: int) -> str:
-        if not isinstance(row, int):
-            raise TicketDBException(TicketDBError.RowError)
-        elif row < 0:
-            raise TicketDBException(TicketDBError.RowError)
-
-        if column == -1:
-            raise TicketDBException(TicketDBError.TitleFail)
-        elif column < 0:
+    def __read_columns(self, columns: List[int]) -> list:
+        '''Get the values below the header of each column, the rows read whole and transposed.'''
+        if min(columns) < 0:
             raise TicketDBException(TicketDBError.ColumnError)
+        data_sheet = self.__data_sheet
+        pick = itemgetter(*columns)
+        rows = [pick(data_sheet.row_values(i)) for i in range(1, data_sheet.nrows)]
+        if not rows:
+            return [() for _ in columns]
+        return list(zip(*rows))
 
-        value = self.__data_sheet.cell_value(row, column)
-        if value == '':
-            raise TicketDBException(TicketDBError.ValueEmpty)
-        else:
-            return value
+    @staticmethod
+    def __read_ids(values: list, bad: dict) -> list:
+        '''Get the ids of an id column, None for a bad one.
+
+        An id is a whole number given to one row only.
+        '''
+        try:
+            ids = list(map(int, values))
+            if all(map(eq, ids, values)) and len(set(ids)) == len(ids):
+                return ids
+        except (TypeError, ValueError, OverflowError):
+            pass
+        ids = []
+        seen = set()
+        for i, value in enumerate(values):
+            try:
+                ticket_id = int(value)
+            except (TypeError, ValueError, OverflowError):
+                ticket_id = None
+            if ticket_id is not None and (isinstance(value, float) and ticket_id != value
+                                          or ticket_id in seen):
+                ticket_id = None
+            if ticket_id is None:
+                if value != '':
+                    bad.setdefault(i, []).append(('id', TicketDBError.WrongFieldContent))
+            else:
+                seen.add(ticket_id)
+            ids.append(ticket_id)
+        return ids
 
     def __parse_content(self) -> None:
-        for i in range(1, self.__data_sheet.nrows):
-            title = self.__get_cell_value(i, self.sheet_title_column.title)
-            description = self.__get_cell_value(i, self.sheet_title_column.description)
-
-            assign_to = self.__get_cell_value(i, self.sheet_title_column.assign_to)
-            status = self.__get_cell_value(i, self.sheet_title_column.status)
-            submitter = self.__get_cell_value(i, self.sheet_title_column.submitter)
-            ticket_type = self.__get_cell_value(i, self.sheet_title_column.ticket_type)
-
-            self.__all_ticket.append(
-                TicketFormat(title, description, assign_to, status, submitter, ticket_type))
+        sheet_column = self.sheet_title_column
+        column_index = [getattr(sheet_column, field) for field in TicketFormat.FIELD]
+        if sheet_column.ticket_id != -1:
+            column_index.append(sheet_column.ticket_id)
+        columns = self.__read_columns(column_index)
+        id_column = columns.pop() if len(columns) > len(TicketFormat.FIELD) else None
+        header = {field: header for header, field in SheetColumn.HEADER.items()}
+
+        names = [header[field] for field in TicketFormat.FIELD] + ['id']
+        bad = {} # row number below the header -> [(column name, reason)]
+        # per column, the rows with an empty cell, a whole column is only
+        # walked when it holds one
+        empty = [{i for i, value in enumerate(values) if value == ''} if '' in values else set()
+                 for values in columns + ([] if id_column is None else [id_column])]
+        # a row without any value is a formatted but empty row
+        blank = set.intersection(*empty)
+        for name, rows in zip(names, empty):
+            for i in rows - blank:
+                bad.setdefault(i, []).append((name, TicketDBError.ValueEmpty))
+        for field, code_table in (('status', STATUS_CODE), ('ticket_type', TYPE_CODE)):
+            values = columns[TicketFormat.FIELD.index(field)]
+            if not set(values).difference(code_table, ('',)):
+                continue
+            for i in [i for i, value in enumerate(values)
+                      if value != '' and value not in code_table]:
+                bad.setdefault(i, []).append((header[field], TicketDBError.WrongFieldContent))
+        if id_column is None:
+            ids = range(1, len(columns[0]) + 1) # the sheet row number - 1
+        else:
+            ids = self.__read_ids(id_column, bad)
+
+        order = {name: position for position, name in enumerate(names)}
+        self.errors = [ParseError(i + 2, name, reason)
+                       for i in sorted(bad)
+                       for name, reason in sorted(bad[i], key=lambda error: order[error[0]])]
+        skipped = blank.union(bad)
+        columns.insert(0, ids)
+        if skipped:
+            columns = [[value for i, value in enumerate(values) if i not in skipped]
+                       for values in columns]
+        self.__all_ticket = TicketFormat.from_columns(*columns)
+
+    @timed('ParseTicketDB.parse')
+    def parse(self) -> tuple:
+        '''Get the tickets of the good rows and the report of the bad cells.'''
+        self.get_column()
+        with _gc_paused():
+            self.__parse_content()
+        count('rows_parsed', len(self.__all_ticket))
+        return self.__all_ticket, self.errors
 
+    @timed('ParseTicketDB.get_content')
     def get_content(self) -> list:
-        self.get_column()
-        self.__parse_content()
-        return self.__all_ticket
+        '''Get the tickets, raise with the whole report when a cell is bad.'''
+        all_ticket, errors = self.parse()
+        if errors:
+            raise TicketDBException(errors[0].reason, errors)
+        return all_ticket
+
+    def get_next_id(self) -> int:
+        '''Get the next id after the tickets parsed, the caller stores it.'''
+        return max([TicketNextId(self.__file_path).load()]
+                   + [ticket.ticket_id + 1 for ticket in self.__all_ticket
+                      if ticket.ticket_id is not None])
+
+class StreamParseTicketDB():
+    '''Parse tickets lazily, the sheet is never held in memory as a whole.
+
+    first_row and last_row give a range of sheet rows to parse, the header
+    is row 1 and is always read.
+    '''
+    def __init__(self,
+                 file_path: str,
+                 sheet_name: str = 'Sheet',
+                 first_row: int = 2,
+                 last_row: int = None) -> None:
+        self.__file_path = file_path
+        self.__sheet_name = sheet_name
+        self.__first_row = max(first_row, 2)
+        self.__last_row = last_row
+
+    def iter_content(self) -> Iterator[TicketFormat]:
+        '''Yield the tickets row by row.'''
+        from openpyxl import load_workbook
+        work_book = load_workbook(self.__file_path, read_only=True)
+        row_num = 0
+        try:
+            work_sheet = work_book[self.__sheet_name]
+            header = next(work_sheet.iter_rows(max_row=1, values_only=True), None)
+            if header is None:
+                return
+            rows = work_sheet.iter_rows(min_row=self.__first_row, max_row=self.__last_row,
+                                        values_only=True)
+            sheet_column = SheetColumn.from_header(header)
+            column = [getattr(sheet_column, field) for field in TicketFormat.FIELD]
+            if sheet_column.ticket_id != -1:
+                column.append(sheet_column.ticket_id)
+            # the cells held as codes, checked as ParseTicketDB does
+            checked = (('status', TicketFormat.FIELD.index('status'), STATUS_CODE),
+                       ('type', TicketFormat.FIELD.index('ticket_type'), TYPE_CODE))
+            for sheet_row, row in enumerate(rows, self.__first_row):
+                if all(value is None or value == '' for value in row):
+                    continue # formatted but empty row
+                try:
+                    value = [row[i] for i in column]
+                except IndexError:
+                    raise TicketDBException(TicketDBError.ValueEmpty)
+                if None in value or '' in value:
+                    raise TicketDBException(TicketDBError.ValueEmpty)
+                row_num += 1
+                errors = [ParseError(sheet_row, name, TicketDBError.WrongFieldContent)
+                          for name, position, code_table in checked
+                          if value[position] not in code_table]
+                if sheet_column.ticket_id == -1:
+                    value.append(sheet_row - 1)
+                else:
+                    try:
+                        ticket_id = int(value[-1])
+                        if isinstance(value[-1], float) and ticket_id != value[-1]:
+                            raise ValueError(value[-1])
+                        value[-1] = ticket_id
+                    except (TypeError, ValueError, OverflowError):
+                        errors.append(ParseError(sheet_row, 'id',
+                                                 TicketDBError.WrongFieldContent))
+                if errors:
+                    raise TicketDBException(TicketDBError.WrongFieldContent, errors)
+                yield TicketFormat(*value)
+        finally:
+            count('rows_parsed', row_num)
+            work_book.close()
 
 # ------ Write Ticket ------
 
 class WriteDB():
+    COLUMN = 'ABCDEFG' # the fields in FIELD order, then the id
+
     def __init__(self, ticket: TicketFormat)-> None:
         self.__ticket = ticket
 
-    def fill_in(self, ticket_file) -> None:
+    def __fill_row(self, worksheet, row_num: int, ticket: TicketFormat) -> None:
+        '''Write the cells of one ticket.'''
+        for column, value in zip(self.COLUMN, ticket.to_row() + (ticket.ticket_id,)):
+            worksheet['%s%d' % (column, row_num)] = value
+
+    @timed('WriteDB.fill_in')
+    def fill_in(self, ticket_file, next_id: int = 1) -> None:
+        '''Write every ticket, a ticket without an id gets the next one.
+
+        The next id is never below the one kept for the workbook before.
+        '''
+        from openpyxl import Workbook
         workbook = Workbook()
         worksheet = workbook.active
         worksheet['A1'] = 'title'
         worksheet['B1'] = 'description'
         worksheet['C1'] = 'assign_to'
-        worksheet['C1'] = 'assign_to'
         worksheet['D1'] = 'status'
         worksheet['E1'] = 'submitter'
         worksheet['F1'] = 'type'
+        worksheet['G1'] = 'id'
+        next_id = max([next_id, TicketNextId(ticket_file).load()]
+                      + [ticket.ticket_id + 1 for ticket in self.__ticket
+                         if ticket.ticket_id is not None])
         for i, ticket in enumerate(self.__ticket):
-            row_num = str(i + 2)
-            worksheet['A'+row_num] = ticket.title
-            worksheet['B'+row_num] = ticket.description
-            worksheet['C'+row_num] = ticket.assign_to
-            worksheet['D'+row_num] = ticket.status
-            worksheet['E'+row_num] = ticket.submitter
-            worksheet['F'+row_num] = ticket.ticket_type
-
-        workbook.save(ticket_file)
-
-# ------ Unit Test ------
-
-class TestParseTicketDB_(unittest.TestCase):
-    def test_normal_prase_ticket_db(self):
-        get_sheet_column_interface = NormalGetSheetColumn()
-        parse_ticket_db = ParseTicketDB(TICKET_FILE, get_sheet_column_interface)
-
-        result = parse_ticket_db.get_column()
-        self.assertEqual(result.title, 0)
-
-    def test_parse_ticket_basic(self):
-        get_sheet_column_interface = TestGetSheetColumn()
-        parse_ticket_db = ParseTicketDB(TICKET_FILE, get_sheet_column_interface)
-
-        result = parse_ticket_db.get_column()
-        self.assertEqual(result.title, 0)
-
-if __name__ == '__main__':
-    unittest.main()
+            if ticket.ticket_id is None:
+                ticket.ticket_id = next_id
+                next_id += 1
+            self.__fill_row(worksheet, i + 2, ticket)
+
+        # save aside and swap in, a crash never leaves a half-written workbook
+        temp_file = ticket_file + '.tmp'
+        workbook.save(temp_file)
+        os.replace(temp_file, ticket_file)
+        count('bytes_written', os.path.getsize(ticket_file))
+        TicketNextId(ticket_file).store(next_id)
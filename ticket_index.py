@@ -0,0 +1,104 @@
+'''
+Index:
+    TicketIndex
+'''
+
+from typing import Dict, Iterable, Iterator, List
+
+from ticket_db import TicketFormat
+
+class TicketIndex():
+    '''Hash indexes over the ticket list.
+
+    Every ticket gets a sequence number when it is added, so results
+    keep the order of the ticket list. Lookups by ticket id, by title and the
+    assign_to/submitter/status buckets cost O(1) or O(result), see
+    query.Query.run for filters planned over them.
+    '''
+    INDEXED_FIELD = ('title', 'assign_to', 'submitter', 'status')
+
+    def __init__(self, all_ticket: Iterable[TicketFormat] = ()) -> None:
+        self.__sequence = 0
+        self.__all = {}         # sequence -> ticket
+        self.__seq_of = {}      # id(ticket) -> sequence
+        self.__id_map = {}      # ticket_id -> ticket
+        self.__field_map = {field: {} for field in self.INDEXED_FIELD}
+        for ticket in all_ticket:
+            self.add(ticket)
+
+    def __len__(self) -> int:
+        return len(self.__all)
+
+    def __contains__(self, ticket: TicketFormat) -> bool:
+        return id(ticket) in self.__seq_of
+
+    def __bucket(self, field: str, value) -> Dict[int, TicketFormat]:
+        '''Get the bucket of the field value, create it if necessary.'''
+        return self.__field_map[field].setdefault(value, {})
+
+    def __drop(self, field: str, value, seq: int) -> None:
+        '''Drop the sequence from the bucket of the field value.'''
+        bucket = self.__field_map[field].get(value)
+        if bucket is None:
+            return
+        bucket.pop(seq, None)
+        if not bucket:
+            del self.__field_map[field][value]
+
+    def add(self, ticket: TicketFormat) -> None:
+        '''Add a ticket.'''
+        seq = self.__sequence
+        self.__sequence += 1
+        self.__all[seq] = ticket
+        self.__seq_of[id(ticket)] = seq
+        if ticket.ticket_id is not None:
+            self.__id_map[ticket.ticket_id] = ticket
+        for field in self.INDEXED_FIELD:
+            self.__bucket(field, getattr(ticket, field))[seq] = ticket
+
+    def remove(self, ticket: TicketFormat) -> None:
+        '''Remove a ticket.'''
+        seq = self.__seq_of.pop(id(ticket))
+        del self.__all[seq]
+        if self.__id_map.get(ticket.ticket_id) is ticket:
+            del self.__id_map[ticket.ticket_id]
+        for field in self.INDEXED_FIELD:
+            self.__drop(field, getattr(ticket, field), seq)
+
+    def update(self, ticket: TicketFormat, edited: TicketFormat) -> None:
+        '''Copy the fields of edited into ticket and move it between buckets.'''
+        seq = self.__seq_of[id(ticket)]
+        for field in self.INDEXED_FIELD:
+            old_value = getattr(ticket, field)
+            new_value = getattr(edited, field)
+            if old_value != new_value:
+                self.__drop(field, old_value, seq)
+                self.__bucket(field, new_value)[seq] = ticket
+        ticket.description = edited.description
+        ticket.assign_to = edited.assign_to
+        ticket.status = edited.status
+        ticket.submitter = edited.submitter
+        ticket.ticket_type = edited.ticket_type
+
+    def set_id(self, ticket: TicketFormat, ticket_id: int) -> None:
+        '''Give a ticket saved for the first time its id.'''
+        ticket.ticket_id = ticket_id
+        self.__id_map[ticket_id] = ticket
+
+    def find_id(self, ticket_id: int) -> List[TicketFormat]:
+        '''Get the ticket with the id, as a list of none or one.'''
+        ticket = self.__id_map.get(ticket_id)
+        return [] if ticket is None else [ticket]
+
+    def find_title(self, title: str) -> List[TicketFormat]:
+        '''Get the tickets with the title, in ticket list order.'''
+        bucket = self.__field_map['title'].get(title, {})
+        return [bucket[seq] for seq in sorted(bucket)]
+
+    def lookup(self, field: str, value) -> Dict[int, TicketFormat]:
+        '''Get {sequence: ticket} of the tickets whose field is value, do not modify it.'''
+        return self.__field_map[field].get(value, {})
+
+    def __iter__(self) -> Iterator[TicketFormat]:
+        '''Iterate the tickets in ticket list order.'''
+        return iter(self.__all.values())
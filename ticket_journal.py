@@ -0,0 +1,353 @@
+'''
+Index:
+    TicketChange
+    DirtyTracker
+    rebase
+    find_current
+    merge_changes
+    TicketJournal
+'''
+
+from collections import deque
+import json
+import os
+from typing import Iterable, Iterator, List
+
+from error_handler import TicketDBException
+from instrument import count
+from namespace import Authorization, TicketDBError
+from ticket_db import TicketFormat
+from ticket_index import TicketIndex
+
+class TicketChange():
+    '''One change of a ticket.
+
+    op is Authorization.Create/Update/Delete value. before is the row of
+    the ticket when it was loaded, after is the row when it is saved.
+    ticket_id is None for a ticket not saved yet, or loaded from a storage
+    without ids; a storage saving a created ticket sets it. origin is the
+    origin of the ticket and ticket the ticket of the session, they are
+    not recorded.
+    '''
+    def __init__(self, op: str, before: tuple = None, after: tuple = None,
+                 ticket_id: int = None, origin: str = None, ticket=None) -> None:
+        self.op = op
+        self.before = before
+        self.after = after
+        self.ticket_id = ticket_id
+        self.origin = origin
+        self.ticket = ticket # TicketFormat obj
+
+    def to_record(self) -> dict:
+        '''Get the journal record.'''
+        record = {'op': self.op}
+        if self.ticket_id is not None:
+            record['id'] = self.ticket_id
+        if self.before is not None:
+            record['before'] = list(self.before)
+        if self.after is not None:
+            record['after'] = list(self.after)
+        return record
+
+    @staticmethod
+    def from_record(record: dict):
+        '''Build a change from the journal record.'''
+        before = record.get('before')
+        after = record.get('after')
+        return TicketChange(record['op'],
+                            tuple(before) if before is not None else None,
+                            tuple(after) if after is not None else None,
+                            record.get('id'))
+
+class DirtyTracker():
+    '''Track which tickets are changed in a session.
+
+    Only the row at load time is kept for each dirty ticket, so a ticket
+    changed many times still yields one change.
+    '''
+    def __init__(self) -> None:
+        self.__loaded = {}      # id(ticket) -> (ticket, row at load time)
+        self.__created = {}     # id(ticket) -> ticket
+        self.__deleted = []     # (row at load time, ticket)
+
+    def is_dirty(self) -> bool:
+        '''Check if anything is changed.'''
+        return bool(self.get_changes())
+
+    def track_create(self, ticket: TicketFormat) -> None:
+        '''Track a created ticket.'''
+        self.__created[id(ticket)] = ticket
+
+    def track_update(self, ticket: TicketFormat) -> None:
+        '''Track a ticket before it is updated.'''
+        if id(ticket) not in self.__created and id(ticket) not in self.__loaded:
+            self.__loaded[id(ticket)] = (ticket, ticket.to_row())
+
+    def track_delete(self, ticket: TicketFormat) -> None:
+        '''Track a ticket before it is deleted.'''
+        if self.__created.pop(id(ticket), None) is not None:
+            return
+        _, before = self.__loaded.pop(id(ticket), (ticket, ticket.to_row()))
+        self.__deleted.append((before, ticket))
+
+    def get_changes(self) -> List[TicketChange]:
+        '''Get the changes, deletes first, then updates, then creates.'''
+        changes = [TicketChange(Authorization.Delete.value, before=row,
+                                ticket_id=ticket.ticket_id, origin=ticket.origin, ticket=ticket)
+                   for row, ticket in self.__deleted]
+        for ticket, before in self.__loaded.values():
+            after = ticket.to_row()
+            if after != before:
+                changes.append(TicketChange(Authorization.Update.value, before, after,
+                                            ticket.ticket_id, ticket.origin, ticket))
+        for ticket in self.__created.values():
+            changes.append(TicketChange(Authorization.Create.value, after=ticket.to_row(),
+                                        origin=ticket.origin, ticket=ticket))
+        return changes
+
+def rebase(change: TicketChange, current_rows: List[tuple]) -> TicketChange or None:
+    '''Rebase a change of a session on the rows saved now.
+
+    current_rows are the saved rows of the ticket id of the change, or
+    with the title the change started from. The before row of a change is the version of the ticket the
+    session loaded. If it is still saved the change applies as it is.
+    Otherwise another session changed the ticket in between: edits of
+    different fields are merged, the same field edited to different values
+    or an edited ticket deleted is a conflict. Return None when the change
+    is already saved.
+    '''
+    if change.op == Authorization.Create.value or change.before in current_rows:
+        return change
+    if change.op == Authorization.Delete.value:
+        if not current_rows:
+            return None # deleted by both
+        raise TicketDBException(TicketDBError.MergeConflict)
+    if change.after in current_rows:
+        return None # the same edit by both
+    if len(current_rows) != 1:
+        raise TicketDBException(TicketDBError.MergeConflict)
+
+    theirs = current_rows[0]
+    merged = []
+    for base, mine, other in zip(change.before, change.after, theirs):
+        if mine == base:
+            merged.append(other)
+        elif other in (base, mine):
+            merged.append(mine)
+        else:
+            raise TicketDBException(TicketDBError.MergeConflict)
+    merged = tuple(merged)
+    if merged == theirs:
+        return None
+    return TicketChange(Authorization.Update.value, theirs, merged, change.ticket_id)
+
+def find_current(ticket_index: TicketIndex, change: TicketChange) -> List[TicketFormat]:
+    '''Get the saved tickets a change applies to, by its id, else by its title.'''
+    if change.ticket_id is not None:
+        return ticket_index.find_id(change.ticket_id)
+    return ticket_index.find_title((change.before or change.after)[0])
+
+def merge_changes(all_ticket: List[TicketFormat],
+                  changes: List[TicketChange],
+                  new_id: Iterator[int] = None) -> tuple:
+    '''Rebase the changes one by one on the saved tickets and apply them in place.
+
+    A created ticket takes its id from new_id, and its change is given
+    the id. Return the rebased changes, to be saved, and the changes in
+    conflict.
+    '''
+    ticket_index = TicketIndex(all_ticket)
+    merged = []
+    conflicts = []
+    for change in changes:
+        current = find_current(ticket_index, change)
+        try:
+            rebased = rebase(change, [ticket.to_row() for ticket in current])
+        except TicketDBException:
+            conflicts.append(change)
+            continue
+        if rebased is None:
+            continue
+
+        if rebased.op == Authorization.Create.value:
+            ticket_id = next(new_id) if new_id is not None else None
+            change.ticket_id = ticket_id
+            rebased = TicketChange(rebased.op, after=rebased.after, ticket_id=ticket_id)
+            ticket_index.add(TicketFormat.from_row(rebased.after, ticket_id))
+        else:
+            ticket = next(ticket for ticket in current if ticket.to_row() == rebased.before)
+            if rebased.op == Authorization.Update.value:
+                ticket_index.update(ticket, TicketFormat.from_row(rebased.after))
+            else:
+                ticket_index.remove(ticket)
+        merged.append(rebased)
+
+    all_ticket[:] = list(ticket_index)
+    return merged, conflicts
+
+class TicketJournal():
+    '''Append-only journal next to the workbook.
+
+    The first line records the size and mtime of the workbook the journal
+    applies to. Compaction folds the journal into the workbook, so a journal
+    whose base does not match the workbook is already folded and ignored.
+    '''
+    SUFFIX = '.journal'
+    COMPACT_RECORD = 500
+    COMPACT_SIZE = 256 * 1024
+
+    def __init__(self, ticket_file: str) -> None:
+        self.__ticket_file = ticket_file
+        self.journal_file = ticket_file + self.SUFFIX
+
+    def __get_base(self) -> list:
+        '''Get the size and mtime of the workbook.'''
+        try:
+            stat = os.stat(self.__ticket_file)
+        except FileNotFoundError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def __read_record(self) -> List[dict]:
+        '''Read the records applying to the current workbook.'''
+        try:
+            with open(self.journal_file, encoding='utf-8') as journal:
+                lines = journal.read().splitlines()
+        except FileNotFoundError:
+            return []
+        if not lines:
+            return []
+
+        try:
+            header = json.loads(lines[0])
+            if header.get('base') != self.__get_base():
+                return []
+            return [json.loads(line) for line in lines[1:]]
+        except (ValueError, AttributeError):
+            raise TicketDBException(TicketDBError.JournalError)
+
+    def count(self) -> int:
+        '''Count the records applying to the current workbook.'''
+        return len(self.__read_record())
+
+    def last_id(self) -> int:
+        '''Get the largest ticket id in the records, 0 if there is none.'''
+        return max((record['id'] for record in self.__read_record() if 'id' in record),
+                   default=0)
+
+    def append(self, changes: List[TicketChange]) -> None:
+        '''Append the changes.'''
+        if not changes:
+            return
+        need_header = self.count() == 0
+        with open(self.journal_file, 'w' if need_header else 'a', encoding='utf-8') as journal:
+            start = journal.tell()
+            if need_header:
+                journal.write(json.dumps({'base': self.__get_base()}) + '\n')
+            for change in changes:
+                journal.write(json.dumps(change.to_record(), ensure_ascii=False) + '\n')
+            journal.flush()
+            count('bytes_written', journal.tell() - start)
+            os.fsync(journal.fileno())
+
+    def replay(self, all_ticket: List[TicketFormat]) -> List[TicketFormat]:
+        '''Apply the journal on top of the tickets from the workbook.'''
+        all_ticket[:] = list(self.replay_stream(all_ticket))
+        return all_ticket
+
+    def replay_stream(self, tickets: Iterable[TicketFormat]) -> Iterator[TicketFormat]:
+        '''Apply the journal on top of a stream of tickets from the workbook.
+
+        The journal is read and replayed once by itself right away, which
+        tells what each touched workbook row becomes. The stream is then
+        patched row by row and the created tickets come last.
+        '''
+        records = self.__read_record()
+        if not records:
+            return iter(tickets)
+        pending, created = self.__resolve(records)
+        return self.__patch(tickets, pending, created)
+
+    @staticmethod
+    def __patch(tickets: Iterable[TicketFormat], pending: dict, created: list) -> Iterator[TicketFormat]:
+        '''Patch the workbook rows touched by the journal, then add the created tickets.'''
+        for ticket in tickets:
+            outcome = None
+            if pending:
+                key = ticket.ticket_id if ticket.ticket_id in pending else ticket.to_row()
+                outcome = pending.get(key)
+            if outcome is None:
+                yield ticket
+                continue
+            after = outcome.popleft()
+            if not outcome:
+                del pending[key]
+            if after is not None:
+                yield TicketFormat.from_row(after, ticket.ticket_id)
+
+        if pending:
+            raise TicketDBException(TicketDBError.JournalError)
+        yield from created
+
+    @staticmethod
+    def __resolve(records: List[dict]) -> tuple:
+        '''Replay the records alone.
+
+        A record whose before row is not made by an earlier record refers
+        to a workbook row, found by its ticket id if the record has one.
+        Return what each such row becomes (None if it is deleted) and the
+        tickets created by the journal.
+        '''
+        ticket_index = TicketIndex()
+        working = []
+        origin = {}     # id(ticket) -> workbook ticket id, or row without one
+        deleted = set()
+        for record in records:
+            change = TicketChange.from_record(record)
+            if change.op == Authorization.Create.value:
+                ticket = TicketFormat.from_row(change.after, change.ticket_id)
+                working.append(ticket)
+                ticket_index.add(ticket)
+                continue
+
+            ticket = next((ticket for ticket in find_current(ticket_index, change)
+                           if ticket.to_row() == change.before), None)
+            if ticket is None:
+                ticket = TicketFormat.from_row(change.before, change.ticket_id)
+                origin[id(ticket)] = (change.before if change.ticket_id is None
+                                      else change.ticket_id)
+                working.append(ticket)
+                ticket_index.add(ticket)
+
+            if change.op == Authorization.Update.value:
+                ticket_index.update(ticket, TicketFormat.from_row(change.after))
+            elif change.op == Authorization.Delete.value:
+                ticket_index.remove(ticket)
+                deleted.add(id(ticket))
+            else:
+                raise TicketDBException(TicketDBError.JournalError)
+
+        pending = {}
+        created = []
+        for ticket in working:
+            after = None if id(ticket) in deleted else ticket.to_row()
+            if id(ticket) in origin:
+                pending.setdefault(origin[id(ticket)], deque()).append(after)
+            elif after is not None:
+                created.append(ticket)
+        return pending, created
+
+    def need_compaction(self) -> bool:
+        '''Check if the journal is big enough to be folded.'''
+        try:
+            size = os.path.getsize(self.journal_file)
+        except FileNotFoundError:
+            return False
+        return size >= self.COMPACT_SIZE or self.count() >= self.COMPACT_RECORD
+
+    def clear(self) -> None:
+        '''Drop the journal after it is folded into the workbook.'''
+        try:
+            os.remove(self.journal_file)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,183 @@
+'''
+Write tickets out in pages and in large chunks.
+
+    python ticket_output.py --ticket-file ticket.xlsx --user Amy --identity PM --format csv > tickets.csv
+
+Index:
+    TicketRenderer
+    TextRenderer
+    TableRenderer
+    JsonLinesRenderer
+    CsvRenderer
+    RENDERER
+    write_tickets
+'''
+
+from abc import ABC, abstractmethod
+import argparse
+import csv
+import io
+from itertools import islice
+import json
+import sys
+from typing import Callable, Iterable, Optional, TextIO
+
+from ticket_db import TicketFormat
+
+CHUNK_SIZE = 64 * 1024
+
+class TicketRenderer(ABC):
+    def header(self) -> str:
+        '''Text before the first ticket.'''
+        return ''
+
+    @abstractmethod
+    def render(self, ticket: TicketFormat) -> str:
+        '''Text of one ticket.'''
+
+class TextRenderer(TicketRenderer):
+    '''One block per ticket, for reading in a terminal.'''
+    def render(self, ticket: TicketFormat) -> str:
+        text = ('Title: %s\n'
+                '\tDescription: %s\n'
+                '\tAssign to: %s\n'
+                '\tStatus: %s\n'
+                '\tSubmitter: %s\n'
+                '\tType: %s\n') % ticket.to_row()
+        if ticket.ticket_id is not None:
+            text += '\tID: %s\n' % ticket.ticket_id
+        return text + '\n'
+
+class TableRenderer(TicketRenderer):
+    '''One line per ticket in fixed width columns, longer values are cut with ~.'''
+    WIDTH = (20, 40, 12, 8, 12, 10, 8)
+    TITLE = ('Title', 'Description', 'Assign to', 'Status', 'Submitter', 'Type', 'ID')
+
+    def __line(self, values: Iterable[str]) -> str:
+        cells = []
+        for value, width in zip(values, self.WIDTH):
+            value = str(value)
+            if len(value) > width:
+                value = value[:width - 1] + '~'
+            cells.append(value.ljust(width))
+        return ' '.join(cells).rstrip() + '\n'
+
+    def header(self) -> str:
+        return self.__line(self.TITLE) + self.__line('-' * width for width in self.WIDTH)
+
+    def render(self, ticket: TicketFormat) -> str:
+        return self.__line(ticket.to_row() + (_show_id(ticket),))
+
+class JsonLinesRenderer(TicketRenderer):
+    '''One JSON object per line.'''
+    def render(self, ticket: TicketFormat) -> str:
+        record = dict(zip(TicketFormat.FIELD, ticket.to_row()))
+        record['id'] = ticket.ticket_id
+        return json.dumps(record, ensure_ascii=False) + '\n'
+
+class CsvRenderer(TicketRenderer):
+    '''CSV with the same header as the workbook.'''
+    def __init__(self) -> None:
+        self.__buffer = io.StringIO()
+        self.__writer = csv.writer(self.__buffer, lineterminator='\n')
+
+    def __row(self, values: Iterable) -> str:
+        self.__buffer.seek(0)
+        self.__buffer.truncate()
+        self.__writer.writerow(values)
+        return self.__buffer.getvalue()
+
+    def header(self) -> str:
+        return self.__row(('title', 'description', 'assign_to', 'status', 'submitter', 'type', 'id'))
+
+    def render(self, ticket: TicketFormat) -> str:
+        return self.__row(ticket.to_row() + (_show_id(ticket),))
+
+def _show_id(ticket: TicketFormat) -> str:
+    '''The ticket id, empty for a ticket not saved yet.'''
+    return '' if ticket.ticket_id is None else str(ticket.ticket_id)
+
+RENDERER = {'text': TextRenderer,
+            'table': TableRenderer,
+            'jsonl': JsonLinesRenderer,
+            'csv': CsvRenderer}
+
+def write_tickets(tickets: Iterable[TicketFormat],
+                  output: TextIO = None,
+                  output_format: str = 'text',
+                  page_size: int = None,
+                  offset: int = 0,
+                  more: Callable[[], bool] = None) -> Optional[int]:
+    '''Write the tickets from offset on, in chunks of about CHUNK_SIZE characters.
+
+    Without more, one page of page_size tickets is written, all of them
+    if page_size is None. With more, it is asked after every page whether
+    to go on. Return the offset of the next page, None when the tickets
+    are all written.
+    '''
+    output = output or sys.stdout
+    renderer = RENDERER[output_format]()
+    tickets = iter(tickets)
+    if offset:
+        for _ in islice(tickets, offset):
+            pass
+    position = offset
+
+    chunk = [renderer.header()]
+    size = len(chunk[0])
+    while True:
+        page = islice(tickets, page_size) if page_size else tickets
+        written = 0
+        for ticket in page:
+            text = renderer.render(ticket)
+            chunk.append(text)
+            size += len(text)
+            written += 1
+            if size >= CHUNK_SIZE:
+                output.write(''.join(chunk))
+                chunk = []
+                size = 0
+        position += written
+        output.write(''.join(chunk))
+        output.flush()
+        chunk = []
+        size = 0
+
+        if not page_size or written < page_size:
+            return None
+        next_ticket = next(tickets, None) # look ahead, the last page may be full
+        if next_ticket is None:
+            return None
+        tickets = _prepend(next_ticket, tickets)
+        if more is None or not more():
+            return position
+
+def _prepend(first: TicketFormat, tickets: Iterable[TicketFormat]) -> Iterable[TicketFormat]:
+    yield first
+    yield from tickets
+
+def main() -> None:
+    from storage import open_storage
+    from ticket_store import TicketStore
+    from user import load_user
+
+    parser = argparse.ArgumentParser(description='Write the tickets a user can read.')
+    parser.add_argument('--ticket-file', required=True, help='workbook or database')
+    parser.add_argument('--user', required=True)
+    parser.add_argument('--identity', required=True, help='PM, QA or RD')
+    parser.add_argument('--format', choices=list(RENDERER), default='jsonl')
+    parser.add_argument('--page-size', type=int)
+    parser.add_argument('--offset', type=int, default=0)
+    args = parser.parse_args()
+
+    user = load_user(args.user, args.identity.upper())
+    tickets = open_storage(args.ticket_file).stream(user.read_condition)
+    next_offset = write_tickets(TicketStore(tickets).select(user.read_condition),
+                                output_format=args.format,
+                                page_size=args.page_size,
+                                offset=args.offset)
+    if next_offset is not None:
+        print('Next page: --offset %d' % next_offset, file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+'''
+Serve the tickets from memory to many clients.
+
+    python ticket_server.py --ticket-file ticket.xlsx --port 8765
+
+The tickets are loaded once. A client sends one JSON operation per line,
+the same as a batch operation, and gets one JSON result per line.
+Operations run in worker threads, beside the event loop. Operations
+that change tickets are serialised, and the changes are flushed to the
+storage in the background, then published to the change feed.
+
+Index:
+    TicketServer
+    TicketClient
+'''
+
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json
+import sys
+
+from batch import run_operation
+from crud import CrudHandler
+from change_feed import ChangeFeed, PendingFeed
+from notification import add_mail_arguments, start_worker
+from storage import StorageInterface, open_storage
+from ticket_store import TicketStore
+
+class TicketServer():
+    '''Hold the tickets in memory and serve operations over a local socket.
+
+    A flush that fails keeps its changes, the next one saves them.
+    '''
+    STOP_FLUSH_ATTEMPTS = 3
+    def __init__(self,
+                storage: StorageInterface,
+                host: str = '127.0.0.1',
+                port: int = 0,
+                flush_interval: float = 1.0,
+                change_feed: ChangeFeed = None,
+                operation_workers: int = 4) -> None:
+        self.__storage = storage
+        self.__pending_feed = None if change_feed is None else PendingFeed(change_feed)
+        self.host = host
+        self.port = port
+        self.__flush_interval = flush_interval
+        self.__ticket_store = None # TicketStore obj
+        self.__server = None # asyncio.Server obj
+        self.__flush_task = None # asyncio.Task obj
+        self.conflicts = [] # [TicketChange] not saved, changed outside the server
+        self.__write_lock = asyncio.Lock()
+        # the storage is only touched from this thread, sqlite3 requires it
+        self.__executor = ThreadPoolExecutor(max_workers=1)
+        # a long read or bulk edit does not hold up the other clients
+        self.__operation_executor = ThreadPoolExecutor(max_workers=operation_workers)
+
+    async def start(self) -> None:
+        '''Load the tickets and listen.'''
+        loop = asyncio.get_running_loop()
+        all_ticket = await loop.run_in_executor(self.__executor, self.__storage.load)
+        self.__ticket_store = TicketStore(all_ticket)
+        self.__server = await asyncio.start_server(self.__handle, self.host, self.port)
+        self.port = self.__server.sockets[0].getsockname()[1]
+        self.__flush_task = asyncio.create_task(self.__flush_loop())
+
+    async def stop(self) -> None:
+        '''Stop listening and flush what is left.'''
+        self.__server.close()
+        await self.__server.wait_closed()
+        self.__flush_task.cancel()
+        try:
+            await self.__flush_task
+        except asyncio.CancelledError:
+            pass
+        try:
+            for attempt in range(1, self.STOP_FLUSH_ATTEMPTS + 1):
+                try:
+                    await self.flush()
+                    break
+                except Exception as error:
+                    if attempt == self.STOP_FLUSH_ATTEMPTS:
+                        raise
+                    print('Flush failed, retrying: %s: %s' % (type(error).__name__, error),
+                          file=sys.stderr)
+                    await asyncio.sleep(self.__flush_interval)
+        finally:
+            self.__executor.shutdown()
+            self.__operation_executor.shutdown()
+
+    async def serve_forever(self) -> None:
+        '''Start and serve until cancelled.'''
+        await self.start()
+        try:
+            await self.__server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def flush(self) -> int:
+        '''Save the changes made since the last flush, return how many.'''
+        async with self.__write_lock:
+            # nothing changes the tickets while the lock is held, the
+            # changes are dropped once saved
+            changes = self.__ticket_store.get_changes()
+            if changes:
+                loop = asyncio.get_running_loop()
+                conflicts = await loop.run_in_executor(self.__executor,
+                                                       self.__storage.save,
+                                                       self.__ticket_store.all_ticket,
+                                                       changes)
+                self.__ticket_store.clear_changes()
+                self.conflicts.extend(conflicts)
+                # the created tickets are named by their id from now on
+                self.__ticket_store.assign_ids(changes)
+                if self.__pending_feed is not None:
+                    await loop.run_in_executor(self.__executor, self.__pending_feed.publish,
+                                               changes, conflicts)
+        return len(changes)
+
+    async def __flush_loop(self) -> None:
+        '''Flush every flush_interval seconds.'''
+        while True:
+            await asyncio.sleep(self.__flush_interval)
+            try:
+                await self.flush()
+            except Exception as error: # the changes are kept for the next flush
+                print('Flush failed: %s: %s' % (type(error).__name__, error), file=sys.stderr)
+
+    async def __run(self, operation: dict) -> dict:
+        '''Run an operation, the ones changing tickets wait for the write lock.'''
+        loop = asyncio.get_running_loop()
+        if str(operation.get('op', '')).upper() in CrudHandler.READ_ACTION:
+            return await loop.run_in_executor(self.__operation_executor, run_operation,
+                                              self.__ticket_store, operation)
+        async with self.__write_lock:
+            return await loop.run_in_executor(self.__operation_executor, run_operation,
+                                              self.__ticket_store, operation,
+                                              self.__pending_feed)
+
+    async def __handle(self,
+                      reader: asyncio.StreamReader,
+                      writer: asyncio.StreamWriter) -> None:
+        '''Serve one client.'''
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    operation = json.loads(line)
+                except ValueError:
+                    operation = None
+                if not isinstance(operation, dict):
+                    result = {'ok': False, 'error': 'InputError.NoSuchOperation'}
+                else:
+                    try:
+                        result = await self.__run(operation)
+                    except Exception as error: # one bad operation must not drop the client
+                        result = {'ok': False, 'op': operation.get('op'),
+                                  'error': '%s: %s' % (type(error).__name__, error)}
+                writer.write(json.dumps(result, ensure_ascii=False).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+class TicketClient():
+    '''Talk to a TicketServer.'''
+    def __init__(self, host: str, port: int) -> None:
+        self.__host = host
+        self.__port = port
+        self.__reader = None
+        self.__writer = None
+
+    async def connect(self) -> None:
+        '''Open the connection.'''
+        self.__reader, self.__writer = await asyncio.open_connection(self.__host, self.__port)
+
+    async def request(self, operation: dict) -> dict:
+        '''Send an operation and wait for its result.'''
+        self.__writer.write(json.dumps(operation).encode() + b'\n')
+        await self.__writer.drain()
+        return json.loads(await self.__reader.readline())
+
+    async def close(self) -> None:
+        '''Close the connection.'''
+        self.__writer.close()
+        await self.__writer.wait_closed()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--ticket-file', required=True, help='workbook or database')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--flush-interval', type=float, default=1.0)
+    add_mail_arguments(parser)
+    args = parser.parse_args()
+
+    mail_worker = start_worker(args)
+    server = TicketServer(open_storage(args.ticket_file),
+                          args.host, args.port, args.flush_interval,
+                          ChangeFeed(args.ticket_file + ChangeFeed.SUFFIX))
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    mail_worker.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+'''
+Ticket counts grouped by assign_to, submitter, status and ticket_type.
+
+    python ticket_stats.py --ticket-file ticket.xlsx --user Amy --identity PM --group-by assign_to,status --format csv
+
+The tickets are counted once per combination of the four fields and the
+counts follow every create, update and delete. A summary over any of the
+fields, for any read condition, adds up the combinations; it costs the
+number of groups, not the number of tickets.
+
+Index:
+    GROUP_FIELD
+    REPORT_FORMAT
+    parse_group_by
+    TicketStats
+    GroupReport
+'''
+
+import argparse
+from collections import Counter
+import csv
+import json
+import sys
+from typing import Dict, Iterable, List, TextIO, Tuple
+
+from error_handler import InputException
+from namespace import InputError
+from ticket_db import TicketFormat
+
+GROUP_FIELD = ('assign_to', 'submitter', 'status', 'ticket_type')
+REPORT_FORMAT = ('text', 'json', 'csv')
+
+def parse_group_by(group_by: str or Iterable[str]) -> Tuple[str]:
+    '''Get the fields of "assign_to,status" or of a list of names.'''
+    if isinstance(group_by, str):
+        group_by = group_by.split(',')
+    fields = tuple(field.strip() for field in group_by if field.strip())
+    for field in fields:
+        if field not in GROUP_FIELD:
+            raise InputException(InputError.NoSuchOption)
+    return fields
+
+class TicketStats():
+    '''Number of tickets for each (assign_to, submitter, status, ticket_type).'''
+    def __init__(self, all_ticket: Iterable[TicketFormat] = ()) -> None:
+        self.__count = Counter()
+        self.__total = 0
+        for ticket in all_ticket:
+            self.add(ticket)
+
+    def __len__(self) -> int:
+        return self.__total
+
+    @staticmethod
+    def __key(ticket: TicketFormat) -> tuple:
+        return (ticket.assign_to, ticket.submitter, ticket.status, ticket.ticket_type)
+
+    def add(self, ticket: TicketFormat) -> None:
+        '''Count a ticket.'''
+        self.__count[self.__key(ticket)] += 1
+        self.__total += 1
+
+    def remove(self, ticket: TicketFormat) -> None:
+        '''Stop counting a ticket, with the values it was counted with.'''
+        key = self.__key(ticket)
+        number = self.__count[key] - 1
+        if number > 0:
+            self.__count[key] = number
+        else:
+            del self.__count[key]
+        self.__total -= 1
+
+    def group_by(self, fields: Iterable[str], condition: TicketFormat = None):
+        '''Count the tickets matching the condition by the values of the fields.'''
+        fields = parse_group_by(fields)
+        position = [GROUP_FIELD.index(field) for field in fields]
+        constraint = [] if condition is None else [
+            (i, getattr(condition, field)) for i, field in enumerate(GROUP_FIELD)
+            if getattr(condition, field) is not False]
+        groups = Counter()
+        for key, number in self.__count.items():
+            if all(key[i] == value for i, value in constraint):
+                groups[tuple(key[i] for i in position)] += number
+        return GroupReport(fields, groups)
+
+class GroupReport():
+    '''Counts by group, the largest group first.'''
+    def __init__(self, fields: Tuple[str], groups: Dict[tuple, int]) -> None:
+        self.fields = fields
+        self.groups = sorted(groups.items(),
+                             key=lambda group: (-group[1], [str(value) for value in group[0]]))
+
+    def total(self) -> int:
+        '''Number of tickets counted.'''
+        return sum(number for _, number in self.groups)
+
+    def to_dicts(self) -> List[dict]:
+        '''One dict per group, the fields and count.'''
+        return [dict(zip(self.fields, values), count=number) for values, number in self.groups]
+
+    def write(self, output: TextIO = None, output_format: str = 'text') -> None:
+        '''Write the report as a text table, a JSON array or CSV.'''
+        output = output or sys.stdout
+        if output_format == 'json':
+            json.dump(self.to_dicts(), output, ensure_ascii=False)
+            output.write('\n')
+        elif output_format == 'csv':
+            writer = csv.writer(output, lineterminator='\n')
+            writer.writerow(self.fields + ('count',))
+            for values, number in self.groups:
+                writer.writerow(values + (number,))
+        elif output_format == 'text':
+            rows = [self.fields + ('count',)] + [
+                tuple(str(value) for value in values) + (str(number),)
+                for values, number in self.groups]
+            width = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+            for row in rows:
+                output.write('  '.join(value.ljust(size) for value, size in zip(row, width))
+                             .rstrip() + '\n')
+            output.write('Total: %d\n' % self.total())
+        else:
+            raise InputException(InputError.NoSuchOption)
+
+def main() -> None:
+    from storage import open_storage
+    from user import load_user
+
+    parser = argparse.ArgumentParser(description='Count the tickets a user can read by group.')
+    parser.add_argument('--ticket-file', required=True, help='workbook or database')
+    parser.add_argument('--user', required=True)
+    parser.add_argument('--identity', required=True, help='PM, QA or RD')
+    parser.add_argument('--group-by', default='status', help='comma separated, of %s'
+                        % ', '.join(GROUP_FIELD))
+    parser.add_argument('--format', choices=REPORT_FORMAT, default='text')
+    args = parser.parse_args()
+
+    user = load_user(args.user, args.identity.upper())
+    stats = TicketStats(open_storage(args.ticket_file).stream(user.read_condition))
+    stats.group_by(args.group_by, user.read_condition).write(output_format=args.format)
+
+if __name__ == '__main__':
+    main()
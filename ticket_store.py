@@ -0,0 +1,304 @@
+'''
+Index:
+    TicketStore
+    TicketTransaction
+'''
+
+from contextlib import contextmanager
+from copy import copy
+import threading
+from typing import Hashable, Iterable, Iterator, List
+
+from error_handler import InputException
+from namespace import Authorization, InputError
+from query import MatchAll, Query, from_condition
+from read_write_lock import ReadWriteLock
+from search_index import SearchIndex
+from ticket_db import TicketFormat
+from ticket_index import TicketIndex
+from ticket_journal import DirtyTracker, TicketChange
+from ticket_stats import GroupReport, TicketStats
+
+class TicketStore():
+    '''Own the tickets of a session, their index and their dirty tracking.
+
+    The search index is built on the first search, from search_file when
+    given, and the group counts on the first report; both follow the
+    changes of the session after that.
+
+    The store may be shared by threads. Reads run together, a commit
+    waits for them and holds off new ones until it is applied. A read
+    and modify that must not interleave with other writers goes in
+    writing(), and a caller looking at the fields of the tickets it got
+    while others write does so in reading().
+    '''
+    def __init__(self, all_ticket: Iterable[TicketFormat], search_file: str = None) -> None:
+        self.all_ticket = all_ticket # a list, or a stream for a read session
+        self.__ticket_index = None # TicketIndex obj, built on first use
+        self.__dirty_tracker = DirtyTracker()
+        self.__search_file = search_file
+        self.__search_index = None # SearchIndex obj, built on first search
+        self.__unsaved = {} # search key -> ticket without an id yet
+        self.__stats = None # TicketStats obj, built on first use
+        self.__lock = ReadWriteLock()
+        self.__build_lock = threading.Lock() # one reader builds what is built on first use
+        self.__recording = threading.local() # .committed, [TicketChange] of the thread
+
+    def reading(self):
+        '''Hold off the writers in the block.'''
+        return self.__lock.read_locked()
+
+    def writing(self):
+        '''Be the only one using the store in the block.'''
+        return self.__lock.write_locked()
+
+    def __get_list(self) -> list:
+        '''Get the tickets as a list, a stream is read at the first time.'''
+        if not isinstance(self.all_ticket, list):
+            with self.__build_lock:
+                if not isinstance(self.all_ticket, list):
+                    self.all_ticket = list(self.all_ticket)
+        return self.all_ticket
+
+    def __get_index(self) -> TicketIndex:
+        '''Get the index, build it at the first time.'''
+        if self.__ticket_index is None:
+            all_ticket = self.__get_list()
+            with self.__build_lock:
+                if self.__ticket_index is None:
+                    self.__ticket_index = TicketIndex(all_ticket)
+        return self.__ticket_index
+
+    def find_id(self, ticket_id: int) -> List[TicketFormat]:
+        '''Get the ticket with the id, as a list of none or one.'''
+        with self.__lock.read_locked():
+            return self.__get_index().find_id(ticket_id)
+
+    def find_title(self, title: str) -> List[TicketFormat]:
+        '''Get the tickets with the title.'''
+        with self.__lock.read_locked():
+            return self.__get_index().find_title(title)
+
+    def select(self, condition: TicketFormat or Query) -> Iterable[TicketFormat]:
+        '''Get the tickets matching a read condition or a query.
+
+        A stream is filtered as it goes, a list is answered from the index.
+        '''
+        query = from_condition(condition)
+        if self.__ticket_index is None and not isinstance(self.all_ticket, list):
+            return query.filter(self.all_ticket)
+        with self.__lock.read_locked():
+            return query.run(self.__get_index())
+
+    def __search_key(self, ticket: TicketFormat) -> Hashable:
+        '''Key of the ticket in the search index, its id once it has one.'''
+        if ticket.ticket_id is not None:
+            return ticket.ticket_id
+        key = ('new', id(ticket))
+        self.__unsaved[key] = ticket
+        return key
+
+    def __get_search_index(self) -> SearchIndex:
+        '''Get the search index, load it and bring it up to the tickets at the first time.'''
+        if self.__search_index is None:
+            all_ticket = self.__get_list()
+            with self.__build_lock:
+                if self.__search_index is None:
+                    if self.__search_file:
+                        search_index = SearchIndex.load(self.__search_file)
+                    else:
+                        search_index = SearchIndex()
+                    search_index.sync((self.__search_key(ticket), ticket)
+                                      for ticket in all_ticket)
+                    if self.__search_file and search_index.changed:
+                        search_index.save(self.__search_file)
+                    self.__search_index = search_index
+        return self.__search_index
+
+    def search(self,
+               text: str,
+               condition: TicketFormat or Query = None,
+               limit: int = None) -> List[TicketFormat]:
+        '''Get the tickets matching the words of the text and the condition, best first.'''
+        query = MatchAll() if condition is None else from_condition(condition)
+        with self.__lock.read_locked():
+            search_index = self.__get_search_index()
+            keep = None
+            if not isinstance(query, MatchAll):
+                keep = {self.__search_key(ticket) for ticket in query.run(self.__get_index())}
+            ticket_index = self.__get_index()
+            found = []
+            for key in search_index.search(text, limit, keep):
+                if key in self.__unsaved:
+                    found.append(self.__unsaved[key])
+                else:
+                    found.extend(ticket_index.find_id(key))
+            return found
+
+    def get_stats(self) -> TicketStats:
+        '''Get the group counts, count the tickets at the first time.
+
+        The counts change with each commit, a thread reads them in reading().
+        '''
+        if self.__stats is None:
+            all_ticket = self.__get_list()
+            with self.__build_lock:
+                if self.__stats is None:
+                    self.__stats = TicketStats(all_ticket)
+        return self.__stats
+
+    def group_by(self, fields: Iterable[str], condition: TicketFormat = None) -> GroupReport:
+        '''Count the tickets matching the condition by the values of the fields.'''
+        with self.__lock.read_locked():
+            return self.get_stats().group_by(fields, condition)
+
+    @contextmanager
+    def recording(self) -> Iterator[List[TicketChange]]:
+        '''Collect each change the thread commits in the block, in the order applied.'''
+        self.__recording.committed = committed = []
+        try:
+            yield committed
+        finally:
+            self.__recording.committed = None
+
+    def transaction(self):
+        '''Start a transaction.'''
+        return TicketTransaction(self)
+
+    def get_changes(self) -> List[TicketChange]:
+        '''Get the changes of the tickets made in this session.'''
+        with self.__lock.read_locked():
+            return self.__dirty_tracker.get_changes()
+
+    def clear_changes(self) -> None:
+        '''Start tracking afresh once the changes are saved, for a store saved more than once.'''
+        with self.__lock.write_locked():
+            self.__dirty_tracker = DirtyTracker()
+
+    def assign_ids(self, changes: List[TicketChange]) -> None:
+        '''Give the created tickets the ids the storage gave their changes when saved.'''
+        with self.__lock.write_locked():
+            ticket_index = self.__get_index()
+            search_index = self.__search_index
+            for change in changes:
+                ticket = change.ticket
+                if (change.op != Authorization.Create.value or change.ticket_id is None
+                        or ticket is None or ticket.ticket_id is not None
+                        or ticket not in ticket_index):
+                    continue
+                if search_index is not None:
+                    key = self.__search_key(ticket)
+                    search_index.remove(key)
+                    del self.__unsaved[key]
+                ticket_index.set_id(ticket, change.ticket_id)
+                if search_index is not None:
+                    search_index.add(ticket.ticket_id, ticket)
+
+    def _apply(self, created: list, edited: dict, deleted: dict) -> None:
+        '''Apply a committed transaction.'''
+        with self.__lock.write_locked():
+            self.__apply(created, edited, deleted)
+
+    def __apply(self, created: list, edited: dict, deleted: dict) -> None:
+        ticket_index = self.__get_index()
+        touched = [ori_ticket for ori_ticket, _ in edited.values()] + list(deleted.values())
+        for ticket in touched:
+            if ticket not in ticket_index:
+                raise InputException(InputError.NoSuchOption)
+
+        search_index = self.__search_index
+        stats = self.__stats
+        committed = getattr(self.__recording, 'committed', None)
+        for ticket in deleted.values():
+            self.__dirty_tracker.track_delete(ticket)
+            if committed is not None:
+                committed.append(TicketChange(Authorization.Delete.value,
+                                              before=ticket.to_row(),
+                                              ticket_id=ticket.ticket_id,
+                                              ticket=ticket))
+            ticket_index.remove(ticket)
+            if stats is not None:
+                stats.remove(ticket)
+            if search_index is not None:
+                search_index.remove(self.__search_key(ticket))
+        if len(deleted) == 1:
+            self.all_ticket.remove(next(iter(deleted.values())))
+        elif deleted:
+            self.all_ticket[:] = [ticket for ticket in self.all_ticket
+                                  if id(ticket) not in deleted]
+        for ori_ticket, ticket in edited.values():
+            self.__dirty_tracker.track_update(ori_ticket)
+            if committed is not None and ori_ticket.to_row() != ticket.to_row():
+                committed.append(TicketChange(Authorization.Update.value,
+                                              before=ori_ticket.to_row(),
+                                              after=ticket.to_row(),
+                                              ticket_id=ori_ticket.ticket_id,
+                                              ticket=ori_ticket))
+            if stats is not None:
+                stats.remove(ori_ticket)
+                stats.add(ticket)
+            ticket_index.update(ori_ticket, ticket)
+            if search_index is not None:
+                search_index.add(self.__search_key(ori_ticket), ori_ticket)
+        for ticket in created:
+            self.all_ticket.append(ticket)
+            ticket_index.add(ticket)
+            self.__dirty_tracker.track_create(ticket)
+            if committed is not None:
+                committed.append(TicketChange(Authorization.Create.value,
+                                              after=ticket.to_row(),
+                                              ticket=ticket))
+            if stats is not None:
+                stats.add(ticket)
+            if search_index is not None:
+                search_index.add(self.__search_key(ticket), ticket)
+
+class TicketTransaction():
+    '''Stage changes of the store, apply them all at commit.
+
+    edit() gives a copy of the ticket, the store is untouched until
+    commit. Used as a context manager it commits when the block ends and
+    rolls back when it raises.
+    '''
+    def __init__(self, ticket_store: TicketStore) -> None:
+        self.__ticket_store = ticket_store
+        self.__created = []
+        self.__edited = {}      # id(ticket) -> (ticket, copy)
+        self.__deleted = {}     # id(ticket) -> ticket
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback) -> bool:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+    def create(self, ticket: TicketFormat) -> None:
+        '''Stage a new ticket.'''
+        self.__created.append(ticket)
+
+    def edit(self, ticket: TicketFormat) -> TicketFormat:
+        '''Get the working copy of the ticket.'''
+        if id(ticket) not in self.__edited:
+            self.__edited[id(ticket)] = (ticket, copy(ticket))
+        return self.__edited[id(ticket)][1]
+
+    def delete(self, ticket: TicketFormat) -> None:
+        '''Stage the deletion of the ticket.'''
+        self.__edited.pop(id(ticket), None)
+        self.__deleted[id(ticket)] = ticket
+
+    def commit(self) -> None:
+        '''Apply the staged changes to the store.'''
+        created, edited, deleted = self.__created, self.__edited, self.__deleted
+        self.rollback()
+        self.__ticket_store._apply(created, edited, deleted)
+
+    def rollback(self) -> None:
+        '''Drop the staged changes.'''
+        self.__created = []
+        self.__edited = {}
+        self.__deleted = {}
@@ -2,56 +2,80 @@
 Index:
     TicketSystem
 '''
+from change_feed import ChangeFeed, PendingFeed
 from crud import CrudHandler
 from error_handler import AuthorizationException, InputException, TicketDBException
 from error_handler import ErrorTraceBack
-from namespace import UserIdentity, InputError
+import instrument
+from namespace import Authorization
+import notification
+from search_index import SearchIndex
 import ticket_db
-from ticket_db import NormalGetSheetColumn, ParseTicketDB, WriteDB
-from user import UserPM, UserQA, UserRD
+from storage import open_storage
+from user import load_user
 
 TICKET_FILE = r'\THE\PATH\ticket.xlsx'
+OUTBOX_FILE = r'\THE\PATH\outbox.db'
 
 class TicketSystem():
     '''Ticket system'''
     def __init__(self) -> None:
         self.__all_ticket = [] # [TicketFormat] self.current_user = None # User obj
         self.crud_adapter = None # CrudAdpater obj
+        self.__storage = None # StorageInterface obj
+        self.__pending_feed = None # PendingFeed obj
 
-    def __get_all_ticket(self, ticket_path) -> None:
-        '''Get all the ticket in the sheet.'''
-        sheet_column_interface = NormalGetSheetColumn()
-        self.__all_ticket = ParseTicketDB(ticket_path, sheet_column_interface).get_content()
+    @instrument.timed('TicketSystem.load')
+    def __get_all_ticket(self, ticket_path, action: str) -> None:
+        '''Get the tickets the user can read from the storage.'''
+        self.__storage = open_storage(ticket_path)
+        read_condition = self.current_user.read_condition
+        if action == Authorization.Read.value:
+            # a read session walks the tickets once, stream them
+            self.__all_ticket = self.__storage.stream(read_condition)
+        elif action == Authorization.Search.value:
+            # every ticket, the search index is kept for all users
+            self.__all_ticket = self.__storage.load()
+        else:
+            self.__all_ticket = self.__storage.load(read_condition)
 
     def __load_user_information(self, name:str, identity:str) -> None:
         '''Load user identity.'''
-        if identity == UserIdentity.PM.value:
-            self.current_user = UserPM(name)
-        elif identity == UserIdentity.QA.value:
-            self.current_user = UserQA(name)
-        elif identity == UserIdentity.RD.value:
-            self.current_user = UserRD(name)
-        else:
-            raise InputException(InputError.NoSuchIdentity)
+        self.current_user = load_user(name, identity)
 
+    @instrument.timed('TicketSystem.save')
     def __save_ticket(self) -> None:
-        '''Save all tickets to the sheet.'''
-        WriteDB(self.__all_ticket).fill_in(TICKET_FILE)
-        print("File saved.")
+        '''Save the changed tickets to the storage.'''
+        changes = self.crud_adapter.get_changes()
+        if not changes:
+            print("Nothing changed.")
+            return
+
+        conflicts = self.__storage.save(self.__all_ticket, changes)
+        self.__pending_feed.publish(changes, conflicts)
+        for change in conflicts:
+            title = (change.before or change.after)[0]
+            print("%s was changed by someone else, your change is not saved." % title)
+        if len(conflicts) < len(changes):
+            print("File saved.")
 
     def __preprocess(self) -> None:
         '''Get name and identity.'''
-        self.__get_all_ticket(TICKET_FILE)
         name = input("Enter your name: ")
         identity = input("Enter your identity (PM/QA/RD): ").upper()
         print("Loading user information.")
         self.__load_user_information(name, identity)
-        self.crud_adapter = CrudHandler(self.current_user, self.__all_ticket)
 
     def __operate(self):
         '''Let the user decide what he/she want to do.'''
         user_auth= self.current_user.get_authorization()
         action = input("What do you want to do? %s: " % user_auth).upper()
+        self.__get_all_ticket(TICKET_FILE, action)
+        self.__pending_feed = PendingFeed(ChangeFeed(TICKET_FILE + ChangeFeed.SUFFIX))
+        self.crud_adapter = CrudHandler(self.current_user,
+                                        self.__all_ticket,
+                                        TICKET_FILE + SearchIndex.SUFFIX,
+                                        self.__pending_feed)
         self.crud_adapter.choose_crud (action)
 
     def run_system(self):
@@ -61,9 +85,11 @@ class TicketSystem():
             self.__operate()
             self.__save_ticket()
 
-        except TicketDBException:
+        except TicketDBException as error:
             error_title = "DB error"
             ErrorTraceBack().error_msg(error_title)
+            for parse_error in error.errors:
+                print('\t%s' % parse_error)
 
         except InputException:
             error_title = "Wrong input"
@@ -79,4 +105,7 @@ class TicketSystem():
 
 if __name__ == '__main__':
     ticket_db.TICKET_FILE = TICKET_FILE
+    notification.OUTBOX_FILE = OUTBOX_FILE
+    instrument.enable_from_env()
     TicketSystem().run_system()
+    instrument.finish()
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
+from error_handler import InputException
 from namespace import TicketStatus, TicketType, UserIdentity
-from namespace import Authorization
+from namespace import Authorization, InputError
 from ticket_db import TicketFormat
 
 class UserInterface(ABC):
@@ -35,12 +36,16 @@ class UserInterface(ABC):
 
         if self.is_readable:
             user_authorization += "Read(%s), " % Authorization.Read.value
+            user_authorization += "Search(%s), " % Authorization.Search.value
+            user_authorization += "Report(%s), " % Authorization.Report.value
 
         if self.is_updatable:
             user_authorization += "Update(%s)," % Authorization.Update.value
+            user_authorization += "Bulk update(%s), " % Authorization.BulkUpdate.value
 
         if self.is_deletable:
-            user_authorization += "Delete(%s)" % Authorization.Delete.value
+            user_authorization += "Delete(%s), " % Authorization.Delete.value
+            user_authorization += "Bulk delete(%s)" % Authorization.BulkDelete.value
 
         return user_authorization
 
@@ -92,3 +97,13 @@ class UserRD(UserInterface):
 
         self.update_content.status = TicketStatus.Done.value
 
+def load_user(name: str, identity: str) -> UserInterface:
+    '''Load the user of the identity.'''
+    if identity == UserIdentity.PM.value:
+        return UserPM(name)
+    elif identity == UserIdentity.QA.value:
+        return UserQA(name)
+    elif identity == UserIdentity.RD.value:
+        return UserRD(name)
+    else:
+        raise InputException(InputError.NoSuchIdentity)
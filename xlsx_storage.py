@@ -0,0 +1,193 @@
+'''
+Index:
+    XlsxStorage
+'''
+
+from itertools import count
+import sys
+from typing import Iterable, Iterator, List
+
+from archive import TicketArchive
+from file_lock import FileLock
+from namespace import Authorization, TicketStatus
+from next_id import TicketNextId
+from snapshot import TicketSnapshot
+from storage import StorageInterface, split_origin
+from ticket_db import NormalGetSheetColumn, ParseTicketDB, StreamParseTicketDB
+from ticket_db import TicketFormat, WriteDB
+from ticket_index import TicketIndex
+from ticket_journal import TicketChange, TicketJournal, find_current, merge_changes
+
+class XlsxStorage(StorageInterface):
+    '''Workbook plus its journal, shared by the sessions through a file lock.
+
+    The workbook and the journal hold the active tickets. Done tickets move
+    to the archive when the journal is folded, and back to the workbook
+    when they are changed to another status.
+    '''
+    def __init__(self, ticket_file: str) -> None:
+        self.__ticket_file = ticket_file
+
+    def __load(self) -> List[TicketFormat]:
+        '''Load every active ticket, the caller holds the lock.'''
+        snapshot = TicketSnapshot(self.__ticket_file)
+        all_ticket = snapshot.load()
+        if all_ticket is None:
+            parser = ParseTicketDB(self.__ticket_file, NormalGetSheetColumn())
+            all_ticket = parser.get_content()
+            snapshot.store(all_ticket)
+            TicketNextId(self.__ticket_file).store(parser.get_next_id())
+        return TicketJournal(self.__ticket_file).replay(all_ticket)
+
+    def __next_id(self, current: List[TicketFormat]) -> int:
+        '''Get the id of the next ticket created, the caller holds the lock.'''
+        return max([TicketNextId(self.__ticket_file).load(),
+                    TicketJournal(self.__ticket_file).last_id() + 1]
+                   + [ticket.ticket_id + 1 for ticket in current
+                      if ticket.ticket_id is not None])
+
+    @staticmethod
+    def __want_archive(read_condition: TicketFormat) -> bool:
+        '''Whether the tickets read may be Done, then the archive is read too.'''
+        return read_condition is None or read_condition.status in (False, TicketStatus.Done.value)
+
+    @staticmethod
+    def __chain(active: Iterable[TicketFormat], partitions: list) -> Iterator[TicketFormat]:
+        '''Yield the active tickets, then the archived ones not also active.'''
+        try:
+            active_id = set()
+            for ticket in active:
+                active_id.add(ticket.ticket_id)
+                yield ticket
+            for ticket in TicketArchive.iter_open(partitions):
+                if ticket.ticket_id is None or ticket.ticket_id not in active_id:
+                    yield ticket
+        finally:
+            for partition in partitions:
+                partition.close()
+
+    def load(self, read_condition: TicketFormat = None) -> List[TicketFormat]:
+        '''Load every active ticket, and the archived ones when Done may be read.'''
+        with FileLock(self.__ticket_file, shared=True):
+            all_ticket = self.__load()
+            if not self.__want_archive(read_condition):
+                return all_ticket
+            partitions = TicketArchive(self.__ticket_file).open()
+        return list(self.__chain(all_ticket, partitions))
+
+    def stream(self, read_condition: TicketFormat = None) -> Iterator[TicketFormat]:
+        '''Stream the workbook row by row, patched by the journal, then the archive.
+
+        The lock is only held while the journal is read and the files are
+        opened. An open file stays readable when a compaction replaces it.
+        '''
+        with FileLock(self.__ticket_file, shared=True):
+            tickets = StreamParseTicketDB(self.__ticket_file).iter_content()
+            active = TicketJournal(self.__ticket_file).replay_stream(tickets)
+            partitions = []
+            if self.__want_archive(read_condition):
+                partitions = TicketArchive(self.__ticket_file).open()
+        return self.__chain(active, partitions)
+
+    @staticmethod
+    def __split(current: List[TicketFormat], changes: List[TicketChange]) -> tuple:
+        '''Split the changes of active tickets from those of archived ones.'''
+        ticket_index = TicketIndex(current)
+        active, archived = [], []
+        for change in changes:
+            if change.op != Authorization.Create.value and not find_current(ticket_index, change):
+                archived.append(change)
+            else:
+                active.append(change)
+        return active, archived
+
+    @staticmethod
+    def __merge_archived(archive: TicketArchive, changes: List[TicketChange]) -> tuple:
+        '''Merge the changes into the archive.
+
+        Return the changed partitions, the tickets no longer Done which go
+        back to the workbook, and the changes in conflict.
+        '''
+        partitions = archive.load()
+        saved = {month: [ticket.to_packed() for ticket in tickets]
+                 for month, tickets in partitions.items()}
+        month_of = {}
+        archived = []
+        for month, tickets in partitions.items():
+            for ticket in tickets:
+                month_of[id(ticket)] = month
+                archived.append(ticket)
+        _, conflicts = merge_changes(archived, changes)
+
+        kept = {month: [] for month in partitions}
+        reopened = []
+        for ticket in archived:
+            if ticket.status == TicketStatus.Done.value:
+                kept[month_of[id(ticket)]].append(ticket)
+            else:
+                reopened.append(ticket)
+        changed = {month: tickets for month, tickets in kept.items()
+                   if [ticket.to_packed() for ticket in tickets] != saved[month]}
+        return changed, reopened, conflicts
+
+    def save(self, all_ticket: List[TicketFormat], changes: List[TicketChange]) -> List[TicketChange]:
+        '''Merge the changes into the saved tickets and append them to the journal.
+
+        The saved tickets are re-read under the lock, so the session only
+        holds the lock for the save, and the created tickets get the next
+        ids. A change of an archived ticket rewrites its partition. The
+        journal is folded into the workbook when it is big. The changes of
+        tickets of another workbook or sheet are returned unsaved.
+        '''
+        changes, foreign = split_origin(changes, self.__ticket_file)
+        with FileLock(self.__ticket_file):
+            current = self.__load()
+            journal = TicketJournal(self.__ticket_file)
+            new_id = count(self.__next_id(current))
+            archive = TicketArchive(self.__ticket_file)
+            archived_changes = []
+            if archive.months():
+                changes, archived_changes = self.__split(current, changes)
+            merged, conflicts = merge_changes(current, changes, new_id)
+
+            changed = {}
+            if archived_changes:
+                changed, reopened, archive_conflicts = self.__merge_archived(archive,
+                                                                             archived_changes)
+                conflicts.extend(archive_conflicts)
+                current.extend(reopened)
+                merged.extend(TicketChange(Authorization.Create.value,
+                                           after=ticket.to_row(),
+                                           ticket_id=ticket.ticket_id)
+                              for ticket in reopened)
+            # the journal first, a crash leaves a reopened ticket in both
+            # places and the workbook wins
+            journal.append(merged)
+            for month, tickets in changed.items():
+                archive.store(month, tickets)
+            if journal.need_compaction():
+                self.__compact(current, next(new_id))
+        return foreign + conflicts
+
+    def __compact(self, current: List[TicketFormat], next_id: int) -> None:
+        '''Fold the journal into the workbook, the Done tickets go to the archive.'''
+        done = [ticket for ticket in current if ticket.status == TicketStatus.Done.value]
+        active = [ticket for ticket in current if ticket.status != TicketStatus.Done.value]
+        # the archive first, a crash leaves the tickets in both places
+        TicketArchive(self.__ticket_file).add(done)
+        WriteDB(active).fill_in(self.__ticket_file, next_id)
+        TicketJournal(self.__ticket_file).clear()
+        TicketSnapshot(self.__ticket_file).store(active)
+
+    def compact(self) -> int:
+        '''Fold the journal and archive the Done tickets now, return how many are archived.'''
+        with FileLock(self.__ticket_file):
+            current = self.__load()
+            self.__compact(current, self.__next_id(current))
+        return sum(ticket.status == TicketStatus.Done.value for ticket in current)
+
+if __name__ == '__main__':
+    if len(sys.argv) == 2:
+        print('%d tickets archived.' % XlsxStorage(sys.argv[1]).compact())
+    else:
+        print('python xlsx_storage.py ticket.xlsx')